@@ -0,0 +1,269 @@
+# benchmarks/hot_paths.py — microbenchmarks for the cogs' hot paths, no Discord connection needed
+# Runs against a throwaway database in a temp directory, using the stubs in benchmarks/stubs.py.
+#
+#   python -m benchmarks.hot_paths                                # run and print
+#   python -m benchmarks.hot_paths --save baseline.json           # record a baseline
+#   python -m benchmarks.hot_paths --compare baseline.json --threshold 0.25
+#       -> exits 1 if any case's p50 got more than 25% slower than the baseline
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import gacha_main as gacha
+import xp_reporter_main as xp
+from database import database
+from guild_config import guilds
+from migrations import migrate
+from outbound import OutboundQueue
+from benchmarks.stubs import StubBot, StubChannel, StubGuild, StubMember, StubMessage, StubRole
+
+# =====================================================
+# CORPUS
+# =====================================================
+def _submission(name="Aldric Vayne", level=14, progression="Solo Training", xp_boost=None, crowns_boost=None, extra=""):
+    lines = [
+        f"**Character Name(s):** {name}",
+        f"**Character Level:** {level}",
+        f"**Type of Progression:** {progression}",
+    ]
+    if xp_boost is not None:
+        lines.append(f"**Boost(s) for XP:** {xp_boost}%")
+    if crowns_boost is not None:
+        lines.append(f"**Boost(s) for Crowns:** {crowns_boost}%")
+    return "\n".join(lines) + extra
+
+REAL_SUBMISSIONS = [
+    _submission(),
+    _submission("Brynja & Holt", 27, "Troll Mission", xp_boost=10, crowns_boost=20),
+    _submission("Kestrel", 3, "AFK Farm II"),
+    _submission("Mira Solenne", 22, "afk 3", xp_boost=20),
+    _submission("Thane Gorrick", 30, "Battle vs. the Ashen Host", extra="\n**Notes:** long fight, screenshots attached"),
+    _submission("Ysolde", 11, "Dungeon crawl (Sunken Vault)", crowns_boost=5),
+    _submission("Corvin", 8, "  solo train  "),
+]
+
+ADVERSARIAL_SUBMISSIONS = [
+    # Never-closed bold markers and a huge progression field
+    _submission(progression="Solo Training " + "x" * 20_000),
+    _submission(progression="*" * 5_000 + " Troll Mission"),
+    # Field labels repeated many times
+    "\n".join(_submission() for _ in range(200)),
+    # Lots of near-miss labels
+    "**Character Name(s):** A\n" + "**Character Level: 1\n" * 2_000 + "**Type of Progression:** Battle",
+    # Long single line, no newlines at all
+    "**Character Name(s):** " + "N" * 50_000,
+]
+
+# =====================================================
+# HARNESS
+# =====================================================
+def _summary(samples: list) -> dict:
+    samples = sorted(samples)
+    n = len(samples)
+    mean = sum(samples) / n
+    return {
+        "n": n,
+        "p50_us": samples[n // 2] * 1e6,
+        "p99_us": samples[min(n - 1, int(n * 0.99))] * 1e6,
+        "ops_per_sec": 1.0 / mean if mean else float("inf"),
+    }
+
+def _bench_sync(fn, iterations: int) -> dict:
+    samples = []
+    clock = time.perf_counter
+    for i in range(iterations):
+        start = clock()
+        fn(i)
+        samples.append(clock() - start)
+    return _summary(samples)
+
+async def _bench_async(fn, iterations: int) -> dict:
+    samples = []
+    clock = time.perf_counter
+    for i in range(iterations):
+        start = clock()
+        await fn(i)
+        samples.append(clock() - start)
+    return _summary(samples)
+
+def _seed_history(path: str, guild_id: int, rows: int, users: int):
+    rng = random.Random(7)
+    names = [(name, rarity) for rarity, items in gacha.active_banner().config.loot_table.items() for name in items]
+    conn = sqlite3.connect(path)
+    try:
+        ids = dict(conn.execute("SELECT name, id FROM items"))
+        now = int(time.time())
+        batch = []
+        for i in range(rows):
+            name, rarity = rng.choice(names)
+            batch.append((guild_id, rng.randrange(users), ids[name], rarity, now - (rows - i), 1))
+        with conn:
+            conn.executemany("INSERT INTO pull_history (guild_id, user_id, item_id, rarity, timestamp, count) VALUES (?, ?, ?, ?, ?, ?)", batch)
+    finally:
+        conn.close()
+
+# =====================================================
+# CASES
+# =====================================================
+async def run_cases(scale: float, history_rows: int) -> dict:
+    def n(base):
+        return max(10, int(base * scale))
+
+    results = {}
+
+    def record(name, summary):
+        results[name] = summary
+        print(f"  {name:<34}{summary['p50_us']:>11.1f}{summary['p99_us']:>11.1f}{summary['ops_per_sec']:>13,.0f}")
+
+    print(f"  {'case':<34}{'p50 µs':>11}{'p99 µs':>11}{'ops/s':>13}")
+
+    cfg = next(iter(guilds))
+    gid = cfg.guild_id
+    await gacha.sync_item_catalog()
+    _seed_history(database.path, gid, history_rows, users=1000)
+    history = gacha.HistoryBuffer()
+
+    # ---- gacha ----
+    fresh_ids = iter(range(1_000_000, 10_000_000))
+    warm_user = StubMember(user_id=42)
+    await gacha.do_wish(gid, warm_user, 1, history)
+
+    for amount in (1, 10):
+        async def cold(_, amount=amount):
+            # New user every call: pity cache miss and a brand new pity row
+            await gacha.do_wish(gid, StubMember(user_id=next(fresh_ids)), amount, history)
+        record(f"do_wish x{amount} (cold)", await _bench_async(cold, n(500)))
+
+        async def warm(_, amount=amount):
+            await gacha.do_wish(gid, warm_user, amount, history)
+        record(f"do_wish x{amount} (warm)", await _bench_async(warm, n(500)))
+    await history.flush()
+
+    async def pity_cached(_):
+        await gacha.get_pity(gid, warm_user.id)
+    record("get_pity (cache hit)", await _bench_async(pity_cached, n(5000)))
+
+    async def pity_db(i):
+        await database.read(gacha._get_pity, gid, i % 1000)
+    record("get_pity (DB read)", await _bench_async(pity_db, n(2000)))
+
+    async def history_read(i):
+        await gacha.get_history(gid, i % 1000)
+    record(f"get_history ({history_rows:,} rows)", await _bench_async(history_read, n(2000)))
+
+    queries = ["", "x", "xp cr", "crowns", "legion", "zzz"]
+
+    async def autocomplete(i):
+        await gacha.inventory_index.search((gid, warm_user.id), queries[i % len(queries)])
+    record("/use autocomplete (indexed)", await _bench_async(autocomplete, n(5000)))
+
+    results_10, state_10 = await gacha.do_wish(gid, warm_user, 10, history)
+    record("wish_embed x10", _bench_sync(lambda _: gacha.wish_embed(warm_user, 10, results_10, state_10), n(5000)))
+    await history.flush()
+
+    # ---- xp reporter ----
+    guild = StubGuild(gid, roles=[StubRole(rid) for rid in cfg.approver_role_ids])
+    in_id, out_id = next(iter(cfg.xp_routes.items()))
+    in_channel = StubChannel(in_id, guild)
+    out_channel = StubChannel(out_id, guild)
+    cog = xp.XPReporterCog(StubBot(channels=[in_channel, out_channel]))
+    # Stubs have no rate limits; pacing is measured in benchmarks/outbound.py
+    cog.outbound = OutboundQueue(send_rate=(10**9, 1.0), reaction_rate=(10**9, 1.0))
+    author = StubMember(name="Submitter", roles=[StubRole(cfg.afk_role_id)], guild=guild)
+
+    real = [StubMessage(text, author, in_channel) for text in REAL_SUBMISSIONS]
+    record("xp _parse (real)", _bench_sync(lambda i: cog._parse(real[i % len(real)]), n(20000)))
+    adversarial = [StubMessage(text, author, in_channel) for text in ADVERSARIAL_SUBMISSIONS]
+    record("xp _parse (adversarial)", _bench_sync(lambda i: cog._parse(adversarial[i % len(adversarial)]), n(500)))
+
+    rules = xp.active_rules()
+    auto = [m for m in real if (rule := rules.match(cog._parse(m).progression_key)) and not rule.needs_review]
+
+    async def process(i):
+        # A fresh message id each time: the ledger credits a message only once
+        message = StubMessage(auto[i % len(auto)].content, author, in_channel)
+        await cog._process_submission(message, cog._parse(message))
+    record("xp _process_submission", await _bench_async(process, n(5000)))
+    await cog.outbound.drain()
+
+    return results
+
+# =====================================================
+# BASELINES / CLI
+# =====================================================
+def compare(results: dict, baseline: dict, threshold: float, metric: str) -> list:
+    regressions = []
+    print(f"\nAgainst baseline ({metric}, threshold +{threshold:.0%}):")
+    for name, current in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            print(f"  {name:<34} (no baseline)")
+            continue
+        change = current[metric] / base[metric] - 1 if base[metric] else 0.0
+        failed = change > threshold
+        if failed:
+            regressions.append(name)
+        print(f"  {name:<34}{base[metric]:>11.1f}{current[metric]:>11.1f}{change:>+9.1%}  {'REGRESSION' if failed else 'ok'}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the gacha and XP reporter hot paths")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every case's iteration count")
+    parser.add_argument("--history-rows", type=int, default=500_000, help="rows seeded into pull_history")
+    parser.add_argument("--save", metavar="FILE", help="write results to FILE as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--metric", choices=("p50_us", "p99_us"), default="p50_us")
+    args = parser.parse_args(argv)
+
+    save = os.path.abspath(args.save) if args.save else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+
+    workdir = tempfile.mkdtemp(prefix="hot_paths_")
+    cwd = os.getcwd()
+    # DB_NAME is relative, so running inside the temp dir keeps the real database untouched
+    os.chdir(workdir)
+    try:
+        migrate()
+
+        async def run():
+            try:
+                return await run_cases(args.scale, args.history_rows)
+            finally:
+                await database.close()
+
+        results = asyncio.run(run())
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if save:
+        with open(save, "w", encoding="utf-8") as f:
+            json.dump({
+                "created": int(time.time()),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "results": results,
+            }, f, indent=2)
+        print(f"\nBaseline written to {save}")
+
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.metric)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) regressed: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+# benchmarks/item_catalog.py — size/speed report for the v5 item catalog migration
+# Builds a synthetic database at schema v4 (item names on every row), migrates a copy to v5
+# (integer item ids), and compares table sizes and the hot queries on both.
+#
+#   python -m benchmarks.item_catalog --pulls 1000000 --users 5000 --seed 1
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from collections import Counter
+
+import gacha_main as gacha
+from migrations import migrate
+
+def _build_v4(path: str, pulls: int, users: int, seed: int):
+    migrate(path, target=4)
+    rng = random.Random(seed)
+    random.seed(seed)    # single_pull uses the module-level RNG
+    now = int(time.time())
+    states = [{"pity_5": 0, "pity_4": 0, "total": 0, "total_5": 0} for _ in range(users)]
+    history, inventory = [], Counter()
+    for _ in range(pulls):
+        uid = rng.randrange(users)
+        rarity, item = gacha.single_pull(states[uid])
+        history.append((uid, item, rarity, now - rng.randrange(90 * 86400), 1))
+        inventory[(uid, item)] += 1
+    history.sort(key=lambda row: row[3])
+
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany("INSERT INTO pull_history (user_id, item_name, rarity, timestamp, count) VALUES (?, ?, ?, ?, ?)", history)
+        conn.executemany("INSERT INTO inventory (user_id, item_name, quantity) VALUES (?, ?, ?)",
+                         [(uid, item, n) for (uid, item), n in inventory.items()])
+    conn.execute("VACUUM")
+    conn.close()
+
+def _table_sizes(path: str) -> dict:
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall()
+    finally:
+        conn.close()
+    return dict(rows)
+
+def _time_queries(path: str, users: int, column: str, rounds: int = 2000, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    try:
+        queries = {
+            "history (last 20)": f"SELECT {column}, rarity, timestamp, count FROM pull_history WHERE user_id = ? ORDER BY timestamp DESC, id DESC LIMIT 20",
+            "inventory": f"SELECT {column}, quantity FROM inventory WHERE user_id = ? ORDER BY quantity DESC",
+        }
+        timings = {}
+        for label, sql in queries.items():
+            start = time.perf_counter()
+            for _ in range(rounds):
+                conn.execute(sql, (rng.randrange(users),)).fetchall()
+            timings[label] = (time.perf_counter() - start) / rounds * 1e6
+        return timings
+    finally:
+        conn.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Size/benchmark report for the item catalog migration")
+    parser.add_argument("--pulls", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keep", metavar="DIR", help="keep the generated databases in DIR")
+    args = parser.parse_args(argv)
+
+    workdir = args.keep or tempfile.mkdtemp(prefix="item_catalog_")
+    os.makedirs(workdir, exist_ok=True)
+    v4, v5 = os.path.join(workdir, "names_v4.db"), os.path.join(workdir, "ids_v5.db")
+    for path in (v4, v5):
+        if os.path.exists(path):
+            os.remove(path)
+    try:
+        print(f"Building synthetic v4 database: {args.pulls:,} pulls, {args.users:,} users ...")
+        start = time.perf_counter()
+        _build_v4(v4, args.pulls, args.users, args.seed)
+        print(f"  built in {time.perf_counter() - start:.1f}s")
+
+        shutil.copyfile(v4, v5)
+        start = time.perf_counter()
+        migrate(v5, target=5)
+        migrated = time.perf_counter() - start
+        conn = sqlite3.connect(v5)
+        conn.execute("VACUUM")
+        conn.close()
+        print(f"  migrated to v5 in {migrated:.1f}s")
+
+        before, after = _table_sizes(v4), _table_sizes(v5)
+        print("\nTable sizes (bytes, after VACUUM):")
+        print(f"  {'object':<28}{'v4 names':>14}{'v5 ids':>14}{'ratio':>8}")
+        for name in ("pull_history", "idx_pull_history_user_ts", "inventory", "sqlite_autoindex_inventory_1", "items"):
+            a, b = before.get(name, 0), after.get(name, 0)
+            ratio = f"{b / a:.2f}" if a and b else "-"
+            print(f"  {name:<28}{a:>14,}{b:>14,}{ratio:>8}")
+        total_a, total_b = os.path.getsize(v4), os.path.getsize(v5)
+        print(f"  {'file':<28}{total_a:>14,}{total_b:>14,}{total_b / total_a:>8.2f}")
+        print(f"  bytes per history row: {before.get('pull_history', 0) / args.pulls:.1f} -> {after.get('pull_history', 0) / args.pulls:.1f}")
+
+        print("\nQuery latency (µs/query, random users):")
+        t4 = _time_queries(v4, args.users, "item_name")
+        t5 = _time_queries(v5, args.users, "item_id")
+        for label in t4:
+            print(f"  {label:<28}{t4[label]:>10.1f}{t5[label]:>10.1f}")
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
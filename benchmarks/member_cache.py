@@ -0,0 +1,99 @@
+# benchmarks/member_cache.py — memory used by the member/message caches, default vs lean mode
+# Feeds one synthetic large guild through discord.py's real ConnectionState (no gateway):
+# the default mode gets every member chunked in as at startup; both modes then see the same
+# stream of messages from random members. Python heap growth is measured with tracemalloc.
+#
+#   python -m benchmarks.member_cache --members 100000 --messages 5000
+
+import argparse
+import asyncio
+import datetime
+import gc
+import random
+import tracemalloc
+
+import discord
+
+from bot_config import MAX_MESSAGES
+
+GUILD_ID = 900_000_000_000_000_001
+CHANNEL_ID = 900_000_000_000_000_002
+ROLE_BASE = 900_000_000_000_001_000
+USER_BASE = 800_000_000_000_000_000
+JOINED = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc).isoformat()
+
+def _user(uid: int) -> dict:
+    return {"id": str(uid), "username": f"user{uid % 1_000_000}", "discriminator": "0",
+            "global_name": None, "avatar": None}
+
+def _member(uid: int, rng: random.Random, roles: int) -> dict:
+    return {"user": _user(uid), "roles": [str(ROLE_BASE + r) for r in rng.sample(range(roles), 3)],
+            "joined_at": JOINED, "deaf": False, "mute": False, "nick": None, "flags": 0}
+
+def _guild(members: int, roles: int) -> dict:
+    return {
+        "id": str(GUILD_ID), "name": "Synthetic", "owner_id": str(USER_BASE), "member_count": members,
+        "large": True, "features": [], "emojis": [], "stickers": [], "members": [], "presences": [],
+        "roles": [{"id": str(ROLE_BASE + r), "name": f"role{r}", "permissions": "0", "position": r,
+                   "color": 0, "hoist": False, "managed": False, "mentionable": False} for r in range(roles)],
+        "channels": [{"id": str(CHANNEL_ID), "type": 0, "name": "general", "position": 0, "permission_overwrites": []}],
+    }
+
+def _message(mid: int, uid: int, rng: random.Random, roles: int) -> dict:
+    member = _member(uid, rng, roles)
+    return {"id": str(mid), "channel_id": str(CHANNEL_ID), "guild_id": str(GUILD_ID), "author": member.pop("user"),
+            "member": member, "content": "**Character Name(s):** Someone", "timestamp": JOINED,
+            "edited_timestamp": None, "tts": False, "mention_everyone": False, "mentions": [],
+            "mention_roles": [], "attachments": [], "embeds": [], "pinned": False, "type": 0}
+
+def _client(lean: bool) -> discord.Client:
+    intents = discord.Intents.default()
+    intents.message_content = True
+    intents.members = True
+    if lean:
+        return discord.Client(intents=intents, chunk_guilds_at_startup=False,
+                              member_cache_flags=discord.MemberCacheFlags.none(), max_messages=MAX_MESSAGES)
+    return discord.Client(intents=intents)
+
+async def measure(lean: bool, members: int, messages: int, roles: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    gc.collect()
+    tracemalloc.start()
+    client = _client(lean)
+    state = client._connection
+    guild = state._add_guild_from_data(_guild(members, roles))
+    if not lean:
+        # What chunk_guilds_at_startup does: every member lands in guild._members
+        for i in range(members):
+            guild._add_member(discord.Member(data=_member(USER_BASE + i, rng, roles), guild=guild, state=state))
+    for i in range(messages):
+        state.parse_message_create(_message(700_000_000_000_000_000 + i, USER_BASE + rng.randrange(members), rng, roles))
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {"members": len(guild._members), "users": len(state._users), "messages": len(state._messages or ()),
+              "current": current, "peak": peak}
+    await client.close()
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Member/message cache memory: default vs lean mode")
+    parser.add_argument("--members", type=int, default=100_000, help="members in the synthetic guild")
+    parser.add_argument("--messages", type=int, default=5_000, help="messages received after startup")
+    parser.add_argument("--roles", type=int, default=50, help="roles in the guild (each member has 3)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print(f"Synthetic guild: {args.members:,} members, {args.roles} roles, then {args.messages:,} messages\n")
+    print(f"  {'mode':<9}{'members':>10}{'users':>10}{'messages':>10}{'heap MiB':>11}{'peak MiB':>11}")
+    results = {}
+    for lean in (False, True):
+        r = results[lean] = asyncio.run(measure(lean, args.members, args.messages, args.roles, args.seed))
+        print(f"  {'lean' if lean else 'default':<9}{r['members']:>10,}{r['users']:>10,}{r['messages']:>10,}"
+              f"{r['current'] / 2**20:>11.1f}{r['peak'] / 2**20:>11.1f}")
+    saved = 1 - results[True]["current"] / max(1, results[False]["current"])
+    print(f"\nLean mode keeps {saved:.0%} less in the caches")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
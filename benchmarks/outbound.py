@@ -0,0 +1,157 @@
+# benchmarks/outbound.py — XP log delivery during a submission rush: direct REST calls vs outbound.OutboundQueue
+# Runs against a local stand-in for Discord's REST rate limits (FakeDiscordHTTP): fixed per-channel
+# windows for message sends and reactions, and a 429 that costs retry_after when a window is full.
+# Like discord.py, a rate-limited caller sleeps and retries, so in direct mode that sleep lands
+# inside the submission handler. Time is scaled down so a run takes seconds, not minutes.
+#
+#   python -m benchmarks.outbound --submissions 300 --channels 3
+#   python -m benchmarks.outbound --capacity 50        # small queue: handlers feel backpressure
+
+import argparse
+import asyncio
+import itertools
+import time
+
+import discord
+
+from bot_config import OUTBOUND_SEND_RATE, OUTBOUND_REACTION_RATE
+from outbound import OutboundQueue
+
+_ids = itertools.count(50_000_000)
+
+# =====================================================
+# FAKE DISCORD
+# =====================================================
+class FakeDiscordHTTP:
+    """Per-(route, channel) fixed windows of `limit` requests per `per` seconds, with a round-trip latency."""
+
+    def __init__(self, send_rate: tuple, reaction_rate: tuple, latency: float):
+        self.rates = {"send": send_rate, "reaction": reaction_rate}
+        self.latency = latency
+        self.windows = {}   # (route, channel_id) -> [window_end, used]
+        self.requests = 0
+        self.rate_limited = 0
+
+    async def request(self, route: str, channel_id: int):
+        limit, per = self.rates[route]
+        while True:
+            await asyncio.sleep(self.latency)
+            self.requests += 1
+            now = time.monotonic()
+            window = self.windows.get((route, channel_id))
+            if window is None or now >= window[0]:
+                window = self.windows[(route, channel_id)] = [now + per, 0]
+            if window[1] < limit:
+                window[1] += 1
+                return
+            # 429: discord.py sleeps for retry_after and tries again
+            self.rate_limited += 1
+            await asyncio.sleep(window[0] - now)
+
+class FakeMessage:
+    def __init__(self, channel):
+        self.id = next(_ids)
+        self.channel = channel
+        self.reactions = []
+
+    async def add_reaction(self, emoji):
+        await self.channel.http.request("reaction", self.channel.id)
+        self.reactions.append(str(emoji))
+
+class FakeChannel:
+    def __init__(self, http: FakeDiscordHTTP):
+        self.id = next(_ids)
+        self.http = http
+        self.messages = []   # list of embed lists, in delivery order
+
+    async def send(self, content=None, *, embed=None, embeds=None):
+        embeds = embeds or ([embed] if embed else [])
+        if len(embeds) > 10:
+            raise ValueError("Discord accepts at most 10 embeds per message")
+        await self.http.request("send", self.id)
+        self.messages.append(embeds)
+        return FakeMessage(self)
+
+# =====================================================
+# RUN
+# =====================================================
+def _scaled(rate: tuple, scale: float) -> tuple:
+    return rate[0], rate[1] * scale
+
+def _log_embed(n: int) -> discord.Embed:
+    embed = discord.Embed(title="✅ Progression Logged", description=f"Submitted by <@{n}>", color=discord.Color.green())
+    embed.add_field(name="Character(s)", value=f"Character {n}", inline=True)
+    embed.add_field(name="Level", value=str(n % 30 + 1), inline=True)
+    embed.add_field(name="⭐ Total Gains", value=f"**{100 + n} XP**", inline=False)
+    return embed
+
+def _pct(samples: list, q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+async def run_mode(mode: str, args) -> dict:
+    send_rate = _scaled(OUTBOUND_SEND_RATE, args.time_scale)
+    reaction_rate = _scaled(OUTBOUND_REACTION_RATE, args.time_scale)
+    http = FakeDiscordHTTP(send_rate, reaction_rate, args.latency * args.time_scale)
+    output = FakeChannel(http)
+    inputs = [FakeChannel(http) for _ in range(args.channels)]
+    submissions = [FakeMessage(inputs[n % len(inputs)]) for n in range(args.submissions)]
+    queue = OutboundQueue(capacity=args.capacity, send_rate=send_rate, reaction_rate=reaction_rate)
+    handler_times = []
+
+    async def handle(n: int, message: FakeMessage):
+        # Arrivals spread over the rush, like a channel full of people posting at once
+        await asyncio.sleep(n * args.spacing * args.time_scale)
+        started = time.perf_counter()
+        if mode == "direct":
+            await output.send(embed=_log_embed(n))
+            await message.add_reaction("✅")
+        else:
+            await queue.send_embed(output, _log_embed(n))
+            await queue.react(message, "✅")
+        handler_times.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(handle(n, m) for n, m in enumerate(submissions)))
+    handlers_done = time.perf_counter() - started
+    await queue.drain()
+    delivered = time.perf_counter() - started
+
+    logged = [e.description for batch in output.messages for e in batch]
+    expected = [_log_embed(n).description for n in range(args.submissions)]
+    return {
+        "handler_p50": _pct(handler_times, 0.5) / args.time_scale,
+        "handler_p99": _pct(handler_times, 0.99) / args.time_scale,
+        "handlers_done": handlers_done / args.time_scale,
+        "delivered": delivered / args.time_scale,
+        "requests": http.requests,
+        "rate_limited": http.rate_limited,
+        "messages": len(output.messages),
+        "complete": sorted(logged) == sorted(expected) and len(logged) == len(expected),
+        "in_order": logged == expected,
+        "reactions": sum(len(m.reactions) for m in submissions),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="XP log delivery under Discord-style rate limits: direct vs queued")
+    parser.add_argument("--submissions", type=int, default=200)
+    parser.add_argument("--channels", type=int, default=2, help="input channels the submissions are spread over")
+    parser.add_argument("--spacing", type=float, default=0.05, help="seconds between submissions arriving")
+    parser.add_argument("--latency", type=float, default=0.08, help="REST round trip (seconds)")
+    parser.add_argument("--capacity", type=int, default=1000, help="OutboundQueue capacity")
+    parser.add_argument("--time-scale", type=float, default=0.02, help="run this much faster than real time")
+    args = parser.parse_args(argv)
+
+    print(f"{args.submissions} submissions over {args.channels} input channel(s), one output channel; "
+          f"times below are in real-time seconds")
+    print(f"  {'mode':<8}{'handler p50':>12}{'handler p99':>12}{'delivered':>11}{'REST':>7}{'429s':>7}{'msgs':>7}"
+          f"  {'complete':<9}in order")
+    for mode in ("direct", "queued"):
+        r = asyncio.run(run_mode(mode, args))
+        complete = r["complete"] and r["reactions"] == args.submissions
+        print(f"  {mode:<8}{r['handler_p50']:>11.2f}s{r['handler_p99']:>11.2f}s{r['delivered']:>10.1f}s"
+              f"{r['requests']:>7}{r['rate_limited']:>7}{r['messages']:>7}  {'yes' if complete else 'NO':<9}"
+              f"{'yes' if r['in_order'] else 'no'}")
+
+if __name__ == "__main__":
+    main()
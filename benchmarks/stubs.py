@@ -0,0 +1,87 @@
+# benchmarks/stubs.py — minimal stand-ins for the discord.py objects the cogs touch
+# Just enough surface for the hot paths to run without a gateway connection.
+
+import itertools
+
+_ids = itertools.count(10_000_000)
+
+class StubRole:
+    def __init__(self, role_id: int, name: str = "role"):
+        self.id = role_id
+        self.name = name
+        self.mention = f"<@&{role_id}>"
+
+class StubGuild:
+    def __init__(self, guild_id: int = None, roles=()):
+        self.id = guild_id or next(_ids)
+        self._roles = {r.id: r for r in roles}
+
+    def get_role(self, role_id: int):
+        return self._roles.get(role_id)
+
+class StubUser:
+    def __init__(self, user_id: int = None, name: str = "Player", bot: bool = False):
+        self.id = user_id or next(_ids)
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+        self.avatar = None
+        self.mention = f"<@{self.id}>"
+
+class StubMember(StubUser):
+    def __init__(self, user_id: int = None, name: str = "Player", roles=(), guild: StubGuild = None):
+        super().__init__(user_id, name)
+        self.roles = list(roles)
+        self.guild = guild
+
+class StubMessage:
+    def __init__(self, content: str = "", author=None, channel=None, message_id: int = None):
+        self.id = message_id or next(_ids)
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.guild = getattr(channel, "guild", None)
+        self.reactions = []
+        self.jump_url = f"https://discord.com/channels/0/0/{self.id}"
+
+    async def add_reaction(self, emoji):
+        self.reactions.append(str(emoji))
+
+    async def edit(self, **kwargs):
+        return self
+
+    async def delete(self, delay=None):
+        return None
+
+class StubChannel:
+    def __init__(self, channel_id: int = None, guild: StubGuild = None):
+        self.id = channel_id or next(_ids)
+        self.guild = guild
+        self.sent = 0
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+        return StubMessage(content or "", channel=self)
+
+    def get_partial_message(self, message_id: int):
+        return StubMessage(channel=self, message_id=message_id)
+
+class StubBot:
+    def __init__(self, channels=(), user: StubUser = None):
+        self._channels = {c.id: c for c in channels}
+        self.user = user or StubUser(name="Bot", bot=True)
+
+    def get_channel(self, channel_id: int):
+        return self._channels.get(channel_id)
+
+    def get_partial_messageable(self, channel_id: int):
+        return StubChannel(channel_id)
+
+    def get_guild(self, guild_id: int):
+        for channel in self._channels.values():
+            if channel.guild is not None and channel.guild.id == guild_id:
+                return channel.guild
+        return None
+
+    def get_user(self, user_id: int):
+        return None
@@ -0,0 +1,185 @@
+# benchmarks/xp_parser.py — fuzz + throughput check for the XP submission parser
+# Compares xp_reporter_main.parse_submission against the regex parser it replaced (kept here as
+# the reference) on the hot_paths corpus and a seeded fuzz corpus of template variations.
+# Any disagreement in what the cog would do with a post is printed and fails the run.
+# Known, intended differences (not generated by the fuzzer): labels must start a line, and a
+# second copy of the template stops the scan instead of filling missing fields from it.
+# Speed (best of --rounds passes, the two parsers alternating): posts that follow the template take
+# the one-match fast path, ~1.6x the regex parser on the real corpus; adversarial posts ~2.7x, with
+# bounded work. The fuzz corpus is mostly off-template (case, spacing, order, extra lines), so it runs
+# the split scan and is slower than the regex parser there (~0.8-1.0x).
+#
+#   python -m benchmarks.xp_parser --fuzz 20000 --seed 1
+#   python -m benchmarks.xp_parser --dump corpus.json     # write the fuzz corpus out
+
+import argparse
+import json
+import random
+import re
+import time
+
+import xp_reporter_main as xp
+from benchmarks.hot_paths import ADVERSARIAL_SUBMISSIONS, REAL_SUBMISSIONS
+
+FIELDS = ("name", "level", "progression", "progression_key", "xp_boost", "crowns_boost")
+
+# =====================================================
+# REFERENCE (the pre-rewrite regex parser)
+# =====================================================
+_NAME = re.compile(r"\*\*Character Name\(s\):\*\*\s*(.+)", re.I)
+_LEVEL = re.compile(r"\*\*Character Level:\*\*\s*(\d+)", re.I)
+_PROG = re.compile(r"\*\*Type of Progression:\*\*(.*?)(?=\*\*|\Z)", re.I | re.S)
+_XP = re.compile(r"\*\*Boost\(s\) for XP:\*\*\s*(\d+)%", re.I)
+_CROWNS = re.compile(r"\*\*Boost\(s\) for Crowns:\*\*\s*(\d+)%", re.I)
+
+# The activity tables the cog had at the time, frozen here so the reference stays what it was
+# (the live rules are in xp_rules.json)
+ACTIVITY_MULTIPLIERS = {
+    "solo training": 1.0, "troll mission": 1.0,
+    "afk training i": 1.0, "afk training ii": 1.0, "afk training iii": 1.15,
+}
+REVIEW_MULTIPLIERS = {"battle": 4.0, "wholesome": 2.5, "dungeon": 2.0}
+ACTIVITY_ALIASES = {
+    "afk farm i": "afk training i", "afk farm ii": "afk training ii", "afk farm iii": "afk training iii",
+    "afk i": "afk training i", "afk ii": "afk training ii", "afk iii": "afk training iii",
+    "afk 1": "afk training i", "afk 2": "afk training ii", "afk 3": "afk training iii",
+    "solo train": "solo training",
+}
+REVIEW_KEYWORDS = {"battle", "wholesome", "dungeon"}
+
+def regex_parse(content: str) -> dict:
+    name, level, prog = _NAME.search(content), _LEVEL.search(content), _PROG.search(content)
+    xp_boost, crowns_boost = _XP.search(content), _CROWNS.search(content)
+    progression = prog.group(1).strip() if prog else None
+    key = (progression or "").lower().replace("farm", "training").strip()
+    key = ACTIVITY_ALIASES.get(key, key)
+    return {
+        "name": name.group(1).strip() if name else None,
+        "level": int(level.group(1)) if level else None,
+        "progression": progression,
+        "progression_key": key,
+        "xp_boost": int(xp_boost.group(1)) / 100 if xp_boost else 0.0,
+        "crowns_boost": int(crowns_boost.group(1)) / 100 if crowns_boost else 0.0,
+    }
+
+def new_parse(content: str) -> dict:
+    sub = xp.parse_submission(content)
+    return {f: getattr(sub, f) for f in FIELDS}
+
+def outcome(parsed: dict) -> tuple:
+    """What the cog does with a parse: rejected, or the XP-relevant fields and the route taken."""
+    if not all(parsed[k] for k in ("name", "level", "progression")):
+        return ("rejected",)
+    key = parsed["progression_key"]
+    if key in ACTIVITY_MULTIPLIERS:
+        route = ("auto", key)
+    elif any(k in key for k in REVIEW_KEYWORDS):
+        route = ("review", REVIEW_MULTIPLIERS.get(key))
+    else:
+        route = ("ignored",)
+    return (parsed["name"], parsed["level"], parsed["xp_boost"], parsed["crowns_boost"], route)
+
+# =====================================================
+# FUZZ CORPUS
+# =====================================================
+LABELS = {
+    "name": "Character Name(s)",
+    "level": "Character Level",
+    "progression": "Type of Progression",
+    "xp_boost": "Boost(s) for XP",
+    "crowns_boost": "Boost(s) for Crowns",
+}
+PROGRESSIONS = [
+    *ACTIVITY_MULTIPLIERS, *ACTIVITY_ALIASES, "AFK Farm III", "Solo Training", "Troll Mission",
+    "Battle vs. the Ashen Host", "wholesome RP with the tavern", "Dungeon crawl (Sunken Vault)",
+    "sparring", "", "  solo train  ",
+]
+NAMES = ["Aldric Vayne", "Brynja & Holt", "Kestrel", "Ω the Unbound", "A", "Mira, Thane, Corvin"]
+
+def _case(rng: random.Random, text: str) -> str:
+    return rng.choice((text, text.lower(), text.upper(), text.title()))
+
+# Digits that aren't ASCII: full-width ones are decimal (int() takes them), superscripts only isdigit()
+_DIGIT_STYLES = (str.maketrans("0123456789", "０１２３４５６７８９"), str.maketrans("0123456789", "⁰¹²³⁴⁵⁶⁷⁸⁹"))
+
+def _number(rng: random.Random, n: int) -> str:
+    text = str(n)
+    if rng.random() < 0.1:
+        style = rng.choice(_DIGIT_STYLES)
+        text = text.translate(style) if rng.random() < 0.5 else text + "²³"[rng.randrange(2)]
+    return text
+
+def fuzz_submission(rng: random.Random) -> str:
+    values = {
+        "name": rng.choice(NAMES),
+        "level": _number(rng, rng.randrange(0, 40)) + rng.choice(("", "", " (TT2)", "abc")),
+        "progression": rng.choice(PROGRESSIONS),
+        "xp_boost": f"{_number(rng, rng.randrange(0, 200))}{rng.choice(('%', '%', ' %', ''))}",
+        "crowns_boost": f"{_number(rng, rng.randrange(0, 200))}%",
+    }
+    fields = ["name", "level", "progression"] + [f for f in ("xp_boost", "crowns_boost") if rng.random() < 0.5]
+    rest = fields[1:]
+    rng.shuffle(rest)
+    lines = []
+    for field in [fields[0]] + rest:
+        if rng.random() < 0.05:
+            continue   # missing field
+        label = _case(rng, LABELS[field])
+        value = values[field]
+        sep = rng.choice((" ", " ", "  ", "\t", ""))
+        lines.append(f"**{label}:**{sep}{value}")
+        if field == "progression" and rng.random() < 0.15:
+            lines.append(rng.choice(("screenshots attached", "with Bob", "(second run)")))   # run-on progression
+    if rng.random() < 0.2:
+        lines.append(f"**Notes:** {'x' * rng.randrange(0, 400)}")
+    if rng.random() < 0.1:
+        lines.insert(rng.randrange(1, len(lines) + 1), "")
+    return rng.choice(("\n", "\r\n")).join(lines) if rng.random() < 0.1 else "\n".join(lines)
+
+# =====================================================
+# CLI
+# =====================================================
+def _throughput(fns: tuple, corpus: list, rounds: int) -> list:
+    """Posts/s for each parser: best of `rounds` passes, alternating parsers so drift hits both alike."""
+    best = [float("inf")] * len(fns)
+    for _ in range(rounds):
+        for i, fn in enumerate(fns):
+            start = time.perf_counter()
+            for text in corpus:
+                fn(text)
+            best[i] = min(best[i], time.perf_counter() - start)
+    return [len(corpus) / t for t in best]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fuzz and benchmark the XP submission parser")
+    parser.add_argument("--fuzz", type=int, default=20_000, help="generated submissions")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=10, help="timed passes over each corpus (best one counts)")
+    parser.add_argument("--dump", metavar="FILE", help="write the fuzz corpus to FILE as JSON")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    fuzz = [fuzz_submission(rng) for _ in range(args.fuzz)]
+    if args.dump:
+        with open(args.dump, "w", encoding="utf-8") as f:
+            json.dump(fuzz, f, indent=0)
+        print(f"Fuzz corpus written to {args.dump}")
+
+    disagreements = 0
+    for text in REAL_SUBMISSIONS + fuzz:
+        old, new = outcome(regex_parse(text)), outcome(new_parse(text))
+        if old != new:
+            disagreements += 1
+            if disagreements <= 10:
+                print(f"  differs: {text[:120]!r}\n    regex:  {old}\n    single: {new}")
+    print(f"Outcome mismatches: {disagreements} of {len(REAL_SUBMISSIONS) + len(fuzz):,}")
+
+    print(f"\n  {'corpus':<14}{'regex /s':>12}{'single-pass /s':>16}{'speedup':>10}")
+    for label, corpus, rounds in (("real", REAL_SUBMISSIONS * 100, args.rounds), ("fuzz", fuzz, args.rounds),
+                                  ("adversarial", ADVERSARIAL_SUBMISSIONS, args.rounds * 20)):
+        old, new = _throughput((regex_parse, xp.parse_submission), corpus, rounds)
+        print(f"  {label:<14}{old:>12,.0f}{new:>16,.0f}{new / old:>9.1f}x")
+    return 1 if disagreements else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
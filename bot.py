@@ -2,17 +2,16 @@
 
 import os
 import discord
-import sqlite3
 import traceback
 import asyncio
+import time
 from discord.ext import commands
 from dotenv import load_dotenv
-from bot_config import DB_NAME
-
-# =========================================================
-# 🔧 TEST SERVER ID (ONLY this server gets instant slash cmds)
-# =========================================================
-TEST_GUILD_ID = 1357263087069167706  # ← CHANGE when needed
+from bot_config import DB_NAME, SHARD_COUNT, LEAN_MEMBER_CACHE, MAX_MESSAGES
+from command_sync import sync_command_tree
+from database import database
+from migrations import migrate
+from review_queue import ReviewView
 
 # =========================================================
 # 🔐 Load token
@@ -25,44 +24,11 @@ TOKEN = os.getenv("DISCORD_TOKEN")
 # =========================================================
 def init_db():
     try:
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS pity (
-            user_id INTEGER PRIMARY KEY,
-            pity_5_star INTEGER DEFAULT 0,
-            pity_4_star INTEGER DEFAULT 0,
-            total_pulls INTEGER DEFAULT 0
-        )
-        """)
-
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS inventory (
-            user_id INTEGER,
-            item_name TEXT,
-            quantity INTEGER DEFAULT 0,
-            PRIMARY KEY (user_id, item_name)
-        )
-        """)
-
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS pull_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            item_name TEXT,
-            rarity INTEGER,
-            timestamp INTEGER
-        )
-        """)
-
-        conn.commit()
-        print(f"✅ Database {DB_NAME} initialized and tables checked.")
+        version = migrate(DB_NAME)
+        print(f"✅ Database {DB_NAME} initialized (schema v{version}).")
     except Exception as e:
         print(f"❌ DATABASE ERROR: {e}")
         exit(1)
-    finally:
-        conn.close()
 
 init_db()
 
@@ -73,7 +39,16 @@ intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-bot = commands.Bot(command_prefix="$$", intents=intents)
+# Lean member cache: no chunking at startup and no cached members. Role checks read the member
+# data that arrives with each message/reaction/interaction (see guild_config.MemberRoleCache)
+if LEAN_MEMBER_CACHE:
+    member_cache = dict(chunk_guilds_at_startup=False, member_cache_flags=discord.MemberCacheFlags.none())
+else:
+    member_cache = {}
+
+# One process, several shards: discord.py picks the shard count unless SHARD_COUNT pins it
+bot = commands.AutoShardedBot(command_prefix="$$", intents=intents, shard_count=SHARD_COUNT,
+                              max_messages=MAX_MESSAGES, **member_cache)
 
 # =========================================================
 # 🧪 TEST SLASH COMMAND (CONFIRMS EVERYTHING WORKS)
@@ -87,15 +62,21 @@ async def ping(interaction: discord.Interaction):
 # =========================================================
 COGS = [
     "gacha_main",
-    "xp_reporter_main"
+    "xp_reporter_main",
+    "bot_stats"
 ]
 
 # =========================================================
-# 🔁 Load cogs BEFORE syncing commands
+# 🔁 Load cogs, THEN sync commands (once per process)
 # =========================================================
 @bot.event
 async def setup_hook():
+    # setup_hook runs once per process, unlike on_ready which fires again after every reconnect
+    # Persistent Approve/Deny buttons: answers clicks on review messages posted before this restart
+    bot.add_view(ReviewView())
+
     print("⏳ Loading cogs asynchronously...")
+    started = time.perf_counter()
     for cog in COGS:
         try:
             await bot.load_extension(cog)
@@ -103,26 +84,37 @@ async def setup_hook():
         except Exception as e:
             print(f"❌ Failed to load cog {cog}: {e}")
             traceback.print_exc()
-
-# =========================================================
-# 🚀 Ready event → FORCE slash command sync
-# =========================================================
-@bot.event
-async def on_ready():
-    guild = discord.Object(id=TEST_GUILD_ID)
+    loaded = time.perf_counter()
 
     try:
-        print(f"🔄 Syncing slash commands to guild {TEST_GUILD_ID}")
-
-        # ⭐ THE CRITICAL FIX ⭐
-        bot.tree.copy_global_to(guild=guild)
-
-        synced = await bot.tree.sync(guild=guild)
-        print(f"✅ Synced {len(synced)} slash command(s)")
-
+        result = await sync_command_tree(bot)
     except Exception as e:
+        result = None
         print(f"❌ SLASH SYNC FAILED: {e}")
+        traceback.print_exc()
+    synced = time.perf_counter()
+
+    if result is not None:
+        print(f"🔄 Slash commands: {len(result['synced'])} guild(s) synced, "
+              f"{len(result['unchanged'])} unchanged, {len(result['failed'])} failed")
+    print(f"⏱️ Startup: cogs {loaded - started:.2f}s, command sync {synced - loaded:.2f}s")
+
+# =========================================================
+# 🔧 $$sync → force a slash command sync (bot owner only)
+# =========================================================
+@bot.command(name="sync")
+@commands.is_owner()
+async def force_sync(ctx: commands.Context):
+    started = time.perf_counter()
+    result = await sync_command_tree(bot, force=True)
+    await ctx.send(f"✅ Synced {len(result['synced'])} guild(s), {len(result['failed'])} failed "
+                   f"({time.perf_counter() - started:.2f}s)")
 
+# =========================================================
+# 🚀 Ready event (fires again after every reconnect: no syncing here)
+# =========================================================
+@bot.event
+async def on_ready():
     print(f"🤖 Logged in as {bot.user} ({bot.user.id})")
     print("🚀 Bot is fully ready.")
 
@@ -137,8 +129,12 @@ async def main():
     print("✅ Token loaded successfully.")
     print("⏳ Starting bot...")
 
-    async with bot:
-        await bot.start(TOKEN)
+    try:
+        async with bot:
+            await bot.start(TOKEN)
+    finally:
+        # Cogs are unloaded by bot.close(); flush the remaining queued writes last
+        await database.close()
 
 if __name__ == "__main__":
     try:
@@ -1,21 +1,60 @@
 # bot_config.py
 
-# --- Channel Lists (Use lists for multiple channels) ---
-# List all channels where XP submissions are allowed.
-INPUT_CHANNEL_IDS = [
-    1378229313824096336,
-] 
+# --- Guilds and sharding ---
+# Channels and roles are configured per guild in GUILD_CONFIG_FILE (see guild_config.py).
+GUILD_CONFIG_FILE = "guilds.json"
+LEGACY_GUILD_ID = 1357263087069167706  # owner of gacha rows written before per-guild partitioning (schema v7)
+SHARD_COUNT = None                     # None = let Discord recommend a shard count (AutoShardedBot)
 
-# List all channels where the approved XP messages are posted.
-OUTPUT_CHANNEL_IDS = [
-    1440000428027678741,
-]
+# --- Member cache ---
+LEAN_MEMBER_CACHE = True    # don't chunk guilds at startup; members come with each message/interaction
+MAX_MESSAGES = 100          # messages kept in discord.py's cache; nothing relies on it (reviews use buttons and raw reaction events)
+MEMBER_ROLE_TTL = 300       # seconds a fetched member's roles are reused for role checks
+MEMBER_ROLE_CACHE_SIZE = 5000
 
-# GACHA CHANNEL can remain a single ID (for the Gacha Cog's simple check)
-GACHA_CHANNEL_ID = 1446983257487966350 
+DB_NAME = "pity_data.db"
 
-# --- Role and DB Configuration (UPDATED to lists) ---
-SUBMISSION_APPROVER_ROLE_IDS = [1425411791894220930]
-MODERATOR_ROLE_IDS = [1425411621651611659]
+# --- Database executor ---
+DB_READER_THREADS = 4       # read-only connections used by commands
+DB_WRITE_QUEUE_SIZE = 256   # max queued writes before callers wait (backpressure)
 
-DB_NAME = "pity_data.db"
+# --- Pull history write-behind buffer ---
+HISTORY_FLUSH_ROWS = 250      # flush once this many rows are waiting
+HISTORY_FLUSH_INTERVAL = 2.0  # ...or at least this often (seconds)
+
+# --- Pity state cache ---
+PITY_CACHE_SIZE = 5000  # users kept in memory (least recently used are evicted)
+PITY_CACHE_TTL = 3600   # drop entries idle this long in seconds (0 = never)
+
+# --- Leaderboard ---
+LEADERBOARD_NAME_TTL = 600  # seconds a resolved display name is reused
+
+# --- Pull history retention ---
+HISTORY_KEEP_ROWS = 200            # newest raw rows kept per user...
+HISTORY_KEEP_DAYS = 30             # ...plus every row newer than this; older rows roll up into pull_history_daily
+HISTORY_COMPACT_BATCH = 500        # rows moved per write transaction
+HISTORY_COMPACT_INTERVAL = 6 * 3600  # seconds between compaction runs
+
+# --- Metrics (/botstats) ---
+METRICS_PROMETHEUS_FILE = None  # e.g. "bot_metrics.prom" to export for a textfile scraper (None = off)
+METRICS_EXPORT_INTERVAL = 15    # seconds between exports
+LOOP_LAG_INTERVAL = 0.5         # how often the event-loop lag probe wakes up (seconds)
+
+# --- Gacha banner ---
+GACHA_CONFIG_FILE = "gacha_banner.json"  # rates, pity rules and loot table; reload with /reloadgacha
+XP_RULES_FILE = "xp_rules.json"          # XP tiers and activities; reload with /reloadxp
+MAX_BULK_WISHES = 1000                   # server-side clamp on the amount of a single /wish
+
+# --- /use autocomplete ---
+INVENTORY_INDEX_SIZE = 2000  # users whose owned items are kept indexed in memory (LRU)
+
+# --- XP manual reviews ---
+REVIEW_TTL = 7 * 86400        # open reviews older than this are marked expired (seconds)
+REVIEW_EXPIRY_INTERVAL = 3600 # seconds between expiry sweeps
+REVIEW_CACHE_SIZE = 500       # open reviews kept in memory in front of the xp_reviews table
+
+# --- Outbound queue (XP logs and reactions) ---
+OUTBOUND_QUEUE_SIZE = 1000          # queued sends/reactions before enqueueing waits (backpressure)
+OUTBOUND_BATCH_EMBEDS = 10          # progression logs coalesced into one message (Discord allows 10 embeds)
+OUTBOUND_SEND_RATE = (5, 5.0)       # messages per channel: (requests, per seconds)
+OUTBOUND_REACTION_RATE = (1, 0.25)  # reactions per channel: (requests, per seconds)
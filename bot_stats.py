@@ -0,0 +1,154 @@
+# bot_stats.py — instrumentation hooks and the /botstats moderator command
+# Times every slash / text command, counts Discord REST calls per route, watches event-loop lag,
+# and optionally writes everything to a Prometheus text file on an interval.
+
+import asyncio
+import logging
+import time
+import traceback
+
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+
+from bot_config import METRICS_PROMETHEUS_FILE, METRICS_EXPORT_INTERVAL, LOOP_LAG_INTERVAL
+from guild_config import is_guild_moderator
+from metrics import metrics
+
+logger = logging.getLogger("bot_stats")
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.0f}ms" if seconds >= 0.01 else f"{seconds * 1000:.1f}ms"
+
+def _hist_line(label: str, hist) -> str:
+    return f"`{label}` n={hist.count} p50≤{_ms(hist.quantile(0.5))} p99≤{_ms(hist.quantile(0.99))} max {_ms(hist.max)}"
+
+def _field(lines: list, limit: int = 1024) -> str:
+    out, size = [], 0
+    for line in lines:
+        if size + len(line) + 1 > limit:
+            break
+        out.append(line)
+        size += len(line) + 1
+    return "\n".join(out) if out else "—"
+
+class BotStatsCog(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._text_started = {}
+        self._orig_request = None
+        self._orig_check = None
+        self._lag_task = None
+
+    async def cog_load(self):
+        # Slash commands: stamp the start in the tree's interaction_check, observe on completion
+        tree = self.bot.tree
+        self._orig_check = tree.interaction_check
+
+        async def stamped_check(interaction: discord.Interaction) -> bool:
+            interaction.extras["started"] = time.perf_counter()
+            return await self._orig_check(interaction)
+        tree.interaction_check = stamped_check
+
+        # REST calls: every request goes through HTTPClient.request
+        http = self.bot.http
+        self._orig_request = http.request
+        orig_request = self._orig_request
+
+        async def counted_request(route, **kwargs):
+            metrics.inc("rest_requests", f"{route.method} {route.path}")
+            with metrics.timer("rest", "all"):
+                return await orig_request(route, **kwargs)
+        http.request = counted_request
+
+        self._lag_task = asyncio.create_task(self._watch_loop_lag())
+        if METRICS_PROMETHEUS_FILE:
+            self.prometheus_export.start()
+
+    async def cog_unload(self):
+        self.prometheus_export.cancel()
+        if self._lag_task:
+            self._lag_task.cancel()
+        self.bot.tree.interaction_check = self._orig_check
+        self.bot.http.request = self._orig_request
+
+    async def _watch_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            metrics.observe("event_loop_lag", "loop", max(0.0, loop.time() - start - LOOP_LAG_INTERVAL))
+
+    @tasks.loop(seconds=METRICS_EXPORT_INTERVAL)
+    async def prometheus_export(self):
+        try:
+            await asyncio.to_thread(metrics.write_prometheus, METRICS_PROMETHEUS_FILE)
+        except Exception:
+            logger.error("Failed to write %s:\n%s", METRICS_PROMETHEUS_FILE, traceback.format_exc())
+
+    # -------- command timing --------
+    @commands.Cog.listener()
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        started = interaction.extras.get("started")
+        if started is not None:
+            metrics.observe("command", f"/{command.qualified_name}", time.perf_counter() - started)
+
+    @commands.Cog.listener()
+    async def on_command(self, ctx: commands.Context):
+        self._text_started[ctx.message.id] = time.perf_counter()
+
+    @commands.Cog.listener()
+    async def on_command_completion(self, ctx: commands.Context):
+        started = self._text_started.pop(ctx.message.id, None)
+        if started is not None:
+            metrics.observe("command", f"{ctx.prefix}{ctx.command.qualified_name}", time.perf_counter() - started)
+
+    @commands.Cog.listener()
+    async def on_command_error(self, ctx: commands.Context, error):
+        self._text_started.pop(ctx.message.id, None)
+
+    # -------- /botstats (MODERATOR ONLY) --------
+    @app_commands.command(name="botstats", description="Latency and load statistics (Mods only)")
+    @is_guild_moderator()
+    async def slash_botstats(self, interaction: discord.Interaction):
+        embed = discord.Embed(title="📈 Bot Stats", color=discord.Color.dark_teal())
+
+        commands_hist = sorted(metrics.family("command").items(), key=lambda kv: -kv[1].count)
+        xp_hist = sorted(metrics.family("xp").items())
+        embed.add_field(name="Commands", value=_field([_hist_line(k, h) for k, h in commands_hist + xp_hist]), inline=False)
+
+        db_hist = sorted(metrics.family("db_query").items(), key=lambda kv: -kv[1].total)
+        wait = metrics.family("db_queue_wait").get("write")
+        db_lines = [_hist_line(k, h) for k, h in db_hist[:8]]
+        if wait:
+            db_lines.insert(0, f"write queue wait p99≤{_ms(wait.quantile(0.99))}, pending {metrics.gauges[('db_pending_writes', 'writer')]()}")
+        embed.add_field(name="SQLite", value=_field(db_lines), inline=False)
+
+        rest = sorted(((label, n) for (fam, label), n in metrics.counters.items() if fam == "rest_requests"), key=lambda kv: -kv[1])
+        rest_lines = [f"total {sum(n for _, n in rest)}"] + [f"`{label}` ×{n}" for label, n in rest[:8]]
+        embed.add_field(name="Discord REST calls", value=_field(rest_lines), inline=False)
+
+        lag = metrics.family("event_loop_lag").get("loop")
+        if lag:
+            embed.add_field(name="Event loop lag", value=f"p50≤{_ms(lag.quantile(0.5))} p99≤{_ms(lag.quantile(0.99))} max {_ms(lag.max)}", inline=False)
+
+        gauges = []
+        for (fam, label), fn in sorted(metrics.gauges.items()):
+            try:
+                gauges.append(f"`{fam}.{label}` {fn()}")
+            except Exception:
+                continue
+        embed.add_field(name="Gauges", value=_field(gauges), inline=False)
+
+        embed.set_footer(text=f"Uptime {int(time.time() - metrics.started)}s")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @slash_botstats.error
+    async def slash_botstats_error(self, interaction: discord.Interaction, error):
+        if isinstance(error, app_commands.errors.MissingAnyRole):
+            await interaction.response.send_message("❌ You do not have permission to use this command.", ephemeral=True)
+        else:
+            await interaction.response.send_message(f"❌ An error occurred: {error}", ephemeral=True)
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(BotStatsCog(bot))
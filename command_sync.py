@@ -0,0 +1,60 @@
+# command_sync.py — slash-command sync that only talks to Discord when the tree changed
+# on_ready fires again after every gateway reconnect, and each tree.sync() is a rate-limited REST
+# call per guild. Instead, the tree is serialized and hashed per guild; the hash of the last
+# successful sync lives in the command_sync table, and a guild is only re-synced when it differs.
+
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+
+import discord
+from discord.ext import commands
+
+from database import database
+from guild_config import guilds
+
+logger = logging.getLogger("command_sync")
+
+def tree_hash(tree: discord.app_commands.CommandTree, guild: discord.abc.Snowflake) -> str:
+    """Stable digest of exactly what tree.sync(guild=guild) would upload."""
+    payload = sorted((cmd.to_dict(tree) for cmd in tree.get_commands(guild=guild)),
+                     key=lambda d: (d.get("type", 1), d["name"]))
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+def _get_sync_hashes(conn: sqlite3.Connection) -> dict:
+    return dict(conn.execute("SELECT guild_id, tree_hash FROM command_sync"))
+
+def _save_sync_hash(conn: sqlite3.Connection, guild_id: int, digest: str):
+    conn.execute("""
+        INSERT INTO command_sync (guild_id, tree_hash, synced_at) VALUES (?, ?, ?)
+        ON CONFLICT(guild_id) DO UPDATE SET tree_hash = excluded.tree_hash, synced_at = excluded.synced_at
+    """, (guild_id, digest, int(time.time())))
+
+async def sync_command_tree(bot: commands.Bot, force: bool = False) -> dict:
+    """
+    Copy the global commands into every configured guild and sync the guilds whose tree hash
+    differs from the stored one (all of them with force=True).
+    Returns {"synced": [...], "unchanged": [...], "failed": [...]} of guild ids.
+    """
+    stored = {} if force else await database.read(_get_sync_hashes)
+    result = {"synced": [], "unchanged": [], "failed": []}
+    for cfg in guilds:
+        guild = discord.Object(id=cfg.guild_id)
+        # ⭐ THE CRITICAL FIX ⭐ guild-scoped copies register instantly
+        bot.tree.copy_global_to(guild=guild)
+        digest = tree_hash(bot.tree, guild)
+        if stored.get(cfg.guild_id) == digest:
+            result["unchanged"].append(cfg.guild_id)
+            continue
+        try:
+            synced = await bot.tree.sync(guild=guild)
+        except discord.HTTPException as e:
+            logger.error("Slash sync failed for guild %s (%s): %s", cfg.name, cfg.guild_id, e)
+            result["failed"].append(cfg.guild_id)
+            continue
+        await database.write(_save_sync_hash, cfg.guild_id, digest)
+        logger.info("Synced %d slash command(s) to guild %s (%s)", len(synced), cfg.name, cfg.guild_id)
+        result["synced"].append(cfg.guild_id)
+    return result
@@ -0,0 +1,175 @@
+# database.py — async SQLite access for the cogs
+# One dedicated writer thread (all writes are serialized through it) plus a small pool of
+# read-only connections. Commands await these instead of calling sqlite3 on the event loop,
+# so a slow fsync can no longer stall the gateway heartbeat.
+
+import asyncio
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from bot_config import DB_NAME, DB_READER_THREADS, DB_WRITE_QUEUE_SIZE
+from metrics import metrics
+
+logger = logging.getLogger("database")
+
+_STOP = object()
+
+@contextmanager
+def transaction(conn: sqlite3.Connection):
+    """
+    BEGIN IMMEDIATE ... COMMIT on an autocommit connection, rolling back on any error.
+    IMMEDIATE takes the write lock up front so the read-modify-write inside can't interleave.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+def _resolve(fut: asyncio.Future, result=None, error: BaseException = None):
+    # Runs on the event loop; the awaiting command may have been cancelled meanwhile
+    if fut.cancelled():
+        return
+    if error is not None:
+        fut.set_exception(error)
+    else:
+        fut.set_result(result)
+
+class AsyncDatabase:
+    """
+    - write(fn, *args): runs fn(conn, *args) on the single writer thread.
+      At most `queue_size` writes may be in flight; further callers wait (backpressure).
+    - read(fn, *args): runs fn(conn, *args) on a pooled read-only connection.
+    The database is put in WAL mode so readers never wait on the writer.
+    """
+
+    def __init__(self, path: str, readers: int = DB_READER_THREADS, queue_size: int = DB_WRITE_QUEUE_SIZE):
+        self.path = path
+        self.readers = max(1, readers)
+        self.queue_size = max(1, queue_size)
+        self._queue = queue.Queue()
+        self._slots = asyncio.Semaphore(self.queue_size)
+        self._writer = None
+        self._ready = threading.Event()
+        self._start_error = None
+        self._pool = None
+        self._local = threading.local()
+        self._reader_conns = []
+        self._reader_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    # ---------- lifecycle ----------
+    def start(self):
+        with self._lock:
+            if self._writer is not None:
+                return
+            self._ready.clear()
+            self._start_error = None
+            self._writer = threading.Thread(target=self._writer_loop, name="db-writer", daemon=True)
+            self._writer.start()
+            # Readers open in mode=ro, which needs the WAL files the writer creates first
+            self._ready.wait()
+            if self._start_error is not None:
+                self._writer = None
+                raise self._start_error
+            self._pool = ThreadPoolExecutor(max_workers=self.readers, thread_name_prefix="db-reader")
+            logger.info("Database executor started (%s, %d reader(s), write queue %d)", self.path, self.readers, self.queue_size)
+
+    async def close(self):
+        """Finish every queued write, then shut the writer and reader pool down."""
+        with self._lock:
+            writer, pool = self._writer, self._pool
+            self._writer = self._pool = None
+        if writer is None:
+            return
+        pool.shutdown(wait=True)
+        with self._reader_lock:
+            for conn in self._reader_conns:
+                conn.close()
+            self._reader_conns.clear()
+        self._local = threading.local()
+        # Writer goes last so its close can checkpoint and remove the WAL files
+        self._queue.put(_STOP)
+        await asyncio.to_thread(writer.join)
+        logger.info("Database executor stopped.")
+
+    @property
+    def pending_writes(self) -> int:
+        return self._queue.qsize()
+
+    # ---------- public API ----------
+    async def write(self, fn, *args):
+        self.start()
+        await self._slots.acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            fut = loop.create_future()
+            self._queue.put((fn, args, loop, fut, time.perf_counter()))
+            return await fut
+        finally:
+            self._slots.release()
+
+    async def read(self, fn, *args):
+        self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self._run_read, fn, args)
+
+    # ---------- worker side ----------
+    def _connect_writer(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _writer_loop(self):
+        try:
+            conn = self._connect_writer()
+        except BaseException as e:
+            self._start_error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        try:
+            while True:
+                job = self._queue.get()
+                if job is _STOP:
+                    break
+                fn, args, loop, fut, queued_at = job
+                start = time.perf_counter()
+                metrics.observe("db_queue_wait", "write", start - queued_at)
+                try:
+                    result = fn(conn, *args)
+                except BaseException as e:
+                    loop.call_soon_threadsafe(_resolve, fut, None, e)
+                else:
+                    loop.call_soon_threadsafe(_resolve, fut, result)
+                finally:
+                    metrics.observe("db_query", f"write {fn.__name__}", time.perf_counter() - start)
+        finally:
+            conn.close()
+
+    def _run_read(self, fn, args):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            with self._reader_lock:
+                self._reader_conns.append(conn)
+        start = time.perf_counter()
+        try:
+            return fn(conn, *args)
+        finally:
+            metrics.observe("db_query", f"read {fn.__name__}", time.perf_counter() - start)
+
+# Shared instance used by every cog
+database = AsyncDatabase(DB_NAME)
+metrics.gauge("db_pending_writes", "writer", lambda: database.pending_writes)
@@ -0,0 +1,118 @@
+# gacha_config.py — banner configuration loaded from a data file (gacha_banner.json)
+# Rates, pity rules and the loot table live outside the code so a banner change is a mod-only
+# /reloadgacha instead of a restart. load_config() validates the whole file before anything is
+# swapped in; a bad file raises GachaConfigError and the running banner stays as it was.
+
+import hashlib
+import json
+
+RARITIES = (3, 4, 5)
+
+class GachaConfigError(ValueError):
+    """The banner file is missing, malformed, or describes a banner that can't work."""
+
+class GachaConfig:
+    """
+    One validated banner. Treat it as immutable: a reload builds a new one and swaps it in whole.
+    - threshold_5 / threshold_4: cumulative cut points for the single random() draw in roll_rarity
+    - loot_table: {rarity: tuple of item names}, sampled uniformly
+    - odds_key: the arguments gacha_odds.OddsTables needs
+    """
+
+    __slots__ = ("name", "rate_5", "rate_4", "hard_pity_5", "special_pull_5", "special_5_chance",
+                 "guarantee_4", "loot_table", "threshold_5", "threshold_4", "digest")
+
+    def __init__(self, name: str, rate_5: float, rate_4: float, hard_pity_5: int, special_pull_5: int,
+                 special_5_chance: float, guarantee_4: int, loot_table: dict, digest: str = ""):
+        self.name = name
+        self.rate_5 = rate_5
+        self.rate_4 = rate_4
+        self.hard_pity_5 = hard_pity_5
+        self.special_pull_5 = special_pull_5
+        self.special_5_chance = special_5_chance
+        self.guarantee_4 = guarantee_4
+        self.loot_table = {r: tuple(loot_table[r]) for r in RARITIES}
+        self.threshold_5 = rate_5
+        self.threshold_4 = rate_5 + rate_4
+        self.digest = digest
+
+    @property
+    def rate_3(self) -> float:
+        return 1.0 - self.rate_5 - self.rate_4
+
+    @property
+    def odds_key(self) -> tuple:
+        return (self.rate_5, self.rate_4, self.hard_pity_5, self.special_pull_5, self.special_5_chance, self.guarantee_4)
+
+def _number(section: dict, key: str, where: str, lo: float, hi: float) -> float:
+    value = section.get(key)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not lo <= value <= hi:
+        raise GachaConfigError(f"{where}.{key} must be a number between {lo} and {hi} (got {value!r})")
+    return float(value)
+
+def _integer(section: dict, key: str, where: str, lo: int, hi: int) -> int:
+    value = section.get(key)
+    if isinstance(value, bool) or not isinstance(value, int) or not lo <= value <= hi:
+        raise GachaConfigError(f"{where}.{key} must be a whole number between {lo} and {hi} (got {value!r})")
+    return value
+
+def _section(raw: dict, key: str) -> dict:
+    value = raw.get(key)
+    if not isinstance(value, dict):
+        raise GachaConfigError(f"'{key}' must be an object")
+    return value
+
+def parse_config(raw, digest: str = "") -> GachaConfig:
+    """Validate an already-decoded banner document."""
+    if not isinstance(raw, dict):
+        raise GachaConfigError("the banner file must contain a JSON object")
+
+    name = raw.get("name", "Current Banner")
+    if not isinstance(name, str) or not name.strip():
+        raise GachaConfigError("name must be a non-empty string")
+
+    rates = _section(raw, "rates")
+    rate_5 = _number(rates, "5", "rates", 0.0, 1.0)
+    rate_4 = _number(rates, "4", "rates", 0.0, 1.0)
+    if rate_5 + rate_4 > 1.0:
+        raise GachaConfigError(f"rates.5 + rates.4 must not exceed 1 (got {rate_5 + rate_4:g})")
+
+    pity = _section(raw, "pity")
+    hard_pity_5 = _integer(pity, "hard_pity_5", "pity", 1, 10_000)
+    special_pull_5 = _integer(pity, "special_pull_5", "pity", 1, 10_000)
+    if special_pull_5 >= hard_pity_5:
+        raise GachaConfigError("pity.special_pull_5 must come before pity.hard_pity_5")
+    special_5_chance = _number(pity, "special_5_chance", "pity", 0.0, 1.0)
+    guarantee_4 = _integer(pity, "guarantee_4", "pity", 1, 10_000)
+
+    table = _section(raw, "loot_table")
+    if set(table) != {str(r) for r in RARITIES}:
+        raise GachaConfigError(f"loot_table needs exactly the rarities {', '.join(map(str, RARITIES))}")
+    loot_table, seen = {}, {}
+    for r in RARITIES:
+        items = table[str(r)]
+        if not isinstance(items, list) or not items:
+            raise GachaConfigError(f"loot_table.{r} must be a non-empty list of item names")
+        for item in items:
+            if not isinstance(item, str) or not item.strip():
+                raise GachaConfigError(f"loot_table.{r} contains an empty or non-string item: {item!r}")
+            if item in seen:
+                # items.name is unique: one name can only ever have one rarity
+                raise GachaConfigError(f"'{item}' is listed more than once (rarities {seen[item]} and {r})")
+            seen[item] = r
+        loot_table[r] = items
+
+    return GachaConfig(name.strip(), rate_5, rate_4, hard_pity_5, special_pull_5, special_5_chance,
+                       guarantee_4, loot_table, digest)
+
+def load_config(path: str) -> GachaConfig:
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        raise GachaConfigError(f"can't read {path}: {e.strerror}") from None
+    try:
+        raw = json.loads(data.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise GachaConfigError(f"{path} is not valid JSON: {e}") from None
+    return parse_config(raw, hashlib.sha1(data).hexdigest()[:8])
@@ -1,18 +1,38 @@
-# gacha_main.py — FULL GENSHIN-STYLE GACHA SYSTEM (AUTO-MIGRATING, ROBUST)
-# Drop in, copy/paste. Assumes bot_config provides DB_NAME, GACHA_CHANNEL_ID, MODERATOR_ROLE_IDS.
+# gacha_main.py — FULL GENSHIN-STYLE GACHA SYSTEM (ROBUST)
+# Drop in, copy/paste. Channels and moderator roles come from guild_config (per guild).
+# Schema is owned by migrations.py, which bot.py runs once at startup.
+# All player state is per guild: every DB helper and cache is keyed by (guild_id, user_id).
 
+import os
 import sys
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import sqlite3
 import random
 import time
+import asyncio
 import typing
+import datetime
 import logging
 import traceback
+import weakref
+import bisect
+import heapq
+from collections import Counter, OrderedDict
 
-from bot_config import DB_NAME, GACHA_CHANNEL_ID, MODERATOR_ROLE_IDS
+from bot_config import (
+    GACHA_CONFIG_FILE, MAX_BULK_WISHES,
+    HISTORY_FLUSH_ROWS, HISTORY_FLUSH_INTERVAL,
+    PITY_CACHE_SIZE, PITY_CACHE_TTL, INVENTORY_INDEX_SIZE,
+    LEADERBOARD_NAME_TTL,
+    HISTORY_KEEP_ROWS, HISTORY_KEEP_DAYS, HISTORY_COMPACT_BATCH, HISTORY_COMPACT_INTERVAL,
+)
+from database import database, transaction
+from metrics import metrics
+from gacha_config import GachaConfig, GachaConfigError, load_config
+from guild_config import guilds, is_guild_moderator
+import gacha_odds
 
 # -------------------------
 # Logging & runtime notice
@@ -27,243 +47,725 @@ if sys.version_info >= (3, 13):
 # =====================================================
 # CONFIG (tweakable)
 # =====================================================
-RATE_5_STAR = 0.006
-RATE_4_STAR = 0.05
-
-HARD_PITY_5 = 60         # guaranteed 5★ at this pull
-SPECIAL_30_CHANCE = 0.5  # at pull 30 there's a 50% chance to upgrade to 5★; if it fails, guarantee a 4★
-
-MAX_WISHES_AT_ONCE = 10  # server-side clamp
-
-# =====================================================
-# LOOT TABLE
-# =====================================================
-LOOT_TABLE = {
-    3: [
-        "Scrap-Metal Shiv/Club",
-        "Tire-Tread Armor",
-        "10% XP Multiplier Token (1 Use)",
-        "50 XP Crystal",
-        "100 XP Crystal",
-        "1,000 Crowns"
-    ],
-    4: [
-        "The Rider’s Weapon",
-        "The Rider’s Duster",
-        "Legion Standard",
-        "Legion Riot Plate",
-        "10% XP Multiplier Token (1 Week)",
-        "250 XP Crystal",
-        "10,000 Crowns",
-    ],
-    5: [
-        "Exalted Grade Item",
-        "20% XP Multiplier (1 Week)",
-        "500 XP Crystal",
-        "50,000 Crowns"
-    ]
-}
+# Rates, pity rules and the loot table come from GACHA_CONFIG_FILE (see gacha_config.py and the
+# BANNER section below) and can be swapped at runtime with /reloadgacha.
+MAX_WISHES_AT_ONCE = 10  # above this a wish runs in bulk mode (summarized results, compact history)
+AUTOCOMPLETE_DEADLINE = 2.0  # seconds; Discord drops autocomplete answers after 3
+PAGE_SIZE = 20           # rows per /inventory and /history page
+PAGE_TIMEOUT = 180       # seconds before the page buttons stop responding
 
 RARITY_EMOJI = {3: "▪️", 4: "🔸", 5: "🌟"}
 RARITY_COLOR = {3: 0x90EE90, 4: 0xADD8E6, 5: 0xFFD700}
 
 # =====================================================
-# DATABASE HELPERS / MIGRATION
+# PITY / STATE FUNCTIONS
 # =====================================================
-def db():
-    # Fresh connection each call reduces cross-thread issues. Caller must close via context manager.
-    return sqlite3.connect(DB_NAME, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES, check_same_thread=False)
+# The _underscore helpers take a connection and run on a database thread;
+# the async wrappers below are what the cog awaits.
+def _get_pity(conn: sqlite3.Connection, guild_id: int, user_id: int) -> dict:
+    row = conn.execute("SELECT pity_5_star, pity_4_star, total_pulls, total_5_stars FROM pity WHERE guild_id = ? AND user_id = ?",
+                       (guild_id, user_id)).fetchone()
+    if not row:
+        # No row yet: the first wish creates it
+        return {"pity_5": 0, "pity_4": 0, "total": 0, "total_5": 0}
+    return {"pity_5": row[0], "pity_4": row[1], "total": row[2], "total_5": row[3]}
 
-def _get_table_columns(conn: sqlite3.Connection, table: str) -> set:
-    cur = conn.cursor()
-    cur.execute(f"PRAGMA table_info('{table}')")
-    rows = cur.fetchall()
-    return {row[1] for row in rows}  # row[1] is column name
+def _save_pity(conn: sqlite3.Connection, guild_id: int, user_id: int, pity_5: int, pity_4: int, total: int, total_5: int):
+    # REPLACE will insert or delete+insert the row; this is acceptable for a counters table.
+    conn.execute("""
+        REPLACE INTO pity (guild_id, user_id, pity_5_star, pity_4_star, total_pulls, total_5_stars)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (guild_id, user_id, pity_5, pity_4, total, total_5))
 
-def init_db():
+class PityCache:
     """
-    - Create tables if missing.
-    - Add missing columns (safe migrations) so old DBs don't crash.
-    This is idempotent and safe to run at each cog load.
+    Bounded LRU cache of pity state keyed by player = (guild_id, user_id), written through to SQLite.
+    - lock(player) serializes every read-modify-write for one player (slash + text /wish overlap).
+    - Entries idle longer than `ttl` seconds (0 = never) or past `capacity` are evicted;
+      since writes go straight to the DB, dropping an entry never loses data.
     """
-    with db() as conn:
-        cur = conn.cursor()
 
-        # Create base tables (if missing)
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS pity (
-                user_id INTEGER PRIMARY KEY,
-                pity_5_star INTEGER NOT NULL DEFAULT 0,
-                pity_4_star INTEGER NOT NULL DEFAULT 0,
-                total_pulls INTEGER NOT NULL DEFAULT 0
-            )
-        """)
+    def __init__(self, capacity: int = PITY_CACHE_SIZE, ttl: float = PITY_CACHE_TTL):
+        self.capacity = max(1, capacity)
+        self.ttl = ttl
+        self._entries = OrderedDict()   # (guild_id, user_id) -> (state, last_used)
+        # Locks live only while someone holds or waits on them
+        self._locks = weakref.WeakValueDictionary()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS inventory (
-                user_id INTEGER,
-                item_name TEXT,
-                quantity INTEGER NOT NULL DEFAULT 0,
-                PRIMARY KEY (user_id, item_name)
-            )
-        """)
+    def lock(self, player: tuple) -> asyncio.Lock:
+        lock = self._locks.get(player)
+        if lock is None:
+            lock = self._locks[player] = asyncio.Lock()
+        return lock
 
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS pull_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                item_name TEXT,
-                rarity INTEGER,
-                timestamp INTEGER
-            )
-        """)
-        conn.commit()
-
-        # Migrate pity table: add total_5_stars if missing
-        try:
-            cols = _get_table_columns(conn, "pity")
-            if "total_5_stars" not in cols:
-                logger.info("Adding missing column 'total_5_stars' to 'pity' table (migration).")
-                cur.execute("ALTER TABLE pity ADD COLUMN total_5_stars INTEGER NOT NULL DEFAULT 0")
-                conn.commit()
-        except Exception:
-            logger.error("Error running migrations on 'pity':\n%s", traceback.format_exc())
+    def peek(self, player: tuple):
+        entry = self._entries.get(player)
+        if entry is None:
+            return None
+        state, last_used = entry
+        now = time.monotonic()
+        if self.ttl and now - last_used > self.ttl:
+            del self._entries[player]
+            self.evictions += 1
+            return None
+        self._entries[player] = (state, now)
+        self._entries.move_to_end(player)
+        return dict(state)
 
-# =====================================================
-# PITY / STATE FUNCTIONS
-# =====================================================
-def get_pity(user_id: int) -> dict:
+    def put(self, player: tuple, state: dict):
+        self._entries[player] = (dict(state), time.monotonic())
+        self._entries.move_to_end(player)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def load(self, player: tuple) -> dict:
+        """Cached state, reading it from the DB on a miss. Caller must hold lock(player)."""
+        state = self.peek(player)
+        if state is not None:
+            self.hits += 1
+            return state
+        self.misses += 1
+        state = await database.read(_get_pity, *player)
+        self.put(player, state)
+        return dict(state)
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "capacity": self.capacity,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+pity_cache = PityCache()
+
+async def get_pity(guild_id: int, user_id: int) -> dict:
     """
     Returns a dictionary with keys: pity_5, pity_4, total, total_5
-    Ensures a row exists (inserts default row if not).
+    Users without a row yet get all zeros.
     """
-    # Ensure DB and columns exist
-    init_db()
-    with db() as conn:
-        cur = conn.cursor()
-        # Defensive select: if total_5_stars doesn't exist, fetch what's available and default the rest
-        try:
-            cur.execute("SELECT pity_5_star, pity_4_star, total_pulls, total_5_stars FROM pity WHERE user_id = ?", (user_id,))
-            row = cur.fetchone()
-            if not row:
-                # Insert default row
-                cur.execute("INSERT INTO pity (user_id, pity_5_star, pity_4_star, total_pulls, total_5_stars) VALUES (?, 0, 0, 0, 0)", (user_id,))
-                conn.commit()
-                return {"pity_5": 0, "pity_4": 0, "total": 0, "total_5": 0}
-            # If the row doesn't contain total_5_stars (older schema), handle by padding
-            if len(row) < 4:
-                vals = list(row) + [0] * (4 - len(row))
-            else:
-                vals = list(row)
-            return {"pity_5": vals[0], "pity_4": vals[1], "total": vals[2], "total_5": vals[3]}
-        except sqlite3.OperationalError:
-            # Fallback in case columns differ: try select whatever we can
-            cur.execute("SELECT pity_5_star, pity_4_star, total_pulls FROM pity WHERE user_id = ?", (user_id,))
-            row = cur.fetchone()
-            if not row:
-                cur.execute("INSERT INTO pity (user_id, pity_5_star, pity_4_star, total_pulls) VALUES (?, 0, 0, 0)", (user_id,))
-                conn.commit()
-                return {"pity_5": 0, "pity_4": 0, "total": 0, "total_5": 0}
-            vals = list(row) + [0]
-            return {"pity_5": vals[0], "pity_4": vals[1], "total": vals[2], "total_5": vals[3]}
-
-def save_pity(user_id: int, pity_5: int, pity_4: int, total: int, total_5: int):
-    """
-    Upsert user's pity row robustly.
-    Using REPLACE INTO is safe here because user_id is primary key.
+    player = (guild_id, user_id)
+    state = pity_cache.peek(player)
+    if state is not None:
+        pity_cache.hits += 1
+        return state
+    # Miss: load under the player's lock so a concurrent wish can't be overwritten by a stale read
+    async with pity_cache.lock(player):
+        return await pity_cache.load(player)
+
+async def save_pity(guild_id: int, user_id: int, pity_5: int, pity_4: int, total: int, total_5: int) -> bool:
+    """
+    Upsert user's pity row robustly and refresh the cache once it's written.
+    Returns False (error logged, cache untouched) if the write failed.
+    Callers doing read-modify-write should hold pity_cache.lock((guild_id, user_id)).
     """
     try:
-        with db() as conn:
-            cur = conn.cursor()
-            # REPLACE will insert or delete+insert the row; this is acceptable for a counters table.
-            cur.execute("""
-                REPLACE INTO pity (user_id, pity_5_star, pity_4_star, total_pulls, total_5_stars)
-                VALUES (?, ?, ?, ?, ?)
-            """, (user_id, pity_5, pity_4, total, total_5))
-            conn.commit()
+        await database.write(_save_pity, guild_id, user_id, pity_5, pity_4, total, total_5)
     except Exception:
-        logger.error("Failed to save pity for user %s:\n%s", user_id, traceback.format_exc())
+        logger.error("Failed to save pity for user %s in guild %s:\n%s", user_id, guild_id, traceback.format_exc())
+        return False
+    pity_cache.put((guild_id, user_id), {"pity_5": pity_5, "pity_4": pity_4, "total": total, "total_5": total_5})
+    return True
 
 # =====================================================
-# INVENTORY / HISTORY
+# ITEM CATALOG
 # =====================================================
-def add_inventory(user_id: int, item: str):
-    try:
-        with db() as conn:
-            cur = conn.cursor()
-            # Update then insert fallback (works across SQLite versions)
-            cur.execute("UPDATE inventory SET quantity = quantity + 1 WHERE user_id = ? AND item_name = ?", (user_id, item))
-            if cur.rowcount == 0:
-                cur.execute("INSERT INTO inventory (user_id, item_name, quantity) VALUES (?, ?, 1)", (user_id, item))
-            conn.commit()
-    except Exception:
-        logger.error("Failed to add inventory for user %s: %s", user_id, traceback.format_exc())
+class ItemCatalog:
+    """
+    In-process mirror of the `items` table. Inventory and history store item ids;
+    names are looked up here (names[item_id]) only when an embed is rendered.
+    """
 
-def remove_inventory(user_id: int, item: str) -> bool:
-    with db() as conn:
+    def __init__(self):
+        self.names = [None]     # index = item id; ids start at 1
+        self.folded = [None]    # casefolded names, for case-insensitive matching
+        self.rarities = [0]
+        self.ids = {}           # name -> id
+
+    def load(self, conn: sqlite3.Connection):
+        rows = conn.execute("SELECT id, name, rarity FROM items ORDER BY id").fetchall()
+        size = (rows[-1][0] + 1) if rows else 1
+        names, folded, rarities = [None] * size, [None] * size, [0] * size
+        for item_id, name, rarity in rows:
+            names[item_id], folded[item_id], rarities[item_id] = name, name.casefold(), rarity
+        # Swap whole lists so readers never see a half-built catalog
+        self.names, self.folded, self.rarities = names, folded, rarities
+        self.ids = {name: item_id for item_id, name, _ in rows}
+
+    def name(self, item_id: int) -> str:
+        if 0 < item_id < len(self.names) and self.names[item_id] is not None:
+            return self.names[item_id]
+        return f"Item #{item_id}"
+
+catalog = ItemCatalog()
+
+def _sync_item_catalog(conn: sqlite3.Connection, loot_table: dict):
+    with transaction(conn):
+        conn.executemany("""
+            INSERT INTO items (name, rarity) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET rarity = excluded.rarity
+        """, [(name, rarity) for rarity, names in loot_table.items() for name in names])
+    catalog.load(conn)
+
+async def sync_item_catalog(config: GachaConfig = None):
+    """Make sure every item on the banner has an id, then reload the in-process catalog."""
+    await database.write(_sync_item_catalog, (config or _banner.config).loot_table)
+
+# =====================================================
+# INVENTORY / HISTORY
+# =====================================================
+def _remove_inventory(conn: sqlite3.Connection, guild_id: int, user_id: int, item_id: int) -> bool:
+    key = (guild_id, user_id, item_id)
+    with transaction(conn):
         cur = conn.cursor()
-        cur.execute("SELECT quantity FROM inventory WHERE user_id = ? AND item_name = ?", (user_id, item))
+        cur.execute("SELECT quantity FROM inventory WHERE guild_id = ? AND user_id = ? AND item_id = ?", key)
         row = cur.fetchone()
         if not row:
             return False
         if row[0] <= 1:
-            cur.execute("DELETE FROM inventory WHERE user_id = ? AND item_name = ?", (user_id, item))
+            cur.execute("DELETE FROM inventory WHERE guild_id = ? AND user_id = ? AND item_id = ?", key)
         else:
-            cur.execute("UPDATE inventory SET quantity = quantity - 1 WHERE user_id = ? AND item_name = ?", (user_id, item))
-        conn.commit()
+            cur.execute("UPDATE inventory SET quantity = quantity - 1 WHERE guild_id = ? AND user_id = ? AND item_id = ?", key)
         return True
 
-def get_inventory(user_id: int):
-    with db() as conn:
-        return conn.execute("SELECT item_name, quantity FROM inventory WHERE user_id = ? ORDER BY quantity DESC", (user_id,)).fetchall()
+def _get_inventory(conn: sqlite3.Connection, guild_id: int, user_id: int):
+    return conn.execute("SELECT item_id, quantity FROM inventory WHERE guild_id = ? AND user_id = ? ORDER BY quantity DESC, item_id",
+                        (guild_id, user_id)).fetchall()
 
-def log_history(user_id: int, item: str, rarity: int):
-    try:
-        with db() as conn:
-            conn.execute("INSERT INTO pull_history (user_id, item_name, rarity, timestamp) VALUES (?, ?, ?, ?)",
-                         (user_id, item, rarity, int(time.time())))
-            conn.commit()
-    except Exception:
-        logger.error("Failed to log history for user %s:\n%s", user_id, traceback.format_exc())
+def _get_inventory_page(conn: sqlite3.Connection, guild_id: int, user_id: int, limit: int, after: tuple = None, before: tuple = None):
+    """
+    One page of (item_id, quantity), most plentiful first (quantity DESC, item_id).
+    `after` / `before` are (quantity, item_id) cursors taken from the current page's last / first row;
+    both are a range seek on idx_inventory_user_qty, so a deep page costs the same as the first.
+    """
+    if before is not None:
+        qty, item_id = before
+        rows = conn.execute("""
+            SELECT item_id, quantity FROM inventory
+            WHERE guild_id = ? AND user_id = ? AND quantity >= ? AND NOT (quantity = ? AND item_id >= ?)
+            ORDER BY quantity, item_id DESC LIMIT ?
+        """, (guild_id, user_id, qty, qty, item_id, limit)).fetchall()
+        rows.reverse()
+        return rows
+    if after is not None:
+        qty, item_id = after
+        return conn.execute("""
+            SELECT item_id, quantity FROM inventory
+            WHERE guild_id = ? AND user_id = ? AND quantity <= ? AND NOT (quantity = ? AND item_id <= ?)
+            ORDER BY quantity DESC, item_id LIMIT ?
+        """, (guild_id, user_id, qty, qty, item_id, limit)).fetchall()
+    return conn.execute("SELECT item_id, quantity FROM inventory WHERE guild_id = ? AND user_id = ? ORDER BY quantity DESC, item_id LIMIT ?",
+                        (guild_id, user_id, limit)).fetchall()
+
+def _get_history(conn: sqlite3.Connection, guild_id: int, user_id: int, limit: int, after: int = None, before: int = None,
+                 rarity: int = None, since: int = None, ceiling: int = None):
+    """
+    One page of (id, item_id, rarity, timestamp, count), newest first.
+    `after` / `before` are ids from the current page's last / first row. Rows are walked in id order
+    on idx_pull_history_user (or idx_pull_history_user_rarity when filtering by rarity).
+    `since` becomes an id floor via one lookup on idx_pull_history_user_ts, so the date filter
+    bounds the scan instead of checking every older row; the timestamp test stays on as an exact guard.
+    `ceiling` caps ids, so rows flushed after a HistoryBuffer.snapshot() aren't read twice.
+    """
+    where, params = ["guild_id = ? AND user_id = ?"], [guild_id, user_id]
+    if ceiling is not None:
+        where.append("id <= ?")
+        params.append(ceiling)
+    if rarity is not None:
+        where.append("rarity = ?")
+        params.append(rarity)
+    if since is not None:
+        floor = conn.execute("SELECT MIN(id) FROM pull_history WHERE guild_id = ? AND user_id = ? AND timestamp >= ?",
+                             (guild_id, user_id, since)).fetchone()[0]
+        if floor is None:
+            return []
+        where.append("id >= ? AND timestamp >= ?")
+        params += [floor, since]
+    order = "DESC"
+    if before is not None:
+        where.append("id > ?")
+        params.append(before)
+        order = "ASC"
+    elif after is not None:
+        where.append("id < ?")
+        params.append(after)
+    rows = conn.execute(f"""
+        SELECT id, item_id, rarity, timestamp, count FROM pull_history
+        WHERE {" AND ".join(where)} ORDER BY id {order} LIMIT ?
+    """, (*params, limit)).fetchall()
+    if before is not None:
+        rows.reverse()
+    return rows
+
+def _get_all_totals(conn: sqlite3.Connection):
+    return conn.execute("SELECT guild_id, user_id, total_5_stars FROM pity").fetchall()
+
+async def remove_inventory(guild_id: int, user_id: int, item: str) -> bool:
+    item_id = catalog.ids.get(item)
+    if item_id is None:
+        return False
+    removed = await database.write(_remove_inventory, guild_id, user_id, item_id)
+    if removed:
+        inventory_index.remove((guild_id, user_id), item_id)
+    return removed
+
+async def get_inventory(guild_id: int, user_id: int):
+    return await database.read(_get_inventory, guild_id, user_id)
+
+async def get_inventory_page(guild_id: int, user_id: int, limit: int = PAGE_SIZE, after: tuple = None, before: tuple = None):
+    return await database.read(_get_inventory_page, guild_id, user_id, limit, after, before)
+
+async def get_history(guild_id: int, user_id: int, limit: int = PAGE_SIZE, after: int = None, before: int = None,
+                      rarity: int = None, since: int = None, ceiling: int = None, pending: list = ()):
+    """
+    Like _get_history, with `pending` (from HistoryBuffer.snapshot(), ids above `ceiling`) merged in
+    ahead of the stored rows, so still-buffered pulls show up without forcing a flush.
+    """
+    pending = [row for row in pending if (rarity is None or row[2] == rarity) and (since is None or row[3] >= since)]
+    if before is not None:
+        # Both lists are newest first and every pending id is above every stored one
+        newer = [row for row in pending if row[0] > before]
+        stored = await database.read(_get_history, guild_id, user_id, limit, None, before, rarity, since, ceiling)
+        return (newer + stored)[-limit:]
+    rows = [row for row in pending if after is None or row[0] < after][:limit]
+    if len(rows) < limit:
+        rows += await database.read(_get_history, guild_id, user_id, limit - len(rows), after, None, rarity, since, ceiling)
+    return rows
+
+def _get_pull_totals(conn: sqlite3.Connection, guild_id: int, user_id: int, ceiling: int = None):
+    if ceiling is None:
+        # pull_history_all = daily rollups + the raw tail, so totals survive compaction
+        return conn.execute("""
+            SELECT rarity, item_id, SUM(count) FROM pull_history_all
+            WHERE guild_id = ? AND user_id = ? GROUP BY rarity, item_id ORDER BY rarity DESC, SUM(count) DESC
+        """, (guild_id, user_id)).fetchall()
+    # The same two halves with the raw tail capped, as in _get_history
+    return conn.execute("""
+        SELECT rarity, item_id, SUM(count) FROM (
+            SELECT rarity, item_id, count FROM pull_history_daily WHERE guild_id = ? AND user_id = ?
+            UNION ALL
+            SELECT rarity, item_id, count FROM pull_history WHERE guild_id = ? AND user_id = ? AND id <= ?
+        ) GROUP BY rarity, item_id ORDER BY rarity DESC, SUM(count) DESC
+    """, (guild_id, user_id, guild_id, user_id, ceiling)).fetchall()
+
+async def get_pull_totals(guild_id: int, user_id: int, ceiling: int = None, pending: list = ()):
+    """[(rarity, item_id, count)], highest rarity then most pulled first, with `pending` rows added in."""
+    totals = await database.read(_get_pull_totals, guild_id, user_id, ceiling)
+    if not pending:
+        return totals
+    counts = {(rarity, item_id): count for rarity, item_id, count in totals}
+    for _, item_id, rarity, _, count in pending:
+        counts[rarity, item_id] = counts.get((rarity, item_id), 0) + count
+    return sorted(((rarity, item_id, count) for (rarity, item_id), count in counts.items()), key=lambda t: (-t[0], -t[2]))
+
+
+def _get_max_history_id(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT COALESCE(MAX(id), 0) FROM pull_history").fetchone()[0]
+
+def _insert_history(conn: sqlite3.Connection, rows: list) -> int:
+    """Insert the rows; returns the highest pull_history id once they're in."""
+    with transaction(conn):
+        conn.executemany("INSERT INTO pull_history (guild_id, user_id, item_id, rarity, timestamp, count) VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return _get_max_history_id(conn)
+
+class HistoryBuffer:
+    """
+    Write-behind buffer for pull_history.
+    Wishes append (guild_id, user_id, item_id, rarity, timestamp, count) rows here; they are written in one
+    executemany transaction once `flush_rows` rows are waiting or on the cog's interval tick.
+    A batch being written stays in `_inflight` until its commit returns, and `committed_id` is the highest
+    pull_history id as of the last finished flush. Both change in the same step, so snapshot() always
+    sees each row exactly once: in memory, or in the table at or below committed_id.
+    """
+
+    def __init__(self, flush_rows: int = HISTORY_FLUSH_ROWS):
+        self.flush_rows = flush_rows
+        self._rows = []
+        self._inflight = []
+        self._oldest = None          # monotonic time the oldest unflushed row was buffered
+        self.committed_id = None     # set by the cog at load, then by every successful flush
+        self._flush_lock = asyncio.Lock()
+        self._tasks = set()
+        # counters
+        self.flushes = 0
+        self.rows_flushed = 0
+        self.failed_flushes = 0
+        self.last_flush_size = 0
+        self.max_flush_size = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def __len__(self):
+        return len(self._rows) + len(self._inflight)
+
+    def snapshot(self, guild_id: int, user_id: int) -> tuple:
+        """
+        (committed_id, rows): one player's not-yet-committed pulls, newest first, as
+        (id, item_id, rarity, timestamp, count) with stand-in ids just above committed_id.
+        Stored rows above committed_id are exactly these once they land, so readers cap there.
+        """
+        mine = [(item_id, rarity, ts, n) for gid, uid, item_id, rarity, ts, n in (*self._inflight, *self._rows)
+                if uid == user_id and gid == guild_id]
+        base = self.committed_id or 0
+        return self.committed_id, [(base + i, *row) for i, row in reversed(list(enumerate(mine, 1)))]
+
+    def append(self, rows: list):
+        if not rows:
+            return
+        if not self._rows:
+            self._oldest = time.monotonic()
+        self._rows.extend(rows)
+        if len(self._rows) >= self.flush_rows and not self._flush_lock.locked():
+            task = asyncio.create_task(self.flush())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self._rows:
+                return 0
+            rows, oldest = self._rows, self._oldest
+            self._inflight, self._rows, self._oldest = rows, [], None
+            try:
+                committed_id = await database.write(_insert_history, rows)
+            except Exception:
+                # Keep the rows (ahead of anything appended meanwhile) for the next attempt
+                self.failed_flushes += 1
+                self._rows = rows + self._rows
+                self._inflight = []
+                self._oldest = oldest
+                logger.error("Failed to flush %d history row(s):\n%s", len(rows), traceback.format_exc())
+                return 0
+            # Together, with no await between: readers see these rows in memory or in the table, never neither
+            self._inflight, self.committed_id = [], committed_id
+            lag = time.monotonic() - oldest
+            self.flushes += 1
+            self.rows_flushed += len(rows)
+            self.last_flush_size = len(rows)
+            self.max_flush_size = max(self.max_flush_size, len(rows))
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            logger.debug("Flushed %d history row(s), lag %.2fs", len(rows), lag)
+            return len(rows)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._rows) + len(self._inflight),
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_size": self.last_flush_size,
+            "max_flush_size": self.max_flush_size,
+            "avg_flush_size": round(self.rows_flushed / self.flushes, 1) if self.flushes else 0,
+            "last_lag_s": round(self.last_lag, 3),
+            "max_lag_s": round(self.max_lag, 3),
+        }
+
+# =====================================================
+# INVENTORY INDEX (/use autocomplete)
+# =====================================================
+class _OwnedItems:
+    __slots__ = ("qty", "keys")
+
+    def __init__(self, rows):
+        self.qty = dict(rows)                                            # item_id -> quantity
+        self.keys = sorted((catalog.folded[i] or "", i) for i in self.qty)  # (folded name, item_id)
+
+class InventoryIndex:
+    """
+    Per-player owned-item index for /use autocomplete, kept in memory so a keystroke never waits on SQLite.
+    - Loaded lazily from `inventory` on a player's first lookup, LRU-bounded to `capacity` players.
+    - Keyed by the (guild_id, player) player tuple: inventories are per guild.
+    - Kept current by do_wish (after _wish_transaction commits) and remove_inventory (after its write).
+    - search(): case-insensitive; prefix matches (a bisect over sorted names) rank before substring
+      matches, then by quantity.
+    """
+
+    def __init__(self, capacity: int = INVENTORY_INDEX_SIZE):
+        self.capacity = max(1, capacity)
+        self._entries = OrderedDict()   # (guild_id, player) -> _OwnedItems
+        self._loading = {}              # player -> Task reading the player's inventory
+        self._stale = set()             # players changed while their load was in flight
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, player: tuple, gained: dict):
+        if player in self._loading:
+            self._stale.add(player)
+        entry = self._entries.get(player)
+        if entry is None:
+            return      # not indexed yet: the lazy load will read it from the DB
+        for item_id, n in gained.items():
+            if item_id not in entry.qty:
+                entry.qty[item_id] = 0
+                bisect.insort(entry.keys, (catalog.folded[item_id] or "", item_id))
+            entry.qty[item_id] += n
+
+    def remove(self, player: tuple, item_id: int, n: int = 1):
+        if player in self._loading:
+            self._stale.add(player)
+        entry = self._entries.get(player)
+        if entry is None or item_id not in entry.qty:
+            return
+        entry.qty[item_id] -= n
+        if entry.qty[item_id] <= 0:
+            del entry.qty[item_id]
+            entry.keys.remove((catalog.folded[item_id] or "", item_id))
+
+    async def _fetch(self, player: tuple) -> _OwnedItems:
+        self._stale.discard(player)
+        entry = _OwnedItems(await database.read(_get_inventory, *player))
+        # A wish or /use that landed mid-read may be missing from `entry`; answer with it but don't keep it
+        if player not in self._stale:
+            self._entries[player] = entry
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        self._stale.discard(player)
+        return entry
+
+    async def load(self, player: tuple) -> _OwnedItems:
+        entry = self._entries.get(player)
+        if entry is not None:
+            self._entries.move_to_end(player)
+            return entry
+        task = self._loading.get(player)
+        if task is None:
+            task = self._loading[player] = asyncio.ensure_future(self._fetch(player))
+            task.add_done_callback(lambda _: self._loading.pop(player, None))
+        # shield: one caller timing out must not cancel the load for everyone else
+        return await asyncio.shield(task)
+
+    async def search(self, player: tuple, query: str, limit: int = 25) -> list:
+        """[(item_id, quantity)] best matches first."""
+        entry = await self.load(player)
+        q = query.strip().casefold()
+        keys, qty = entry.keys, entry.qty
+        if not q:
+            ranked = ((-qty[i], name, i) for name, i in keys)
+        else:
+            start = bisect.bisect_left(keys, (q,))
+            prefix = set()
+            for name, i in keys[start:]:
+                if not name.startswith(q):
+                    break
+                prefix.add(i)
+            ranked = ((i not in prefix, -qty[i], name, i) for name, i in keys if i in prefix or q in name)
+        return [(key[-1], qty[key[-1]]) for key in heapq.nsmallest(limit, ranked)]
+
+inventory_index = InventoryIndex()
+
+# =====================================================
+# HISTORY RETENTION
+# =====================================================
+SECONDS_PER_DAY = 86400
+
+def _users_over_history_limit(conn: sqlite3.Connection, keep_rows: int):
+    return conn.execute(
+        "SELECT guild_id, user_id FROM pull_history GROUP BY guild_id, user_id HAVING COUNT(*) > ?", (keep_rows,)).fetchall()
+
+def _compact_user_batch(conn: sqlite3.Connection, guild_id: int, user_id: int, keep_rows: int, cutoff_ts: int, batch: int) -> int:
+    """
+    Roll up to `batch` of one user's compactable rows into pull_history_daily and delete them.
+    A row is compactable when it is neither among the user's `keep_rows` newest nor newer than cutoff_ts.
+    """
+    with transaction(conn):
+        edge = conn.execute("""
+            SELECT timestamp, id FROM pull_history WHERE guild_id = ? AND user_id = ?
+            ORDER BY timestamp DESC, id DESC LIMIT 1 OFFSET ?
+        """, (guild_id, user_id, keep_rows - 1)).fetchone()
+        if edge is None:
+            return 0
+        ids = [row[0] for row in conn.execute("""
+            SELECT id FROM pull_history
+            WHERE guild_id = ? AND user_id = ? AND timestamp < ? AND (timestamp, id) < (?, ?)
+            LIMIT ?
+        """, (guild_id, user_id, cutoff_ts, edge[0], edge[1], batch))]
+        if not ids:
+            return 0
+        marks = ",".join("?" * len(ids))
+        conn.execute(f"""
+            INSERT INTO pull_history_daily (guild_id, user_id, day, rarity, item_id, count)
+            SELECT guild_id, user_id, timestamp / {SECONDS_PER_DAY}, rarity, item_id, SUM(count)
+            FROM pull_history WHERE id IN ({marks})
+            GROUP BY guild_id, user_id, timestamp / {SECONDS_PER_DAY}, rarity, item_id
+            ON CONFLICT(guild_id, user_id, day, rarity, item_id) DO UPDATE SET count = count + excluded.count
+        """, ids)
+        conn.execute(f"DELETE FROM pull_history WHERE id IN ({marks})", ids)
+        return len(ids)
+
+async def compact_history(keep_rows: int = HISTORY_KEEP_ROWS, keep_days: int = HISTORY_KEEP_DAYS,
+                          batch: int = HISTORY_COMPACT_BATCH) -> int:
+    """
+    Move old pull_history rows into the pull_history_daily rollup, one small write transaction per
+    batch so wishes keep flowing in between. Returns how many raw rows were reclaimed.
+    """
+    keep_rows = max(keep_rows, PAGE_SIZE)   # /history's first page is always raw pulls
+    cutoff_ts = int(time.time()) - keep_days * SECONDS_PER_DAY
+    reclaimed = 0
+    for guild_id, user_id in await database.read(_users_over_history_limit, keep_rows):
+        while True:
+            n = await database.write(_compact_user_batch, guild_id, user_id, keep_rows, cutoff_ts, batch)
+            reclaimed += n
+            if n < batch:
+                break
+    return reclaimed
+
+# =====================================================
+# LEADERBOARD
+# =====================================================
+class Leaderboard:
+    """
+    In-memory ranking of one guild's total_5_stars.
+    Keys are kept sorted as (-total_5, user_id), so top-N is a slice and a rank is one bisect.
+    Seeded once from the DB on cog load, then updated by every committed wish.
+    A plain list, not a tree: update() finds its slot in O(log n) but insort/del shift the tail, O(n).
+    That is a deliberate trade at per-guild sizes (~3 µs an update at 1k players, ~6 µs at 10k,
+    ~40 µs at 100k); past that, swap in a sorted container with the same four methods.
+    """
+
+    def __init__(self):
+        self._keys = []      # sorted [(-total_5, user_id)]
+        self._scores = {}    # user_id -> total_5
+
+    def __len__(self):
+        return len(self._keys)
+
+    def seed(self, rows):
+        self._scores = {uid: total_5 for uid, total_5 in rows}
+        self._keys = sorted((-total_5, uid) for uid, total_5 in self._scores.items())
+
+    def update(self, user_id: int, total_5: int):
+        old = self._scores.get(user_id)
+        if old == total_5:
+            return
+        if old is not None:
+            i = bisect.bisect_left(self._keys, (-old, user_id))
+            del self._keys[i]
+        self._scores[user_id] = total_5
+        bisect.insort(self._keys, (-total_5, user_id))
+
+    def top(self, n: int) -> list:
+        return [(uid, -neg) for neg, uid in self._keys[:n]]
+
+    def rank(self, user_id: int):
+        """(rank, total_5) where rank counts players with strictly more 5★ plus one; None if unranked."""
+        total_5 = self._scores.get(user_id)
+        if total_5 is None:
+            return None
+        return bisect.bisect_left(self._keys, (-total_5,)) + 1, total_5
+
+class GuildLeaderboards:
+    """One Leaderboard per guild, so ranks never mix servers. Missing guilds start empty."""
+
+    def __init__(self):
+        self._boards = {}   # guild_id -> Leaderboard
+
+    def __len__(self):
+        return sum(len(board) for board in self._boards.values())
+
+    def __getitem__(self, guild_id: int) -> Leaderboard:
+        board = self._boards.get(guild_id)
+        if board is None:
+            board = self._boards[guild_id] = Leaderboard()
+        return board
+
+    def seed(self, rows):
+        by_guild = {}
+        for guild_id, uid, total_5 in rows:
+            by_guild.setdefault(guild_id, []).append((uid, total_5))
+        boards = {}
+        for guild_id, guild_rows in by_guild.items():
+            boards[guild_id] = Leaderboard()
+            boards[guild_id].seed(guild_rows)
+        self._boards = boards
+
+leaderboard = GuildLeaderboards()
 
-def get_history(user_id: int, limit=20):
-    with db() as conn:
-        return conn.execute("SELECT item_name, rarity, timestamp FROM pull_history WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?", (user_id, limit)).fetchall()
+class NameCache:
+    """Display names for leaderboard rows, resolved in batches and cached for `ttl` seconds."""
+
+    def __init__(self, ttl: float = LEADERBOARD_NAME_TTL):
+        self.ttl = ttl
+        self._names = {}   # (guild_id, user_id) -> (name, expires_at)
+
+    async def resolve(self, bot: commands.Bot, guild: typing.Optional[discord.Guild], user_ids: list) -> dict:
+        now = time.monotonic()
+        gid = guild.id if guild is not None else None
+        names, missing = {}, []
+        for uid in user_ids:
+            cached = self._names.get((gid, uid))
+            if cached and cached[1] > now:
+                names[uid] = cached[0]
+            else:
+                missing.append(uid)
+
+        if missing and guild is not None:
+            # One gateway request for the whole page instead of a lookup per row.
+            # Names are kept here, not in the member cache (see LEAN_MEMBER_CACHE)
+            try:
+                for member in await guild.query_members(user_ids=missing[:100], cache=False):
+                    names[member.id] = member.display_name
+            except Exception:
+                logger.warning("Leaderboard member query failed:\n%s", traceback.format_exc())
+
+        leftover = [uid for uid in missing if uid not in names]
+        if leftover:
+            # Left the guild (or no guild): fall back to the user cache, then concurrent REST lookups
+            to_fetch = []
+            for uid in leftover:
+                user = bot.get_user(uid)
+                if user:
+                    names[uid] = user.display_name
+                else:
+                    to_fetch.append(uid)
+            fetched = await asyncio.gather(*(bot.fetch_user(uid) for uid in to_fetch), return_exceptions=True)
+            for uid, user in zip(to_fetch, fetched):
+                if isinstance(user, discord.User):
+                    names[uid] = user.display_name
+
+        expires = now + self.ttl
+        for uid in missing:
+            name = names.setdefault(uid, f"User {uid}")
+            self._names[(gid, uid)] = (name, expires)
+        return names
 
 # =====================================================
 # GACHA LOGIC
 # =====================================================
-def roll_rarity(state: dict) -> int:
+def roll_rarity(state: dict, config: GachaConfig = None) -> int:
+    cfg = config or _banner.config
     pity_5 = state["pity_5"]
     pity_4 = state["pity_4"]
 
     # Hard pity
-    if pity_5 >= HARD_PITY_5:
+    if pity_5 >= cfg.hard_pity_5:
         return 5
 
     # special 30th behaviour
-    if pity_5 == 30:
-        return 5 if random.random() < SPECIAL_30_CHANCE else 4
+    if pity_5 == cfg.special_pull_5:
+        return 5 if random.random() < cfg.special_5_chance else 4
 
     # 4* guarantee
-    if pity_4 >= 10:
+    if pity_4 >= cfg.guarantee_4:
         return 4
 
     r = random.random()
-    if r < RATE_5_STAR:
+    if r < cfg.threshold_5:
         return 5
-    if r < RATE_5_STAR + RATE_4_STAR:
+    if r < cfg.threshold_4:
         return 4
     return 3
 
-def single_pull(state: dict):
+def single_pull(state: dict, config: GachaConfig = None):
+    cfg = config or _banner.config
     # increment counters before roll (matches many gacha designs)
     state["pity_5"] += 1
     state["pity_4"] += 1
     state["total"] += 1
 
-    rarity = roll_rarity(state)
-    item = random.choice(LOOT_TABLE[rarity])
+    rarity = roll_rarity(state, cfg)
+    item = random.choice(cfg.loot_table[rarity])
 
     # reset appropriate pity counters
     if rarity == 5:
@@ -275,23 +777,81 @@ def single_pull(state: dict):
 
     return rarity, item
 
-async def do_wish(user: typing.Union[discord.User, discord.Member], amount: int):
-    amount = max(1, min(amount, MAX_WISHES_AT_ONCE))
-    state = get_pity(user.id)
-    results = {3: [], 4: [], 5: []}
+def _wish_transaction(conn: sqlite3.Connection, guild_id: int, user_id: int, amount: int,
+                      buffered_history: bool = False, state: dict = None, config: GachaConfig = None):
+    """
+    Run a whole wish inside one IMMEDIATE transaction on the writer connection:
+    pity read -> pulls -> aggregated inventory upsert -> bulk history insert -> pity save -> commit.
+    Either everything lands or nothing does, so inventory and pity can't disagree after a crash.
+    With buffered_history the history rows are returned instead of inserted (see HistoryBuffer).
+    A `state` from the pity cache skips the pity read; it is copied, never mutated.
+    Every pull uses the one `config` passed in, so a /reloadgacha mid-wish can't mix banners.
+    Above MAX_WISHES_AT_ONCE the wish is a bulk wish: results come back as {rarity: Counter(item)}
+    and history gets one row per distinct item with a count, instead of one row per pull.
+    """
+    config = config or _banner.config
+    with transaction(conn):
+        cur = conn.cursor()
+        if state is None:
+            state = _get_pity(conn, guild_id, user_id)
+        else:
+            state = dict(state)
 
-    for _ in range(amount):
-        rarity, item = single_pull(state)
-        results[rarity].append(item)
-        # Best effort: don't let DB hiccups crash the whole command
-        try:
-            add_inventory(user.id, item)
-            log_history(user.id, item, rarity)
-        except Exception:
-            logger.error("Inventory/history error while doing wish for %s:\n%s", user.id, traceback.format_exc())
+        pulls = [single_pull(state, config) for _ in range(amount)]
+        counts = Counter(pulls)   # (rarity, item) -> n
+        now = int(time.time())
+        ids = catalog.ids
 
-    # Save updated pity and totals
-    save_pity(user.id, state["pity_5"], state["pity_4"], state["total"], state["total_5"])
+        if amount > MAX_WISHES_AT_ONCE:
+            results = {3: Counter(), 4: Counter(), 5: Counter()}
+            for (rarity, item), n in counts.items():
+                results[rarity][item] = n
+            history_rows = [(guild_id, user_id, ids[item], rarity, now, n) for (rarity, item), n in counts.items()]
+        else:
+            results = {3: [], 4: [], 5: []}
+            for rarity, item in pulls:
+                results[rarity].append(item)
+            history_rows = [(guild_id, user_id, ids[item], rarity, now, 1) for rarity, item in pulls]
+
+        # One row per distinct item instead of one statement per pull
+        cur.executemany("""
+            INSERT INTO inventory (guild_id, user_id, item_id, quantity) VALUES (?, ?, ?, ?)
+            ON CONFLICT(guild_id, user_id, item_id) DO UPDATE SET quantity = quantity + excluded.quantity
+        """, [(guild_id, user_id, ids[item], n) for (_, item), n in counts.items()])
+
+        if not buffered_history:
+            cur.executemany("INSERT INTO pull_history (guild_id, user_id, item_id, rarity, timestamp, count) VALUES (?, ?, ?, ?, ?, ?)",
+                            history_rows)
+
+        cur.execute("""
+            INSERT INTO pity (guild_id, user_id, pity_5_star, pity_4_star, total_pulls, total_5_stars)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(guild_id, user_id) DO UPDATE SET
+                pity_5_star = excluded.pity_5_star,
+                pity_4_star = excluded.pity_4_star,
+                total_pulls = excluded.total_pulls,
+                total_5_stars = excluded.total_5_stars
+        """, (guild_id, user_id, state["pity_5"], state["pity_4"], state["total"], state["total_5"]))
+    return results, state, history_rows
+
+async def do_wish(guild_id: int, user: typing.Union[discord.User, discord.Member], amount: int, history: HistoryBuffer = None):
+    amount = max(1, min(amount, MAX_BULK_WISHES))
+    config = _banner.config
+    player = (guild_id, user.id)
+    async with pity_cache.lock(player):
+        cached = await pity_cache.load(player)
+        # All-or-nothing: a DB error aborts the whole wish and surfaces to the command's error handler
+        results, state, history_rows = await database.write(
+            _wish_transaction, guild_id, user.id, amount, history is not None, cached, config)
+        # Only a committed wish reaches the cache
+        pity_cache.put(player, state)
+        leaderboard[guild_id].update(user.id, state["total_5"])
+        gained = Counter()
+        for _, _, item_id, _, _, n in history_rows:
+            gained[item_id] += n
+        inventory_index.add(player, gained)
+        if history is not None:
+            history.append(history_rows)
     return results, state
 
 # =====================================================
@@ -318,8 +878,9 @@ def wish_embed(user, amount, results, state):
         color=RARITY_COLOR.get(highest, 0xFFFFFF)
     )
 
-    remaining = max(0, HARD_PITY_5 - state["pity_5"])
-    embed.set_footer(text=f"Pity: {state['pity_5']}/{HARD_PITY_5} • Guaranteed in {remaining} pulls • Total 5★: {state['total_5']}")
+    hard_pity_5 = _banner.config.hard_pity_5
+    remaining = max(0, hard_pity_5 - state["pity_5"])
+    embed.set_footer(text=f"Pity: {state['pity_5']}/{hard_pity_5} • Guaranteed in {remaining} pulls • Total 5★: {state['total_5']}")
 
     # Safe avatar handling
     try:
@@ -336,29 +897,268 @@ def wish_embed(user, amount, results, state):
 
     return embed
 
+def bulk_wish_embed(user, amount, results, state):
+    """Summary embed for bulk wishes: counts per rarity and per item instead of one line per pull."""
+    highest = next((r for r in (5, 4, 3) if results[r]), 3)
+
+    desc_lines = []
+    for r in (5, 4, 3):
+        if results[r]:
+            desc_lines.append(f"### {RARITY_EMOJI[r]} {r}-Star ×{sum(results[r].values())}")
+            for it, n in results[r].most_common():
+                desc_lines.append(f"> **{it}** ×{n}")
+
+    embed = discord.Embed(
+        title=f"💫 {getattr(user, 'display_name', getattr(user, 'name', 'Player'))}'s {amount} Wish Results",
+        description="\n".join(desc_lines) if desc_lines else "No results (this shouldn't happen).",
+        color=RARITY_COLOR.get(highest, 0xFFFFFF)
+    )
+
+    hard_pity_5 = _banner.config.hard_pity_5
+    remaining = max(0, hard_pity_5 - state["pity_5"])
+    embed.set_footer(text=f"Pity: {state['pity_5']}/{hard_pity_5} • Guaranteed in {remaining} pulls • Total 5★: {state['total_5']}")
+    return embed
+
+def results_embed(user, amount, results, state):
+    if amount > MAX_WISHES_AT_ONCE:
+        return bulk_wish_embed(user, amount, results, state)
+    return wish_embed(user, amount, results, state)
+
+# =====================================================
+# BANNER (hot-reloadable)
+# =====================================================
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), GACHA_CONFIG_FILE)
+
+def _pity_rules(cfg: GachaConfig, fallback_4: str) -> str:
+    return (f"Hard pity at {cfg.hard_pity_5} pulls\n"
+            f"{cfg.special_pull_5}th pull {int(cfg.special_5_chance*100)}% chance for 5★ else {fallback_4}\n"
+            f"4★ guarantee every {cfg.guarantee_4} pulls without 4/5")
+
+def _banner_embed(cfg: GachaConfig) -> discord.Embed:
+    embed = discord.Embed(title=f"✨ {cfg.name}", color=discord.Color.teal())
+    embed.add_field(name="Featured 5★ Items", value="\n".join(cfg.loot_table[5]), inline=False)
+    embed.add_field(name="Featured 4★ Items", value="\n".join(cfg.loot_table[4]), inline=False)
+    embed.add_field(name="5★ Rate", value=f"{cfg.rate_5*100:.2f}%")
+    embed.add_field(name="4★ Rate", value=f"{cfg.rate_4*100:.2f}%")
+    embed.add_field(name="Pity", value=_pity_rules(cfg, "4★"), inline=False)
+    return embed
+
+def _rates_embed(cfg: GachaConfig, odds: gacha_odds.OddsTables) -> discord.Embed:
+    embed = discord.Embed(title="📊 Gacha Rates", color=discord.Color.light_grey())
+    embed.add_field(name="3★ Items", value=f"{cfg.rate_3*100:.2f}%")
+    embed.add_field(name="4★ Items", value=f"{cfg.rate_4*100:.2f}%")
+    embed.add_field(name="5★ Items", value=f"{cfg.rate_5*100:.2f}%")
+    embed.add_field(
+        name="Effective Rates (with pity)",
+        value=f"5★ {odds.rate_5*100:.3f}% • 4★ {odds.rate_4*100:.3f}% • 3★ {odds.rate_3*100:.3f}%\n"
+              f"One 5★ every {odds.mean_pulls_to_5:.1f} pulls on average",
+        inline=False)
+    embed.add_field(name="Pity Rules", value=_pity_rules(cfg, "guaranteed 4★"), inline=False)
+    return embed
+
+def _help_embed() -> discord.Embed:
+    embed = discord.Embed(title="📝 Gacha Commands Help", color=discord.Color.green())
+    commands_info = {
+        "/wish <amount>": f"Perform gacha pulls (1-{MAX_BULK_WISHES}; over {MAX_WISHES_AT_ONCE} shows a summary).",
+        "/pity": "Check your current 5★ pity and total pulls.",
+        "/inventory": "View your inventory items.",
+        "/history [rarity] [since]": "Page through your pulls, optionally by rarity or since a date.",
+        "/pullstats": "See your lifetime pull totals by rarity and item.",
+        "/use <item>": "Use an item from your inventory.",
+        "/leaderboard": "View the top players by total 5★ pulls.",
+        "/banner": "See the current banner and featured items.",
+        "/rates": "Check drop rates, pity rules, and special chances.",
+        "/odds <pulls>": "Your chance of a 5★ within that many pulls.",
+        "/top5stars": "See users with the most 5★ pulls.",
+        "/rank [member]": "See your exact position on the 5★ leaderboard."
+    }
+    for cmd, desc in commands_info.items():
+        embed.add_field(name=cmd, value=desc, inline=False)
+    return embed
+
+class Banner:
+    """
+    Everything derived from one GachaConfig, built once per load: the odds tables and the
+    /banner, /rates and /help embeds, so those handlers just send a cached object.
+    The active Banner is replaced as a whole; code reads `_banner` once and keeps that snapshot.
+    """
+
+    __slots__ = ("config", "odds", "banner_embed", "rates_embed", "help_embed")
+
+    def __init__(self, config: GachaConfig):
+        self.config = config
+        self.odds = gacha_odds.OddsTables(*config.odds_key)
+        self.banner_embed = _banner_embed(config)
+        self.rates_embed = _rates_embed(config, self.odds)
+        self.help_embed = _help_embed()
+
+def build_banner(path: str = CONFIG_PATH) -> Banner:
+    """Load and validate `path` and precompute everything; raises GachaConfigError on a bad file."""
+    banner = Banner(load_config(path))
+    logger.info("Loaded banner '%s' (%s): 5★ %.3f%%, 4★ %.3f%% effective", banner.config.name,
+                banner.config.digest, banner.odds.rate_5 * 100, banner.odds.rate_4 * 100)
+    return banner
+
+_banner = build_banner()
+_reload_lock = asyncio.Lock()
+
+def active_banner() -> Banner:
+    return _banner
+
+async def reload_banner(path: str = CONFIG_PATH):
+    """
+    Build a new banner off the event loop, register its items, then swap it in.
+    On GachaConfigError (or a DB error) the old banner stays active. Returns (old, new).
+    """
+    global _banner
+    async with _reload_lock:
+        new = await asyncio.to_thread(build_banner, path)
+        # Items first: the first wish on the new banner needs their ids in the catalog
+        await sync_item_catalog(new.config)
+        old, _banner = _banner, new
+    return old, new
+
+# =====================================================
+# PAGINATED VIEWS
+# =====================================================
+class KeysetPager(discord.ui.View):
+    """
+    Prev/Next buttons over a keyset-paginated query.
+    - fetch(limit=, after=, before=): rows in display order strictly after / before a cursor
+    - cursor(row): the cursor for a row; only the current page's edge rows are ever used
+    - render(rows, page): the page embed
+    Each page fetches one extra row to know whether there is another page that way.
+    """
+
+    def __init__(self, owner_id: int, fetch, cursor, render, page_size: int = PAGE_SIZE):
+        super().__init__(timeout=PAGE_TIMEOUT)
+        self.owner_id = owner_id
+        self.fetch = fetch
+        self.cursor = cursor
+        self.render = render
+        self.page_size = page_size
+        self.rows = []
+        self.page = 1
+        self.has_prev = False
+        self.has_next = False
+        self.interaction = None
+
+    def _sync_buttons(self):
+        self.prev_button.disabled = not self.has_prev
+        self.next_button.disabled = not self.has_next
+
+    async def _first_page(self):
+        rows = await self.fetch(limit=self.page_size + 1)
+        self.rows, self.page = rows[:self.page_size], 1
+        self.has_prev, self.has_next = False, len(rows) > self.page_size
+
+    async def start(self, interaction: discord.Interaction):
+        await self._first_page()
+        self._sync_buttons()
+        self.interaction = interaction
+        if self.has_next:
+            await interaction.response.send_message(embed=self.render(self.rows, self.page), view=self, ephemeral=True)
+        else:
+            self.stop()   # single page: no buttons
+            await interaction.response.send_message(embed=self.render(self.rows, self.page), ephemeral=True)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.owner_id
+
+    async def _show(self, interaction: discord.Interaction):
+        self._sync_buttons()
+        await interaction.response.edit_message(embed=self.render(self.rows, self.page), view=self)
+
+    @discord.ui.button(label="◀ Prev", style=discord.ButtonStyle.secondary)
+    async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        rows = await self.fetch(limit=self.page_size + 1, before=self.cursor(self.rows[0])) if self.rows else []
+        if not rows:
+            await self._first_page()   # the rows we paged from are gone (items used up): start over
+        else:
+            self.has_prev = len(rows) > self.page_size
+            self.rows, self.page, self.has_next = rows[-self.page_size:], max(1, self.page - 1), True
+        await self._show(interaction)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        rows = await self.fetch(limit=self.page_size + 1, after=self.cursor(self.rows[-1])) if self.rows else []
+        if rows:
+            self.rows, self.page, self.has_prev = rows[:self.page_size], self.page + 1, True
+        self.has_next = len(rows) > self.page_size
+        await self._show(interaction)
+
+    async def on_timeout(self):
+        for child in self.children:
+            child.disabled = True
+        try:
+            await self.interaction.edit_original_response(view=self)
+        except discord.HTTPException:
+            pass
+
+def _parse_since(value: str) -> int:
+    """'YYYY-MM-DD' (UTC) -> unix timestamp; raises ValueError."""
+    day = datetime.datetime.strptime(value.strip(), "%Y-%m-%d")
+    return int(day.replace(tzinfo=datetime.timezone.utc).timestamp())
+
 # =====================================================
 # COG
 # =====================================================
 class GachaCog(commands.Cog):
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        init_db()  # ensure DB/tables exist on cog load
+        self.history = HistoryBuffer()
+        self.names = NameCache()
+
+    async def cog_load(self):
+        await sync_item_catalog()
+        leaderboard.seed(await database.read(_get_all_totals))
+        self.history.committed_id = await database.read(_get_max_history_id)
+        self.history_flusher.start()
+        self.history_compactor.start()
+        metrics.gauge("history_buffer", "pending", lambda: len(self.history))
+        metrics.gauge("history_buffer", "max_lag_s", lambda: round(self.history.max_lag, 3))
+        metrics.gauge("pity_cache", "size", lambda: len(pity_cache._entries))
+        metrics.gauge("pity_cache", "hit_ratio", lambda: round(pity_cache.hits / max(1, pity_cache.hits + pity_cache.misses), 3))
+        metrics.gauge("leaderboard", "players", lambda: len(leaderboard))
+        metrics.gauge("inventory_index", "users", lambda: len(inventory_index))
+
+    async def cog_unload(self):
+        # Also runs on bot shutdown: bot.close() unloads every extension
+        self.history_compactor.cancel()
+        self.history_flusher.cancel()
+        await self.history.flush()
+        logger.info("History buffer drained: %s", self.history.stats())
+
+    @tasks.loop(seconds=HISTORY_FLUSH_INTERVAL)
+    async def history_flusher(self):
+        await self.history.flush()
+
+    @tasks.loop(seconds=HISTORY_COMPACT_INTERVAL)
+    async def history_compactor(self):
+        try:
+            started = time.monotonic()
+            reclaimed = await compact_history()
+            if reclaimed:
+                logger.info("History compaction reclaimed %d row(s) in %.1fs", reclaimed, time.monotonic() - started)
+        except Exception:
+            logger.error("History compaction failed:\n%s", traceback.format_exc())
 
     # -------- WISH (slash) --------
-    @app_commands.command(name="wish", description="Perform gacha pulls (1-10)")
+    @app_commands.command(name="wish", description=f"Perform gacha pulls (1-{MAX_BULK_WISHES})")
     async def slash_wish(self, interaction: discord.Interaction, amount: int = 1):
         # channel restriction
-        if interaction.channel_id != GACHA_CHANNEL_ID:
+        if not guilds.is_gacha_channel(interaction.channel_id):
             return await interaction.response.send_message("Wrong channel.", ephemeral=True)
 
-        amount = max(1, min(amount, MAX_WISHES_AT_ONCE))
+        amount = max(1, min(amount, MAX_BULK_WISHES))
 
         # defer to allow longer ops
         await interaction.response.defer()
 
         try:
-            results, state = await do_wish(interaction.user, amount)
-            embed = wish_embed(interaction.user, amount, results, state)
+            results, state = await do_wish(interaction.guild_id, interaction.user, amount, self.history)
+            embed = results_embed(interaction.user, amount, results, state)
             await interaction.followup.send(embed=embed)
         except Exception as e:
             logger.error("Error handling /wish: %s\n%s", e, traceback.format_exc())
@@ -374,87 +1174,156 @@ class GachaCog(commands.Cog):
     # -------- WISH (text command) --------
     @commands.command(name="wish")
     async def text_wish(self, ctx: commands.Context, amount: int = 1):
-        if ctx.channel.id != GACHA_CHANNEL_ID:
+        if not guilds.is_gacha_channel(ctx.channel.id):
             return await ctx.send("Wrong channel.")
-        amount = max(1, min(amount, MAX_WISHES_AT_ONCE))
+        amount = max(1, min(amount, MAX_BULK_WISHES))
         try:
-            results, state = await do_wish(ctx.author, amount)
-            await ctx.send(embed=wish_embed(ctx.author, amount, results, state))
+            results, state = await do_wish(ctx.guild.id, ctx.author, amount, self.history)
+            await ctx.send(embed=results_embed(ctx.author, amount, results, state))
         except Exception:
             logger.error("Error handling text !wish: %s", traceback.format_exc())
             await ctx.send("❌ An error occurred while processing your wish. Check the bot logs.")
 
     # -------- PITY --------
     @app_commands.command(name="pity", description="Check your 5★ pity and total pulls")
+    @app_commands.guild_only()
     async def slash_pity(self, interaction: discord.Interaction):
-        state = get_pity(interaction.user.id)
+        state = await get_pity(interaction.guild_id, interaction.user.id)
         embed = discord.Embed(title="📊 Pity Status", color=discord.Color.gold())
-        embed.add_field(name="5★ Pity", value=f"{state['pity_5']} / {HARD_PITY_5}", inline=False)
+        embed.add_field(name="5★ Pity", value=f"{state['pity_5']} / {_banner.config.hard_pity_5}", inline=False)
         embed.add_field(name="Total Pulls", value=str(state["total"]), inline=False)
         embed.add_field(name="Total 5★ Obtained", value=str(state["total_5"]), inline=False)
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
     # -------- INVENTORY --------
     @app_commands.command(name="inventory", description="View your inventory items")
+    @app_commands.guild_only()
     async def slash_inventory(self, interaction: discord.Interaction):
-        items = get_inventory(interaction.user.id)
-        embed = discord.Embed(title="🎒 Inventory", color=discord.Color.blue())
-        if not items:
-            embed.description = "Your inventory is empty."
-        else:
-            embed.description = "\n".join(f"**{i}** x{q}" for i, q in items[:20])
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        guild_id, user_id = interaction.guild_id, interaction.user.id
+
+        def render(rows, page):
+            embed = discord.Embed(title="🎒 Inventory", color=discord.Color.blue())
+            if not rows:
+                embed.description = "Your inventory is empty."
+            else:
+                embed.description = "\n".join(f"**{catalog.name(i)}** x{q}" for i, q in rows)
+                embed.set_footer(text=f"Page {page}")
+            return embed
+
+        pager = KeysetPager(
+            user_id,
+            fetch=lambda **kw: get_inventory_page(guild_id, user_id, **kw),
+            cursor=lambda row: (row[1], row[0]),   # (quantity, item_id)
+            render=render)
+        await pager.start(interaction)
 
     # -------- HISTORY --------
     @app_commands.command(name="history", description="See your recent pulls")
-    async def slash_history(self, interaction: discord.Interaction):
-        history = get_history(interaction.user.id)
-        embed = discord.Embed(title="📜 Pull History", color=discord.Color.purple())
-        if not history:
+    @app_commands.guild_only()
+    @app_commands.describe(rarity="Only show pulls of this rarity", since="Only show pulls on or after this date (YYYY-MM-DD, UTC)")
+    async def slash_history(self, interaction: discord.Interaction,
+                            rarity: typing.Optional[typing.Literal[3, 4, 5]] = None, since: typing.Optional[str] = None):
+        since_ts = None
+        if since:
+            try:
+                since_ts = _parse_since(since)
+            except ValueError:
+                return await interaction.response.send_message("❌ `since` must be a date like 2025-01-31.", ephemeral=True)
+        guild_id, user_id = interaction.guild_id, interaction.user.id
+        # Buffered pulls are merged into the pages; one snapshot for the whole pager keeps its cursors stable
+        ceiling, pending = self.history.snapshot(guild_id, user_id)
+        filters = " • ".join(f for f in (f"{rarity}★ only" if rarity else "", f"since {since.strip()}" if since else "") if f)
+
+        def render(rows, page):
+            embed = discord.Embed(title="📜 Pull History", color=discord.Color.purple())
+            if not rows:
+                embed.description = "No matching pulls." if filters else "No pulls yet."
+            else:
+                lines = []
+                for _, item_id, r, ts, count in rows:
+                    qty = f" ×{count}" if count > 1 else ""
+                    lines.append(f"{RARITY_EMOJI.get(r,'')} **{catalog.name(item_id)}**{qty} (<t:{ts}:R>)")
+                embed.description = "\n".join(lines)
+            embed.set_footer(text=" • ".join(p for p in (f"Page {page}", filters) if p))
+            return embed
+
+        pager = KeysetPager(
+            user_id,
+            fetch=lambda **kw: get_history(guild_id, user_id, rarity=rarity, since=since_ts, ceiling=ceiling, pending=pending, **kw),
+            cursor=lambda row: row[0],   # pull_history.id
+            render=render)
+        await pager.start(interaction)
+
+    # -------- PULL STATS --------
+    @app_commands.command(name="pullstats", description="Lifetime pull totals by rarity and item")
+    @app_commands.guild_only()
+    async def slash_pullstats(self, interaction: discord.Interaction):
+        # Still-buffered pulls are counted in memory rather than flushed first
+        ceiling, pending = self.history.snapshot(interaction.guild_id, interaction.user.id)
+        totals = await get_pull_totals(interaction.guild_id, interaction.user.id, ceiling, pending)
+        embed = discord.Embed(title="📈 Lifetime Pulls", color=discord.Color.purple())
+        if not totals:
             embed.description = "No pulls yet."
         else:
-            lines = []
-            for item, rarity, ts in history:
-                lines.append(f"{RARITY_EMOJI.get(rarity,'')} **{item}** (<t:{ts}:R>)")
-            embed.description = "\n".join(lines)
+            by_rarity = {}
+            for rarity, item_id, count in totals:
+                by_rarity.setdefault(rarity, []).append(f"**{catalog.name(item_id)}** ×{count}")
+            for rarity, lines in by_rarity.items():
+                total = sum(c for r, _, c in totals if r == rarity)
+                embed.add_field(name=f"{RARITY_EMOJI.get(rarity, '')} {rarity}-Star ×{total}", value="\n".join(lines), inline=False)
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
     # -------- USE ITEM --------
     @app_commands.command(name="use", description="Use an item from your inventory")
+    @app_commands.guild_only()
     async def slash_use(self, interaction: discord.Interaction, item: str):
-        if remove_inventory(interaction.user.id, item):
+        if await remove_inventory(interaction.guild_id, interaction.user.id, item):
             await interaction.response.send_message(f"✅ Used **{item}**.", ephemeral=True)
         else:
             await interaction.response.send_message("❌ You don't own that item.", ephemeral=True)
 
+    @slash_use.autocomplete("item")
+    async def slash_use_autocomplete(self, interaction: discord.Interaction, current: str):
+        with metrics.timer("command", "/use autocomplete"):
+            try:
+                matches = await asyncio.wait_for(inventory_index.search((interaction.guild_id, interaction.user.id), current), AUTOCOMPLETE_DEADLINE)
+            except asyncio.TimeoutError:
+                return []   # the index keeps loading; the next keystroke will hit it
+            return [app_commands.Choice(name=f"{catalog.name(i)} ×{q}"[:100], value=catalog.name(i)[:100]) for i, q in matches]
+
+    # -------- ODDS --------
+    @app_commands.command(name="odds", description="Chance of a 5★ within N pulls from your current pity")
+    @app_commands.guild_only()
+    async def slash_odds(self, interaction: discord.Interaction, pulls: app_commands.Range[int, 1, 1000]):
+        state = await get_pity(interaction.guild_id, interaction.user.id)
+        banner = _banner
+        chance = banner.odds.chance_5_within(state["pity_5"], state["pity_4"], pulls)
+        hard_pity_5 = banner.config.hard_pity_5
+        remaining = max(0, hard_pity_5 - state["pity_5"])
+        embed = discord.Embed(title="🎲 5★ Odds", color=discord.Color.gold())
+        embed.add_field(name=f"Within {pulls} pull(s)", value=f"**{chance*100:.2f}%**", inline=False)
+        embed.add_field(name="Current Pity", value=f"{state['pity_5']} / {hard_pity_5} (guaranteed in {remaining})", inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
     # -------- HELP --------
     @app_commands.command(name="help", description="Show all Gacha commands")
     async def slash_help(self, interaction: discord.Interaction):
-        embed = discord.Embed(title="📝 Gacha Commands Help", color=discord.Color.green())
-        commands_info = {
-            "/wish <amount>": "Perform a gacha pull (1-10 at a time).",
-            "/pity": "Check your current 5★ pity and total pulls.",
-            "/inventory": "View your inventory items.",
-            "/history": "See your most recent pulls (last 20).",
-            "/use <item>": "Use an item from your inventory.",
-            "/leaderboard": "View the top players by total 5★ pulls.",
-            "/banner": "See the current banner and featured items.",
-            "/rates": "Check drop rates, pity rules, and special chances.",
-            "/top5stars": "See users with the most 5★ pulls."
-        }
-        for cmd, desc in commands_info.items():
-            embed.add_field(name=cmd, value=desc, inline=False)
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.response.send_message(embed=_banner.help_embed, ephemeral=True)
 
     # -------- SET PITY (MODERATOR ONLY) --------
     @app_commands.command(name="setpity", description="Set a user's 5★ pity and total pulls (Mods only)")
-    @app_commands.checks.has_any_role(*MODERATOR_ROLE_IDS)
+    @is_guild_moderator()
     async def slash_setpity(self, interaction: discord.Interaction, member: discord.Member, pity: int, total: int):
         if pity < 0 or total < 0:
             return await interaction.response.send_message("❌ Pity and total pulls must be 0 or higher.", ephemeral=True)
 
-        current = get_pity(member.id)
-        save_pity(member.id, pity, current["pity_4"], total, current["total_5"])
+        player = (interaction.guild_id, member.id)
+        async with pity_cache.lock(player):
+            current = await pity_cache.load(player)
+            saved = await save_pity(*player, pity, current["pity_4"], total, current["total_5"])
+        if not saved:
+            return await interaction.response.send_message(
+                f"❌ Couldn't save {member.display_name}'s pity; nothing was changed. Please try again.", ephemeral=True)
         await interaction.response.send_message(f"✅ {member.display_name}'s pity set to {pity} and total pulls to {total}.", ephemeral=True)
 
     @slash_setpity.error
@@ -465,45 +1334,82 @@ class GachaCog(commands.Cog):
             await interaction.response.send_message(f"❌ An error occurred: {error}", ephemeral=True)
 
     # -------- LEADERBOARD --------
-    @app_commands.command(name="leaderboard", description="Top players by total 5★ pulls")
-    async def slash_leaderboard(self, interaction: discord.Interaction):
-        with db() as conn:
-            rows = conn.execute("SELECT user_id, total_5_stars FROM pity ORDER BY total_5_stars DESC LIMIT 10").fetchall()
+    async def _send_leaderboard(self, interaction: discord.Interaction):
+        rows = leaderboard[interaction.guild_id].top(10)
         embed = discord.Embed(title="🏆 5★ Pull Leaderboard", color=discord.Color.gold())
         if not rows:
             embed.description = "No data yet."
         else:
+            names = await self.names.resolve(self.bot, interaction.guild, [uid for uid, _ in rows])
             for idx, (uid, pulls) in enumerate(rows, 1):
-                user = self.bot.get_user(uid)
-                name = getattr(user, "display_name", f"User {uid}") if user else f"User {uid}"
-                embed.add_field(name=f"{idx}. {name}", value=f"{pulls} 5★ pulls", inline=False)
+                embed.add_field(name=f"{idx}. {names[uid]}", value=f"{pulls} 5★ pulls", inline=False)
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
+    @app_commands.command(name="leaderboard", description="Top players by total 5★ pulls")
+    @app_commands.guild_only()
+    async def slash_leaderboard(self, interaction: discord.Interaction):
+        await self._send_leaderboard(interaction)
+
     # -------- TOP 5★ USERS (alias) --------
     @app_commands.command(name="top5stars", description="Users with the most 5★ pulls")
+    @app_commands.guild_only()
     async def slash_top5stars(self, interaction: discord.Interaction):
-        await self.slash_leaderboard(interaction)  # Alias
+        await self._send_leaderboard(interaction)  # Alias
+
+    # -------- RANK --------
+    @app_commands.command(name="rank", description="See your position on the 5★ leaderboard")
+    @app_commands.guild_only()
+    async def slash_rank(self, interaction: discord.Interaction, member: typing.Optional[discord.Member] = None):
+        target = member or interaction.user
+        board = leaderboard[interaction.guild_id]
+        ranked = board.rank(target.id)
+        if ranked is None:
+            return await interaction.response.send_message(f"{target.display_name} hasn't wished yet.", ephemeral=True)
+        position, total_5 = ranked
+        await interaction.response.send_message(
+            f"🏅 {target.display_name} is **#{position}** of {len(board)} with {total_5} 5★ pulls.", ephemeral=True)
 
     # -------- BANNER --------
     @app_commands.command(name="banner", description="See current banner info")
     async def slash_banner(self, interaction: discord.Interaction):
-        embed = discord.Embed(title="✨ Current Banner", color=discord.Color.teal())
-        embed.add_field(name="Featured 5★ Items", value="\n".join(LOOT_TABLE[5]), inline=False)
-        embed.add_field(name="Featured 4★ Items", value="\n".join(LOOT_TABLE[4]), inline=False)
-        embed.add_field(name="5★ Rate", value=f"{RATE_5_STAR*100:.2f}%")
-        embed.add_field(name="4★ Rate", value=f"{RATE_4_STAR*100:.2f}%")
-        embed.add_field(name="Pity", value=f"Hard pity at {HARD_PITY_5} pulls\n30th pull {int(SPECIAL_30_CHANCE*100)}% chance for 5★ else 4★\n4★ guarantee every 10 pulls without 4/5", inline=False)
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.response.send_message(embed=_banner.banner_embed, ephemeral=True)
 
     # -------- RATES --------
     @app_commands.command(name="rates", description="Check drop rates and pity info")
     async def slash_rates(self, interaction: discord.Interaction):
-        embed = discord.Embed(title="📊 Gacha Rates", color=discord.Color.light_grey())
-        embed.add_field(name="3★ Items", value=f"{(1 - RATE_5_STAR - RATE_4_STAR)*100:.2f}%")
-        embed.add_field(name="4★ Items", value=f"{RATE_4_STAR*100:.2f}%")
-        embed.add_field(name="5★ Items", value=f"{RATE_5_STAR*100:.2f}%")
-        embed.add_field(name="Pity Rules", value=f"Hard pity at {HARD_PITY_5} pulls\n30th pull {int(SPECIAL_30_CHANCE*100)}% chance for 5★ else guaranteed 4★\n4★ guarantee every 10 pulls without 4/5", inline=False)
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.response.send_message(embed=_banner.rates_embed, ephemeral=True)
+
+    # -------- RELOAD BANNER (MODERATOR ONLY) --------
+    @app_commands.command(name="reloadgacha", description="Reload rates, pity rules and the loot table from the banner file (Mods only)")
+    @is_guild_moderator()
+    async def slash_reloadgacha(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        try:
+            old, new = await reload_banner()
+        except GachaConfigError as e:
+            return await interaction.followup.send(
+                f"❌ Banner file rejected, still running `{_banner.config.digest}`:\n{e}", ephemeral=True)
+        except Exception:
+            logger.error("Banner reload failed:\n%s", traceback.format_exc())
+            return await interaction.followup.send("❌ Banner reload failed; the old banner is still active. Check the bot logs.", ephemeral=True)
+
+        cfg = new.config
+        old_items = {i for pool in old.config.loot_table.values() for i in pool}
+        new_items = {i for pool in cfg.loot_table.values() for i in pool}
+        added, removed = len(new_items - old_items), len(old_items - new_items)
+        logger.info("Banner reloaded by %s: %s -> %s", interaction.user, old.config.digest, cfg.digest)
+        await interaction.followup.send(
+            f"✅ Loaded **{cfg.name}** (`{old.config.digest}` → `{cfg.digest}`)\n"
+            f"5★ {cfg.rate_5*100:.2f}% • 4★ {cfg.rate_4*100:.2f}% • hard pity {cfg.hard_pity_5} • "
+            f"effective 5★ {new.odds.rate_5*100:.3f}%\n"
+            f"Items: {len(new_items)} (+{added} / -{removed})", ephemeral=True)
+
+    @slash_reloadgacha.error
+    async def slash_reloadgacha_error(self, interaction: discord.Interaction, error):
+        if isinstance(error, app_commands.errors.MissingAnyRole):
+            await interaction.response.send_message("❌ You do not have permission to use this command.", ephemeral=True)
+        else:
+            logger.error("Error handling /reloadgacha: %s", error)
 
 # =====================================================
 # SETUP
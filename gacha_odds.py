@@ -0,0 +1,84 @@
+# gacha_odds.py — exact pity odds from the (pity_5, pity_4) Markov chain
+# roll_rarity only looks at the two pity counters, so every question about "what are my chances"
+# can be answered exactly with a small table instead of simulation. Pure Python, builds in ~ms.
+
+class OddsTables:
+    """
+    Precomputed tables for one set of banner parameters.
+    States are the pity counters *before* a pull: pity_5 in [0, hard_pity_5), pity_4 in [0, guarantee_4).
+    - chance_5_within(pity_5, pity_4, pulls): P(at least one 5★ in the next `pulls` pulls)
+    - rate_5 / rate_4 / rate_3: long-run share of pulls landing each rarity, pity included
+    - mean_pulls_to_5: average pulls between 5★ (from zero pity)
+    """
+
+    def __init__(self, rate_5: float, rate_4: float, hard_pity_5: int, special_pull: int,
+                 special_chance: float, guarantee_4: int):
+        self.key = (rate_5, rate_4, hard_pity_5, special_pull, special_chance, guarantee_4)
+        self.hard_pity_5 = hard_pity_5
+        self.guarantee_4 = guarantee_4
+        n_states = hard_pity_5 * guarantee_4
+
+        # transitions[s] = (p_5, p_4, next state after a 4★, p_3, next state after a 3★)
+        transitions = [None] * n_states
+        for p5 in range(hard_pity_5):
+            for p4 in range(guarantee_4):
+                a, b = p5 + 1, p4 + 1      # single_pull increments before rolling
+                if a >= hard_pity_5:
+                    t = (1.0, 0.0, None, 0.0, None)
+                elif a == special_pull:
+                    t = (special_chance, 1.0 - special_chance, self._index(a, 0), 0.0, None)
+                elif b >= guarantee_4:
+                    t = (0.0, 1.0, self._index(a, 0), 0.0, None)
+                else:
+                    t = (rate_5, rate_4, self._index(a, 0), 1.0 - rate_5 - rate_4, self._index(a, b))
+                transitions[self._index(p5, p4)] = t
+
+        # at_least_one_5[n][s]: chance of a 5★ within n pulls from s. From any state a 5★ is
+        # certain within hard_pity_5 pulls, so rows stop there.
+        rows = [[0.0] * n_states]
+        for _ in range(hard_pity_5):
+            prev = rows[-1]
+            row = [0.0] * n_states
+            for s, (q5, q4, t4, q3, t3) in enumerate(transitions):
+                p = q5
+                if q4:
+                    p += q4 * prev[t4]
+                if q3:
+                    p += q3 * prev[t3]
+                row[s] = p
+            rows.append(row)
+        self.at_least_one_5 = rows
+
+        # Renewal view: every 5★ returns the chain to (0, 0). Successor states always have a
+        # higher pity_5, so expected values can be filled in from the top of the chain down.
+        pulls = [0.0] * n_states    # expected pulls up to and including the next 5★
+        fours = [0.0] * n_states    # expected 4★ before the next 5★
+        for p5 in reversed(range(hard_pity_5)):
+            for p4 in range(guarantee_4):
+                s = self._index(p5, p4)
+                q5, q4, t4, q3, t3 = transitions[s]
+                e_pulls, e_fours = 1.0, 0.0
+                if q4:
+                    e_pulls += q4 * pulls[t4]
+                    e_fours += q4 * (1.0 + fours[t4])
+                if q3:
+                    e_pulls += q3 * pulls[t3]
+                    e_fours += q3 * fours[t3]
+                pulls[s], fours[s] = e_pulls, e_fours
+
+        self.mean_pulls_to_5 = pulls[0]
+        self.rate_5 = 1.0 / pulls[0]
+        self.rate_4 = fours[0] / pulls[0]
+        self.rate_3 = 1.0 - self.rate_5 - self.rate_4
+
+    def _index(self, pity_5: int, pity_4: int) -> int:
+        return pity_5 * self.guarantee_4 + pity_4
+
+    def chance_5_within(self, pity_5: int, pity_4: int, pulls: int) -> float:
+        if pulls <= 0:
+            return 0.0
+        if pulls >= self.hard_pity_5:
+            return 1.0
+        # Out-of-range counters (e.g. set by /setpity) behave like the last state they saturate to
+        s = self._index(min(max(pity_5, 0), self.hard_pity_5 - 1), min(max(pity_4, 0), self.guarantee_4 - 1))
+        return self.at_least_one_5[pulls][s]
@@ -0,0 +1,211 @@
+# gacha_sim.py — vectorized Monte Carlo simulator for the gacha pity system
+# Runs many independent pull sequences at once with the exact roll_rarity / single_pull rules
+# from gacha_main and the banner config (gacha_banner.json), and reports what players actually get.
+#
+#   python gacha_sim.py --sequences 1000000 --pulls 100 --seed 1
+#   python gacha_sim.py --config next_banner.json   # try a banner file before /reloadgacha
+#   python gacha_sim.py --parity          # check against the scalar implementation
+#
+# Needs numpy (pip install -r requirements-dev.txt). The bot itself does not.
+
+import argparse
+import math
+import random
+import sys
+import time
+from unittest import mock
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("gacha_sim needs numpy: pip install -r requirements-dev.txt")
+
+import gacha_main as gacha
+from gacha_config import GachaConfig, GachaConfigError, load_config
+
+RARITIES = (3, 4, 5)
+
+# =====================================================
+# SIMULATION
+# =====================================================
+def _roll(pity_5, pity_4, r, cfg: GachaConfig):
+    """Vectorized roll_rarity. Counters are already incremented for this pull, like single_pull."""
+    normal = np.where(r < cfg.threshold_5, 5, np.where(r < cfg.threshold_4, 4, 3))
+    rarity = np.where(pity_4 >= cfg.guarantee_4, 4, normal)
+    rarity = np.where(pity_5 == cfg.special_pull_5, np.where(r < cfg.special_5_chance, 5, 4), rarity)
+    return np.where(pity_5 >= cfg.hard_pity_5, 5, rarity)
+
+class SimResult:
+    def __init__(self, cfg: GachaConfig):
+        self.config = cfg
+        self.pulls = 0
+        self.sequences = 0
+        self.rarity_counts = {r: 0 for r in RARITIES}
+        self.item_counts = {r: np.zeros(len(cfg.loot_table[r]), dtype=np.int64) for r in RARITIES}
+        # pulls_to_5[n] = how many 5★ landed exactly n pulls after the previous one (or the start)
+        self.pulls_to_5 = np.zeros(cfg.hard_pity_5 + 1, dtype=np.int64)
+
+    def rate(self, rarity: int) -> float:
+        return self.rarity_counts[rarity] / self.pulls if self.pulls else 0.0
+
+    def mean_pulls_to_5(self) -> float:
+        n = self.pulls_to_5.sum()
+        return float((np.arange(len(self.pulls_to_5)) * self.pulls_to_5).sum() / n) if n else float("nan")
+
+    def pulls_to_5_percentile(self, q: float) -> int:
+        cdf = np.cumsum(self.pulls_to_5)
+        return int(np.searchsorted(cdf, q * cdf[-1])) if cdf[-1] else 0
+
+def simulate(sequences: int, pulls: int, batch: int = 100_000, seed: int = None, config: GachaConfig = None) -> SimResult:
+    """Run `sequences` independent players from zero pity for `pulls` pulls each, `batch` at a time."""
+    cfg = config or gacha.active_banner().config
+    rng = np.random.default_rng(seed)
+    result = SimResult(cfg)
+    sizes = {r: len(cfg.loot_table[r]) for r in RARITIES}
+
+    remaining = sequences
+    while remaining > 0:
+        n = min(batch, remaining)
+        remaining -= n
+        pity_5 = np.zeros(n, dtype=np.int32)
+        pity_4 = np.zeros(n, dtype=np.int32)
+        for _ in range(pulls):
+            pity_5 += 1
+            pity_4 += 1
+            rarity = _roll(pity_5, pity_4, rng.random(n), cfg)
+            pick = rng.random(n)
+            for r in RARITIES:
+                hit = rarity == r
+                count = int(np.count_nonzero(hit))
+                result.rarity_counts[r] += count
+                if count:
+                    # random.choice(loot_table[r]) is uniform over the pool
+                    idx = (pick[hit] * sizes[r]).astype(np.int64)
+                    result.item_counts[r] += np.bincount(idx, minlength=sizes[r])
+            is_5 = rarity == 5
+            result.pulls_to_5 += np.bincount(pity_5[is_5], minlength=len(result.pulls_to_5))
+            pity_5[is_5] = 0
+            pity_4[is_5 | (rarity == 4)] = 0
+        result.pulls += n * pulls
+        result.sequences += n
+    return result
+
+# =====================================================
+# PARITY WITH THE SCALAR IMPLEMENTATION
+# =====================================================
+def simulate_scalar(sequences: int, pulls: int, seed: int = None, config: GachaConfig = None) -> SimResult:
+    """The same experiment through gacha_main.single_pull itself (slow; used for parity)."""
+    cfg = config or gacha.active_banner().config
+    random.seed(seed)
+    result = SimResult(cfg)
+    index = {r: {item: i for i, item in enumerate(cfg.loot_table[r])} for r in RARITIES}
+    for _ in range(sequences):
+        state = {"pity_5": 0, "pity_4": 0, "total": 0, "total_5": 0}
+        last_5 = 0
+        for _ in range(pulls):
+            rarity, item = gacha.single_pull(state, cfg)
+            result.rarity_counts[rarity] += 1
+            result.item_counts[rarity][index[rarity][item]] += 1
+            if rarity == 5:
+                # single_pull already reset pity_5, so measure the gap on the running total
+                result.pulls_to_5[state["total"] - last_5] += 1
+                last_5 = state["total"]
+        result.pulls += pulls
+        result.sequences += 1
+    return result
+
+def check_rule_parity(config: GachaConfig = None) -> int:
+    """
+    Feed roll_rarity and _roll the same random number for every reachable (pity_5, pity_4)
+    and compare. Returns the number of mismatches (0 = identical rules).
+    """
+    cfg = config or gacha.active_banner().config
+    thresholds = [cfg.threshold_5, cfg.threshold_4, cfg.special_5_chance]
+    draws = sorted({0.0, 0.999999} | {t + d for t in thresholds for d in (-1e-9, 0.0, 1e-9) if 0 <= t + d < 1})
+    mismatches = 0
+    for p5 in range(1, cfg.hard_pity_5 + 2):
+        for p4 in range(1, min(p5, cfg.guarantee_4 + 1) + 1):
+            for r in draws:
+                with mock.patch.object(gacha.random, "random", return_value=r):
+                    expected = gacha.roll_rarity({"pity_5": p5, "pity_4": p4}, cfg)
+                got = int(_roll(np.array([p5]), np.array([p4]), np.array([r]), cfg)[0])
+                if got != expected:
+                    mismatches += 1
+                    print(f"  mismatch at pity_5={p5} pity_4={p4} r={r}: scalar {expected}, vectorized {got}")
+    return mismatches
+
+def check_statistical_parity(sequences: int, pulls: int, seed: int = None, sigmas: float = 4.0,
+                             config: GachaConfig = None) -> int:
+    """Compare rarity rates of both implementations; each must agree within `sigmas` standard errors."""
+    vec = simulate(sequences, pulls, seed=seed, config=config)
+    ref = simulate_scalar(sequences, pulls, seed=seed, config=config)
+    failures = 0
+    for r in RARITIES:
+        a, b = vec.rate(r), ref.rate(r)
+        p = (a + b) / 2
+        se = math.sqrt(max(p * (1 - p), 1e-12) * (1 / vec.pulls + 1 / ref.pulls))
+        ok = abs(a - b) <= sigmas * se
+        failures += not ok
+        print(f"  {r}★ vectorized {a:.5f}  scalar {b:.5f}  |Δ|={abs(a - b):.5f}  ({'ok' if ok else 'FAIL'})")
+    return failures
+
+# =====================================================
+# REPORT / CLI
+# =====================================================
+def report(result: SimResult, elapsed: float = None):
+    print(f"Sequences: {result.sequences:,}  pulls/sequence: {result.pulls // max(result.sequences, 1):,}  total pulls: {result.pulls:,}")
+    if elapsed:
+        print(f"Elapsed: {elapsed:.2f}s ({result.pulls / elapsed:,.0f} pulls/s)")
+    cfg = result.config
+    print("\nConsolidated rates (nominal in brackets):")
+    nominal = {5: cfg.rate_5, 4: cfg.rate_4, 3: cfg.rate_3}
+    for r in (5, 4, 3):
+        print(f"  {r}★ {result.rate(r) * 100:7.3f}%  [{nominal[r] * 100:.3f}%]")
+
+    print("\nPulls to 5★:")
+    print(f"  mean {result.mean_pulls_to_5():.2f}  p50 {result.pulls_to_5_percentile(0.5)}"
+          f"  p90 {result.pulls_to_5_percentile(0.9)}  p99 {result.pulls_to_5_percentile(0.99)}")
+    total_5 = result.pulls_to_5.sum()
+    if total_5:
+        for n in np.nonzero(result.pulls_to_5)[0]:
+            share = result.pulls_to_5[n] / total_5
+            if share >= 0.005:
+                print(f"  {n:3d} pulls  {share * 100:6.2f}%  {'#' * int(share * 100)}")
+
+    print("\nItem yields (per 1,000 pulls):")
+    for r in (5, 4, 3):
+        for item, count in zip(cfg.loot_table[r], result.item_counts[r]):
+            print(f"  {r}★ {item:<40} {count / result.pulls * 1000:8.3f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo simulator for the gacha pity system")
+    parser.add_argument("--sequences", type=int, default=1_000_000, help="independent players to simulate")
+    parser.add_argument("--pulls", type=int, default=100, help="pulls per player, starting from zero pity")
+    parser.add_argument("--batch", type=int, default=100_000, help="players simulated together per batch")
+    parser.add_argument("--seed", type=int, default=None, help="RNG seed for reproducible runs")
+    parser.add_argument("--parity", action="store_true", help="check against the scalar single_pull and exit")
+    parser.add_argument("--config", metavar="FILE", help="banner file to simulate (default: the bot's own)")
+    args = parser.parse_args(argv)
+
+    try:
+        config = load_config(args.config) if args.config else gacha.active_banner().config
+    except GachaConfigError as e:
+        print(f"Invalid banner file: {e}")
+        return 2
+    print(f"Banner: {config.name} ({config.digest})")
+
+    if args.parity:
+        print("Rule parity (roll_rarity vs vectorized, every pity state):")
+        failures = check_rule_parity(config)
+        print(f"  {failures} mismatch(es)")
+        print("Statistical parity:")
+        failures += check_statistical_parity(min(args.sequences, 20_000), args.pulls, seed=args.seed, config=config)
+        return 1 if failures else 0
+
+    start = time.perf_counter()
+    result = simulate(args.sequences, args.pulls, batch=args.batch, seed=args.seed, config=config)
+    report(result, time.perf_counter() - start)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
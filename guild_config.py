@@ -0,0 +1,189 @@
+# guild_config.py — per-guild channels and roles, loaded from a data file (guilds.json)
+# One deployment serves many guilds, so nothing channel- or role-specific lives in module constants.
+# Everything is indexed in memory once at startup: channel ids are global snowflakes, so a single
+# dict lookup on the channel tells a handler whether it cares and which guild's settings apply.
+
+import json
+import os
+import time
+from collections import OrderedDict
+
+import discord
+from discord import app_commands
+
+from bot_config import GUILD_CONFIG_FILE, MEMBER_ROLE_TTL, MEMBER_ROLE_CACHE_SIZE
+
+class GuildConfigError(ValueError):
+    """The guild file is missing, malformed, or assigns one channel to two roles/guilds."""
+
+class GuildConfig:
+    """
+    Settings for one guild.
+    - gacha_channel_ids: where /wish and $$wish are allowed
+    - xp_routes: {input channel id: output channel id} for XP submissions
+    - approver_role_ids / moderator_role_ids / afk_role_id: role checks for this guild only
+    """
+
+    __slots__ = ("guild_id", "name", "gacha_channel_ids", "xp_routes", "approver_role_ids",
+                 "moderator_role_ids", "afk_role_id")
+
+    def __init__(self, guild_id: int, name: str, gacha_channel_ids, xp_routes: dict, approver_role_ids,
+                 moderator_role_ids, afk_role_id: int = None):
+        self.guild_id = guild_id
+        self.name = name
+        self.gacha_channel_ids = frozenset(gacha_channel_ids)
+        self.xp_routes = dict(xp_routes)
+        self.approver_role_ids = frozenset(approver_role_ids)
+        self.moderator_role_ids = frozenset(moderator_role_ids)
+        self.afk_role_id = afk_role_id
+
+class GuildRegistry:
+    """
+    In-memory lookup over every configured guild.
+    - get(guild_id) / for_channel(channel_id): the owning GuildConfig, or None
+    - is_gacha_channel(channel_id), xp_output(input_channel_id): the hot-path checks, one dict/set hit each
+    """
+
+    def __init__(self, configs=()):
+        self.replace(configs)
+
+    def replace(self, configs):
+        by_id, by_channel, gacha, routes = {}, {}, set(), {}
+        for cfg in configs:
+            by_id[cfg.guild_id] = cfg
+            for channel_id in (*cfg.gacha_channel_ids, *cfg.xp_routes, *cfg.xp_routes.values()):
+                by_channel[channel_id] = cfg
+            gacha |= cfg.gacha_channel_ids
+            routes.update(cfg.xp_routes)
+        # Swap whole maps so readers never see a half-built registry
+        self._by_id, self._by_channel, self._gacha, self._routes = by_id, by_channel, frozenset(gacha), routes
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def get(self, guild_id: int):
+        return self._by_id.get(guild_id)
+
+    def for_channel(self, channel_id: int):
+        return self._by_channel.get(channel_id)
+
+    def is_gacha_channel(self, channel_id: int) -> bool:
+        return channel_id in self._gacha
+
+    def xp_output(self, input_channel_id: int):
+        return self._routes.get(input_channel_id)
+
+def _id(value, where: str) -> int:
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        raise GuildConfigError(f"{where} must be a Discord id (positive integer), got {value!r}")
+    return value
+
+def _ids(raw: dict, key: str, where: str) -> list:
+    values = raw.get(key, [])
+    if not isinstance(values, list):
+        raise GuildConfigError(f"{where}.{key} must be a list of ids")
+    return [_id(v, f"{where}.{key}") for v in values]
+
+def parse_guild_config(raw) -> list:
+    if not isinstance(raw, dict) or not isinstance(raw.get("guilds"), list):
+        raise GuildConfigError("the guild file must be an object with a 'guilds' list")
+    configs, owners = [], {}
+    for n, entry in enumerate(raw["guilds"]):
+        where = f"guilds[{n}]"
+        if not isinstance(entry, dict):
+            raise GuildConfigError(f"{where} must be an object")
+        guild_id = _id(entry.get("guild_id"), f"{where}.guild_id")
+        if any(c.guild_id == guild_id for c in configs):
+            raise GuildConfigError(f"guild {guild_id} is listed twice")
+        routes = {}
+        for r, route in enumerate(entry.get("xp_channels", [])):
+            if not isinstance(route, dict):
+                raise GuildConfigError(f"{where}.xp_channels[{r}] must be an object with 'input' and 'output'")
+            routes[_id(route.get("input"), f"{where}.xp_channels[{r}].input")] = _id(route.get("output"), f"{where}.xp_channels[{r}].output")
+        afk = entry.get("afk_role_id")
+        cfg = GuildConfig(
+            guild_id, str(entry.get("name", guild_id)), _ids(entry, "gacha_channel_ids", where), routes,
+            _ids(entry, "approver_role_ids", where), _ids(entry, "moderator_role_ids", where),
+            _id(afk, f"{where}.afk_role_id") if afk is not None else None)
+        # A channel id is global: it can only belong to one guild
+        for channel_id in {*cfg.gacha_channel_ids, *routes}:
+            if channel_id in owners and owners[channel_id] != guild_id:
+                raise GuildConfigError(f"channel {channel_id} is configured for guilds {owners[channel_id]} and {guild_id}")
+            owners[channel_id] = guild_id
+        configs.append(cfg)
+    return configs
+
+def load_guild_config(path: str) -> list:
+    try:
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+    except OSError as e:
+        raise GuildConfigError(f"can't read {path}: {e.strerror}") from None
+    except json.JSONDecodeError as e:
+        raise GuildConfigError(f"{path} is not valid JSON: {e}") from None
+    return parse_guild_config(raw)
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), GUILD_CONFIG_FILE)
+
+# Shared registry used by every cog
+guilds = GuildRegistry(load_guild_config(CONFIG_PATH))
+
+# =====================================================
+# CHECKS
+# =====================================================
+def has_role_in(member, role_ids) -> bool:
+    return any(r.id in role_ids for r in getattr(member, "roles", ()))
+
+class MemberRoleCache:
+    """
+    Role ids for role checks when members aren't cached (LEAN_MEMBER_CACHE).
+    Messages, reactions and interactions already carry the member's roles, so a Member is answered
+    from its payload; only a bare User (no member data) costs one fetch_member, then reused for `ttl` seconds.
+    """
+
+    def __init__(self, ttl: float = MEMBER_ROLE_TTL, capacity: int = MEMBER_ROLE_CACHE_SIZE):
+        self.ttl = ttl
+        self.capacity = max(1, capacity)
+        self._entries = OrderedDict()   # (guild_id, user_id) -> (frozenset of role ids, expires_at)
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def role_ids(self, guild, user) -> frozenset:
+        roles = getattr(user, "roles", None)
+        if roles is not None:
+            return frozenset(r.id for r in roles)
+        if guild is None:
+            return frozenset()
+        key = (guild.id, user.id)
+        now = time.monotonic()
+        cached = self._entries.get(key)
+        if cached and cached[1] > now:
+            self._entries.move_to_end(key)
+            return cached[0]
+        try:
+            member = await guild.fetch_member(user.id)
+        except discord.HTTPException:
+            return frozenset()   # left the guild (or Discord hiccup): holds no roles here
+        ids = frozenset(r.id for r in member.roles)
+        self._entries[key] = (ids, now + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        return ids
+
+# Shared by every cog
+member_roles = MemberRoleCache()
+
+def is_guild_moderator():
+    """app_commands check: the user holds one of *this* guild's moderator roles."""
+    def predicate(interaction) -> bool:
+        cfg = guilds.get(interaction.guild_id)
+        if cfg is not None and has_role_in(interaction.user, cfg.moderator_role_ids):
+            return True
+        # Same error as has_any_role, so existing MissingAnyRole handlers keep working
+        raise app_commands.MissingAnyRole(sorted(cfg.moderator_role_ids) if cfg else [])
+    return app_commands.check(predicate)
@@ -0,0 +1,139 @@
+# metrics.py — lightweight in-process instrumentation
+# Fixed-bucket latency histograms, counters and gauge callbacks, cheap enough to leave on in
+# production (one bisect + a few adds per observation). Read by /botstats and, optionally,
+# exported as a Prometheus text file (see bot_stats.py).
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds; the last bucket is +Inf
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "max", "_lock")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()   # DB timings arrive from worker threads
+
+    def observe(self, seconds: float):
+        i = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile, capped at the observed max."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+class Metrics:
+    """
+    - observe(family, label, seconds): latency histograms, e.g. ("command", "/wish")
+    - inc(family, label): counters, e.g. ("rest", "POST /channels/{channel_id}/messages")
+    - gauge(family, label, fn): values sampled when read, e.g. queue depths
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.started = time.time()
+
+    def histogram(self, family: str, label: str) -> Histogram:
+        key = (family, label)
+        hist = self.histograms.get(key)
+        if hist is None:
+            hist = self.histograms.setdefault(key, Histogram())
+        return hist
+
+    def observe(self, family: str, label: str, seconds: float):
+        self.histogram(family, label).observe(seconds)
+
+    def inc(self, family: str, label: str, n: int = 1):
+        key = (family, label)
+        self.counters[key] = self.counters.get(key, 0) + n
+
+    def gauge(self, family: str, label: str, fn):
+        self.gauges[(family, label)] = fn
+
+    @contextmanager
+    def timer(self, family: str, label: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(family, label, time.perf_counter() - start)
+
+    def family(self, family: str) -> dict:
+        return {label: hist for (fam, label), hist in self.histograms.items() if fam == family}
+
+    # ---------- Prometheus text format ----------
+    def render_prometheus(self) -> str:
+        def esc(value: str) -> str:
+            return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+        lines = []
+        families = sorted({fam for fam, _ in self.histograms})
+        for fam in families:
+            name = f"bot_{fam}_seconds"
+            lines.append(f"# TYPE {name} histogram")
+            for label, hist in sorted(self.family(fam).items()):
+                cumulative = 0
+                for bound, n in zip(BUCKETS + (float("inf"),), list(hist.counts)):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{name}_bucket{{name="{esc(label)}",le="{le}"}} {cumulative}')
+                lines.append(f'{name}_sum{{name="{esc(label)}"}} {hist.total}')
+                lines.append(f'{name}_count{{name="{esc(label)}"}} {hist.count}')
+
+        for fam in sorted({fam for fam, _ in self.counters}):
+            name = f"bot_{fam}_total"
+            lines.append(f"# TYPE {name} counter")
+            for (f, label), value in sorted(self.counters.items()):
+                if f == fam:
+                    lines.append(f'{name}{{name="{esc(label)}"}} {value}')
+
+        for fam in sorted({fam for fam, _ in self.gauges}):
+            name = f"bot_{fam}"
+            lines.append(f"# TYPE {name} gauge")
+            for (f, label), fn in sorted(self.gauges.items()):
+                if f == fam:
+                    try:
+                        lines.append(f'{name}{{name="{esc(label)}"}} {float(fn())}')
+                    except Exception:
+                        pass
+
+        lines.append("# TYPE bot_uptime_seconds gauge")
+        lines.append(f"bot_uptime_seconds {time.time() - self.started}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Atomic write so a scraper (e.g. node_exporter's textfile collector) never reads half a file."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp, path)
+
+# Shared instance
+metrics = Metrics()
@@ -0,0 +1,409 @@
+# migrations.py — versioned schema for the bot database
+# Run once at startup (bot.py). The applied version is stored in PRAGMA user_version;
+# each migration runs in its own transaction together with the version bump.
+# To change the schema, append a new (version, description, function) entry — never edit old ones.
+
+import logging
+import sqlite3
+
+from bot_config import DB_NAME, LEGACY_GUILD_ID
+from database import transaction
+
+logger = logging.getLogger("migrations")
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> list:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info('{table}')")]
+
+# =====================================================
+# MIGRATIONS
+# =====================================================
+PITY_COLUMNS = ["user_id", "pity_5_star", "pity_4_star", "total_pulls", "total_5_stars"]
+
+def _v1_base_schema(conn: sqlite3.Connection):
+    """
+    Create the base tables, and rebuild any older `pity` layout (e.g. the stray `pity_count`
+    column, or a missing `total_5_stars`) into the canonical one.
+    """
+    old_cols = _table_columns(conn, "pity")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS pity_v1 (
+            user_id INTEGER PRIMARY KEY,
+            pity_5_star INTEGER NOT NULL DEFAULT 0,
+            pity_4_star INTEGER NOT NULL DEFAULT 0,
+            total_pulls INTEGER NOT NULL DEFAULT 0,
+            total_5_stars INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    if old_cols:
+        def source(col):
+            if col in old_cols:
+                return col if col == "user_id" else f"COALESCE({col}, 0)"
+            # The oldest schema kept the 5★ counter in pity_count
+            if col == "pity_5_star" and "pity_count" in old_cols:
+                return "COALESCE(pity_count, 0)"
+            return "0"
+        conn.execute(f"""
+            INSERT INTO pity_v1 ({", ".join(PITY_COLUMNS)})
+            SELECT {", ".join(source(c) for c in PITY_COLUMNS)} FROM pity
+        """)
+        conn.execute("DROP TABLE pity")
+    conn.execute("ALTER TABLE pity_v1 RENAME TO pity")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS inventory (
+            user_id INTEGER,
+            item_name TEXT,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, item_name)
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS pull_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            item_name TEXT,
+            rarity INTEGER,
+            timestamp INTEGER
+        )
+    """)
+
+def _v2_indexes(conn: sqlite3.Connection):
+    """Indexes for /history (newest pulls per user) and the leaderboard (top total_5_stars)."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pull_history_user_ts ON pull_history (user_id, timestamp DESC)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pity_total_5 ON pity (total_5_stars DESC)")
+
+def _v3_history_count(conn: sqlite3.Connection):
+    """Bulk wishes record one history row per distinct item, with how many were pulled."""
+    conn.execute("ALTER TABLE pull_history ADD COLUMN count INTEGER NOT NULL DEFAULT 1")
+
+def _v4_history_rollups(conn: sqlite3.Connection):
+    """
+    Daily per-user rollup for compacted pull_history rows (day = unix time // 86400),
+    and a view that reads rollups plus the raw tail as one table.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS pull_history_daily (
+            user_id INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            rarity INTEGER NOT NULL,
+            item_name TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day, rarity, item_name)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE VIEW IF NOT EXISTS pull_history_all AS
+            SELECT user_id, day, rarity, item_name, count FROM pull_history_daily
+            UNION ALL
+            SELECT user_id, timestamp / 86400, rarity, item_name, count FROM pull_history
+    """)
+
+def _v5_item_catalog(conn: sqlite3.Connection):
+    """
+    Dictionary-encode item names: an `items` catalog with integer ids, and inventory,
+    pull_history and pull_history_daily rebuilt to reference item_id instead of the full name.
+    The catalog is seeded from names already in the data; the cog adds the banner's items on load.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS items (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            rarity INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("""
+        INSERT OR IGNORE INTO items (name, rarity)
+        SELECT item_name, MAX(rarity) FROM (
+            SELECT item_name, rarity FROM pull_history
+            UNION ALL SELECT item_name, rarity FROM pull_history_daily
+            UNION ALL SELECT item_name, 0 FROM inventory
+        ) WHERE item_name IS NOT NULL GROUP BY item_name
+    """)
+
+    conn.execute("DROP VIEW IF EXISTS pull_history_all")
+
+    conn.execute("""
+        CREATE TABLE inventory_v5 (
+            user_id INTEGER NOT NULL,
+            item_id INTEGER NOT NULL REFERENCES items (id),
+            quantity INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, item_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        INSERT INTO inventory_v5 (user_id, item_id, quantity)
+        SELECT inv.user_id, items.id, SUM(COALESCE(inv.quantity, 0))
+        FROM inventory AS inv JOIN items ON items.name = inv.item_name
+        WHERE inv.user_id IS NOT NULL GROUP BY inv.user_id, items.id
+    """)
+    conn.execute("DROP TABLE inventory")
+    conn.execute("ALTER TABLE inventory_v5 RENAME TO inventory")
+
+    conn.execute("""
+        CREATE TABLE pull_history_v5 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            item_id INTEGER NOT NULL REFERENCES items (id),
+            rarity INTEGER NOT NULL,
+            timestamp INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 1
+        )
+    """)
+    conn.execute("""
+        INSERT INTO pull_history_v5 (id, user_id, item_id, rarity, timestamp, count)
+        SELECT h.id, h.user_id, items.id, COALESCE(h.rarity, items.rarity), COALESCE(h.timestamp, 0), h.count
+        FROM pull_history AS h JOIN items ON items.name = h.item_name
+        WHERE h.user_id IS NOT NULL
+    """)
+    conn.execute("DROP TABLE pull_history")
+    conn.execute("ALTER TABLE pull_history_v5 RENAME TO pull_history")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pull_history_user_ts ON pull_history (user_id, timestamp DESC)")
+
+    conn.execute("""
+        CREATE TABLE pull_history_daily_v5 (
+            user_id INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            rarity INTEGER NOT NULL,
+            item_id INTEGER NOT NULL REFERENCES items (id),
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day, rarity, item_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        INSERT INTO pull_history_daily_v5 (user_id, day, rarity, item_id, count)
+        SELECT d.user_id, d.day, d.rarity, items.id, d.count
+        FROM pull_history_daily AS d JOIN items ON items.name = d.item_name
+    """)
+    conn.execute("DROP TABLE pull_history_daily")
+    conn.execute("ALTER TABLE pull_history_daily_v5 RENAME TO pull_history_daily")
+
+    conn.execute("""
+        CREATE VIEW pull_history_all AS
+            SELECT user_id, day, rarity, item_id, count FROM pull_history_daily
+            UNION ALL
+            SELECT user_id, timestamp / 86400, rarity, item_id, count FROM pull_history
+    """)
+
+def _v6_pagination_indexes(conn: sqlite3.Connection):
+    """
+    Indexes for keyset-paginated /inventory and /history.
+    Index entries end with the rowid (= pull_history.id), so (user_id) and (user_id, rarity) both
+    walk one user's rows in id order: "AND id < ? ORDER BY id DESC LIMIT n" is a seek, not a sort.
+    """
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pull_history_user ON pull_history (user_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pull_history_user_rarity ON pull_history (user_id, rarity)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_inventory_user_qty ON inventory (user_id, quantity DESC, item_id)")
+
+def _v7_guild_partitioning(conn: sqlite3.Connection):
+    """
+    Partition gacha state by guild: pity, inventory, pull_history and pull_history_daily are rebuilt
+    with guild_id leading every primary key and index, so one guild's lookups never touch another's rows.
+    Existing rows belong to LEGACY_GUILD_ID, the single server the bot served before.
+    """
+    conn.execute("DROP VIEW IF EXISTS pull_history_all")
+
+    conn.execute("""
+        CREATE TABLE pity_v7 (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            pity_5_star INTEGER NOT NULL DEFAULT 0,
+            pity_4_star INTEGER NOT NULL DEFAULT 0,
+            total_pulls INTEGER NOT NULL DEFAULT 0,
+            total_5_stars INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        INSERT INTO pity_v7 (guild_id, user_id, pity_5_star, pity_4_star, total_pulls, total_5_stars)
+        SELECT ?, user_id, pity_5_star, pity_4_star, total_pulls, total_5_stars FROM pity
+    """, (LEGACY_GUILD_ID,))
+    conn.execute("DROP TABLE pity")
+    conn.execute("ALTER TABLE pity_v7 RENAME TO pity")
+    conn.execute("CREATE INDEX idx_pity_guild_total_5 ON pity (guild_id, total_5_stars DESC)")
+
+    conn.execute("""
+        CREATE TABLE inventory_v7 (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            item_id INTEGER NOT NULL REFERENCES items (id),
+            quantity INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id, item_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        INSERT INTO inventory_v7 (guild_id, user_id, item_id, quantity)
+        SELECT ?, user_id, item_id, quantity FROM inventory
+    """, (LEGACY_GUILD_ID,))
+    conn.execute("DROP TABLE inventory")
+    conn.execute("ALTER TABLE inventory_v7 RENAME TO inventory")
+    conn.execute("CREATE INDEX idx_inventory_user_qty ON inventory (guild_id, user_id, quantity DESC, item_id)")
+
+    conn.execute("""
+        CREATE TABLE pull_history_v7 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            item_id INTEGER NOT NULL REFERENCES items (id),
+            rarity INTEGER NOT NULL,
+            timestamp INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 1
+        )
+    """)
+    conn.execute("""
+        INSERT INTO pull_history_v7 (id, guild_id, user_id, item_id, rarity, timestamp, count)
+        SELECT id, ?, user_id, item_id, rarity, timestamp, count FROM pull_history
+    """, (LEGACY_GUILD_ID,))
+    conn.execute("DROP TABLE pull_history")
+    conn.execute("ALTER TABLE pull_history_v7 RENAME TO pull_history")
+    conn.execute("CREATE INDEX idx_pull_history_user_ts ON pull_history (guild_id, user_id, timestamp DESC)")
+    conn.execute("CREATE INDEX idx_pull_history_user ON pull_history (guild_id, user_id)")
+    conn.execute("CREATE INDEX idx_pull_history_user_rarity ON pull_history (guild_id, user_id, rarity)")
+
+    conn.execute("""
+        CREATE TABLE pull_history_daily_v7 (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            rarity INTEGER NOT NULL,
+            item_id INTEGER NOT NULL REFERENCES items (id),
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id, day, rarity, item_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        INSERT INTO pull_history_daily_v7 (guild_id, user_id, day, rarity, item_id, count)
+        SELECT ?, user_id, day, rarity, item_id, count FROM pull_history_daily
+    """, (LEGACY_GUILD_ID,))
+    conn.execute("DROP TABLE pull_history_daily")
+    conn.execute("ALTER TABLE pull_history_daily_v7 RENAME TO pull_history_daily")
+
+    conn.execute("""
+        CREATE VIEW pull_history_all AS
+            SELECT guild_id, user_id, day, rarity, item_id, count FROM pull_history_daily
+            UNION ALL
+            SELECT guild_id, user_id, timestamp / 86400, rarity, item_id, count FROM pull_history
+    """)
+
+def _v8_command_sync(conn: sqlite3.Connection):
+    """Hash of the slash-command tree last synced to each guild, so restarts skip unchanged syncs."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS command_sync (
+            guild_id INTEGER PRIMARY KEY,
+            tree_hash TEXT NOT NULL,
+            synced_at INTEGER NOT NULL
+        )
+    """)
+
+def _v9_xp_reviews(conn: sqlite3.Connection):
+    """Manual XP reviews, so an open review survives a restart and is found without the message cache."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS xp_reviews (
+            review_message_id INTEGER PRIMARY KEY,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            original_message_id INTEGER NOT NULL,
+            author_id INTEGER NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending'
+                CHECK (status IN ('pending', 'approved', 'denied', 'expired')),
+            created_at INTEGER NOT NULL,
+            resolved_at INTEGER,
+            reviewer_id INTEGER
+        )
+    """)
+    # Expiry sweeps only ever look at open reviews, oldest first
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_xp_reviews_pending ON xp_reviews (created_at) WHERE status = 'pending'")
+
+def _v10_xp_ledger(conn: sqlite3.Connection):
+    """Every credited XP submission, plus per-character running totals kept in step with it."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS xp_ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            author_id INTEGER NOT NULL,
+            character TEXT NOT NULL,
+            level INTEGER NOT NULL,
+            activity TEXT NOT NULL,
+            xp INTEGER NOT NULL,
+            crowns INTEGER NOT NULL DEFAULT 0,
+            rift_tokens INTEGER NOT NULL DEFAULT 0,
+            reviewer_id INTEGER,
+            message_id INTEGER NOT NULL UNIQUE,
+            created_at INTEGER NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_xp_ledger_author_ts ON xp_ledger (guild_id, author_id, created_at DESC)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_xp_ledger_guild_ts ON xp_ledger (guild_id, created_at)")
+
+    # character_key is the casefolded name, so "Aldric" and "aldric " add up to one row
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS xp_totals (
+            guild_id INTEGER NOT NULL,
+            author_id INTEGER NOT NULL,
+            character_key TEXT NOT NULL,
+            character TEXT NOT NULL,
+            level INTEGER NOT NULL,
+            xp INTEGER NOT NULL DEFAULT 0,
+            crowns INTEGER NOT NULL DEFAULT 0,
+            rift_tokens INTEGER NOT NULL DEFAULT 0,
+            submissions INTEGER NOT NULL DEFAULT 0,
+            updated_at INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, author_id, character_key)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_xp_totals_top ON xp_totals (guild_id, xp DESC)")
+
+def _v11_xp_ledger_character_key(conn: sqlite3.Connection):
+    """
+    xp_ledger.character_key, the same key xp_totals uses, so weekly sums group characters exactly
+    like the all-time totals do (SQL lower() neither casefolds nor collapses whitespace).
+    """
+    conn.execute("ALTER TABLE xp_ledger ADD COLUMN character_key TEXT NOT NULL DEFAULT ''")
+    # Frozen copy of xp_ledger.character_key: whitespace collapsed, then casefolded
+    rows = conn.execute("SELECT id, character FROM xp_ledger").fetchall()
+    conn.executemany("UPDATE xp_ledger SET character_key = ? WHERE id = ?",
+                     [(" ".join(character.split()).casefold(), row_id) for row_id, character in rows])
+
+MIGRATIONS = [
+    (1, "base schema", _v1_base_schema),
+    (2, "history and leaderboard indexes", _v2_indexes),
+    (3, "pull_history.count for bulk wishes", _v3_history_count),
+    (4, "pull_history_daily rollups", _v4_history_rollups),
+    (5, "items catalog; inventory/history keyed by item_id", _v5_item_catalog),
+    (6, "keyset pagination indexes", _v6_pagination_indexes),
+    (7, "partition gacha state by guild_id", _v7_guild_partitioning),
+    (8, "slash-command sync hashes", _v8_command_sync),
+    (9, "durable XP review queue", _v9_xp_reviews),
+    (10, "XP ledger and per-character totals", _v10_xp_ledger),
+    (11, "xp_ledger.character_key", _v11_xp_ledger_character_key),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# =====================================================
+# RUNNER
+# =====================================================
+def migrate(path: str = DB_NAME, target: int = SCHEMA_VERSION) -> int:
+    """Apply pending migrations in order, up to `target`. Returns the resulting schema version."""
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        if current > SCHEMA_VERSION:
+            raise RuntimeError(f"{path} is at schema v{current}, newer than this code (v{SCHEMA_VERSION})")
+        for version, description, apply in MIGRATIONS:
+            if version <= current or version > target:
+                continue
+            logger.info("Applying migration v%d: %s", version, description)
+            with transaction(conn):
+                apply(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+            current = version
+        return current
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(f"Schema version: {migrate()}")
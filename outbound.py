@@ -0,0 +1,215 @@
+# outbound.py — rate-limit-aware dispatch queue for the XP reporter's sends and reactions
+# Handlers enqueue and return; one worker per channel drains that channel's backlog in order.
+# Progression-log embeds waiting for the same channel go out together (up to 10 per message), and
+# every route has its own token bucket, so we pace ourselves below Discord's per-channel limits
+# instead of letting discord.py sleep on a 429 inside a handler. The queue is bounded: when it's
+# full, enqueueing waits (backpressure) rather than growing without limit during a rush.
+
+import asyncio
+import logging
+import time
+import traceback
+from collections import deque
+
+import discord
+
+from bot_config import OUTBOUND_QUEUE_SIZE, OUTBOUND_BATCH_EMBEDS, OUTBOUND_SEND_RATE, OUTBOUND_REACTION_RATE
+from metrics import metrics
+
+logger = logging.getLogger("outbound")
+
+EMBED_TOTAL_LIMIT = 6000   # Discord's cap on the combined text of all embeds in one message
+
+class RouteBucket:
+    """
+    One route's limit the way Discord counts it: `limit` requests per window of `per` seconds, the
+    window opening with its first request. Discord opens it when that request *arrives*, so once the
+    reply is back the window is re-anchored there (anchor()); pause() holds the route after a 429.
+    """
+
+    __slots__ = ("limit", "per", "remaining", "reset_at")
+
+    def __init__(self, limit: int, per: float):
+        self.limit = limit
+        self.per = per
+        self.remaining = limit
+        self.reset_at = 0.0
+
+    def delay(self) -> float:
+        """Seconds until a request may go out (0 = now)."""
+        now = time.monotonic()
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            return 0.0
+        return 0.0 if self.remaining > 0 else self.reset_at - now
+
+    async def acquire(self) -> bool:
+        """Wait for a slot; True if this request opens a new window (call anchor() after its reply)."""
+        while (wait := self.delay()) > 0:
+            await asyncio.sleep(wait)
+        opened = self.remaining == self.limit
+        if opened:
+            self.reset_at = time.monotonic() + self.per
+        self.remaining -= 1
+        return opened
+
+    def anchor(self):
+        self.reset_at = max(self.reset_at, time.monotonic() + self.per)
+
+    def pause(self, seconds: float):
+        self.reset_at = max(self.reset_at, time.monotonic() + seconds)
+        self.remaining = 0
+
+class _Lane:
+    """Everything waiting for one channel, and the worker draining it (None when idle)."""
+
+    __slots__ = ("embeds", "reactions", "worker")
+
+    def __init__(self):
+        self.embeds = deque()      # (channel, embed)
+        self.reactions = deque()   # (message, emoji)
+        self.worker = None
+
+class OutboundQueue:
+    """
+    - send_embed(channel, embed): queue a log embed; neighbours for the same channel share one message
+    - react(message, emoji): queue a reaction
+    - both wait only when `capacity` items are already queued; len(queue) is the current depth
+    - drain(): wait until everything queued so far has been sent
+    """
+
+    def __init__(self, capacity: int = OUTBOUND_QUEUE_SIZE, batch_size: int = OUTBOUND_BATCH_EMBEDS,
+                 send_rate: tuple = OUTBOUND_SEND_RATE, reaction_rate: tuple = OUTBOUND_REACTION_RATE):
+        self.capacity = max(1, capacity)
+        self.batch_size = max(1, min(10, batch_size))
+        self.send_rate = send_rate
+        self.reaction_rate = reaction_rate
+        self._slots = asyncio.Semaphore(self.capacity)
+        self._lanes = {}     # channel_id -> _Lane
+        self._buckets = {}   # (route, channel_id) -> RouteBucket
+        self._depth = 0
+
+    def __len__(self):
+        return self._depth
+
+    def bucket(self, route: str, channel_id: int) -> RouteBucket:
+        key = (route, channel_id)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = RouteBucket(*(self.send_rate if route == "send" else self.reaction_rate))
+        return bucket
+
+    # ---------- enqueue ----------
+    async def _reserve(self):
+        if self._slots.locked():
+            metrics.inc("outbound", "backpressure waits")
+            with metrics.timer("outbound", "backpressure"):
+                await self._slots.acquire()
+        else:
+            await self._slots.acquire()
+        self._depth += 1
+
+    def _done(self, n: int = 1):
+        self._depth -= n
+        for _ in range(n):
+            self._slots.release()
+
+    def _lane(self, channel_id: int) -> _Lane:
+        lane = self._lanes.get(channel_id)
+        if lane is None:
+            lane = self._lanes[channel_id] = _Lane()
+        return lane
+
+    def _wake(self, channel_id: int, lane: _Lane):
+        if lane.worker is None:
+            lane.worker = asyncio.create_task(self._run(channel_id, lane))
+
+    async def send_embed(self, channel, embed: discord.Embed):
+        await self._reserve()
+        lane = self._lane(channel.id)
+        lane.embeds.append((channel, embed))
+        self._wake(channel.id, lane)
+
+    async def react(self, message, emoji: str):
+        await self._reserve()
+        lane = self._lane(message.channel.id)
+        lane.reactions.append((message, emoji))
+        self._wake(message.channel.id, lane)
+
+    async def drain(self):
+        while workers := [lane.worker for lane in self._lanes.values() if lane.worker is not None]:
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    # ---------- workers ----------
+    async def _run(self, channel_id: int, lane: _Lane):
+        try:
+            while lane.embeds or lane.reactions:
+                # Alternate so a steady stream of logs can't starve reactions (or the reverse)
+                if lane.embeds:
+                    await self._send_batch(channel_id, lane)
+                if lane.reactions:
+                    await self._react_one(channel_id, lane)
+        finally:
+            lane.worker = None
+
+    def _take_batch(self, lane: _Lane) -> tuple:
+        channel = lane.embeds[0][0]
+        batch, size = [], 0
+        while lane.embeds and len(batch) < self.batch_size:
+            embed = lane.embeds[0][1]
+            if batch and size + len(embed) > EMBED_TOTAL_LIMIT:
+                break
+            lane.embeds.popleft()
+            batch.append(embed)
+            size += len(embed)
+        return channel, batch
+
+    async def _send_batch(self, channel_id: int, lane: _Lane):
+        bucket = self.bucket("send", channel_id)
+        # Wait for the bucket *before* taking the batch, so logs arriving meanwhile ride along
+        opened = await bucket.acquire()
+        channel, batch = self._take_batch(lane)
+        try:
+            with metrics.timer("outbound", "send"):
+                await channel.send(embeds=batch)
+            if opened:
+                bucket.anchor()
+        except discord.RateLimited as e:
+            bucket.pause(e.retry_after)
+            lane.embeds.extendleft((channel, embed) for embed in reversed(batch))
+            metrics.inc("outbound", "rate limited")
+            return
+        except discord.HTTPException as e:
+            logger.warning("Dropped %d log embed(s) for channel %s: %s", len(batch), channel_id, e)
+            metrics.inc("outbound", "dropped", len(batch))
+        except Exception:
+            logger.error("Dropped %d log embed(s) for channel %s:\n%s", len(batch), channel_id, traceback.format_exc())
+            metrics.inc("outbound", "dropped", len(batch))
+        else:
+            metrics.inc("outbound", "messages")
+            metrics.inc("outbound", "embeds", len(batch))
+        self._done(len(batch))
+
+    async def _react_one(self, channel_id: int, lane: _Lane):
+        bucket = self.bucket("reaction", channel_id)
+        opened = await bucket.acquire()
+        message, emoji = lane.reactions.popleft()
+        try:
+            await message.add_reaction(emoji)
+            if opened:
+                bucket.anchor()
+        except discord.RateLimited as e:
+            bucket.pause(e.retry_after)
+            lane.reactions.appendleft((message, emoji))
+            metrics.inc("outbound", "rate limited")
+            return
+        except discord.HTTPException as e:
+            # Usually the message was deleted before its turn came
+            logger.info("Skipped reaction %s on message %s: %s", emoji, message.id, e)
+            metrics.inc("outbound", "dropped")
+        except Exception:
+            logger.error("Skipped reaction %s on message %s:\n%s", emoji, message.id, traceback.format_exc())
+            metrics.inc("outbound", "dropped")
+        else:
+            metrics.inc("outbound", "reactions")
+        self._done()
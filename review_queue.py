@@ -0,0 +1,148 @@
+# review_queue.py — durable queue of manual XP reviews (xp_reviews table)
+# Every open review is a row keyed by the review message id, so a restart keeps it and a button press
+# resolves it from the interaction alone (no message cache). A small LRU front cache saves the DB
+# read for reviews that are being acted on now; the cog's sweep marks old ones as expired.
+
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+
+import discord
+
+from bot_config import REVIEW_TTL, REVIEW_CACHE_SIZE
+from database import database, transaction
+
+PENDING, APPROVED, DENIED, EXPIRED = "pending", "approved", "denied", "expired"
+
+class Review:
+    """One row of xp_reviews; `payload` is the Submission's fields as a dict."""
+
+    __slots__ = ("review_message_id", "guild_id", "channel_id", "original_message_id", "author_id",
+                 "payload", "status", "created_at")
+
+    def __init__(self, review_message_id: int, guild_id: int, channel_id: int, original_message_id: int,
+                 author_id: int, payload: dict, status: str = PENDING, created_at: int = None):
+        self.review_message_id = review_message_id
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.original_message_id = original_message_id
+        self.author_id = author_id
+        self.payload = payload
+        self.status = status
+        self.created_at = int(time.time()) if created_at is None else created_at
+
+# =====================================================
+# DB HELPERS
+# =====================================================
+def _insert_review(conn: sqlite3.Connection, review: Review):
+    conn.execute("""
+        INSERT INTO xp_reviews (review_message_id, guild_id, channel_id, original_message_id, author_id,
+                                payload, status, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (review.review_message_id, review.guild_id, review.channel_id, review.original_message_id,
+          review.author_id, json.dumps(review.payload), review.status, review.created_at))
+
+def _get_review(conn: sqlite3.Connection, review_message_id: int):
+    row = conn.execute("""
+        SELECT review_message_id, guild_id, channel_id, original_message_id, author_id, payload, status, created_at
+        FROM xp_reviews WHERE review_message_id = ?
+    """, (review_message_id,)).fetchone()
+    if row is None:
+        return None
+    return Review(*row[:5], json.loads(row[5]), *row[6:])
+
+def _resolve_review(conn: sqlite3.Connection, review_message_id: int, status: str, reviewer_id: int) -> bool:
+    # Only a still-pending review can change state, so two reviewers reacting at once can't both win
+    cur = conn.execute("""
+        UPDATE xp_reviews SET status = ?, reviewer_id = ?, resolved_at = ?
+        WHERE review_message_id = ? AND status = 'pending'
+    """, (status, reviewer_id, int(time.time()), review_message_id))
+    return cur.rowcount == 1
+
+def _expire_reviews(conn: sqlite3.Connection, cutoff_ts: int) -> list:
+    """[(review_message_id, channel_id)] of the open reviews created before cutoff_ts, now marked expired."""
+    with transaction(conn):
+        rows = conn.execute(
+            "SELECT review_message_id, channel_id FROM xp_reviews WHERE status = 'pending' AND created_at < ?",
+            (cutoff_ts,)).fetchall()
+        conn.executemany("UPDATE xp_reviews SET status = 'expired', resolved_at = ? WHERE review_message_id = ?",
+                         [(int(time.time()), review_id) for review_id, _ in rows])
+    return rows
+
+# =====================================================
+# QUEUE
+# =====================================================
+class ReviewQueue:
+    """
+    - add(review): persist, then keep it in the front cache
+    - get(id): the Review (any status) or None; cache first, then one primary-key read
+    - resolve(id, status, reviewer_id): True only for the caller that moved it out of pending
+    - expire(): mark open reviews older than `ttl` as expired; returns [(review_message_id, channel_id)]
+    """
+
+    def __init__(self, ttl: float = REVIEW_TTL, capacity: int = REVIEW_CACHE_SIZE):
+        self.ttl = ttl
+        self.capacity = max(1, capacity)
+        self._cache = OrderedDict()   # review_message_id -> pending Review
+
+    def __len__(self):
+        return len(self._cache)
+
+    def _remember(self, review: Review):
+        self._cache[review.review_message_id] = review
+        self._cache.move_to_end(review.review_message_id)
+        while len(self._cache) > self.capacity:
+            self._cache.popitem(last=False)
+
+    async def add(self, review: Review):
+        await database.write(_insert_review, review)
+        self._remember(review)
+
+    async def get(self, review_message_id: int):
+        review = self._cache.get(review_message_id)
+        if review is not None:
+            self._cache.move_to_end(review_message_id)
+            return review
+        review = await database.read(_get_review, review_message_id)
+        if review is not None and review.status == PENDING:
+            self._remember(review)
+        return review
+
+    async def resolve(self, review_message_id: int, status: str, reviewer_id: int) -> bool:
+        won = await database.write(_resolve_review, review_message_id, status, reviewer_id)
+        self._cache.pop(review_message_id, None)
+        return won
+
+    async def expire(self) -> list:
+        expired = await database.write(_expire_reviews, int(time.time() - self.ttl))
+        for review_id, _ in expired:
+            self._cache.pop(review_id, None)
+        return expired
+
+# =====================================================
+# VIEW
+# =====================================================
+class ReviewView(discord.ui.View):
+    """
+    Approve/Deny buttons on every review message. The custom_ids are fixed and the view holds no
+    state (the review is looked up by the message id), so one instance registered with bot.add_view
+    at startup answers buttons on every review, including ones posted before a restart.
+    """
+
+    def __init__(self):
+        super().__init__(timeout=None)
+
+    async def _dispatch(self, interaction: discord.Interaction, status: str):
+        cog = interaction.client.get_cog("XPReporterCog")
+        if cog is None:
+            return await interaction.response.send_message("⚠️ XP reviews are unavailable right now.", ephemeral=True)
+        await cog.review_button(interaction, status)
+
+    @discord.ui.button(label="Approve", emoji="✅", style=discord.ButtonStyle.success, custom_id="xp_review:approve")
+    async def approve(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._dispatch(interaction, APPROVED)
+
+    @discord.ui.button(label="Deny", emoji="❌", style=discord.ButtonStyle.danger, custom_id="xp_review:deny")
+    async def deny(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._dispatch(interaction, DENIED)
@@ -0,0 +1,93 @@
+# xp_ledger.py — persistent record of credited XP (xp_ledger + xp_totals tables)
+# The ledger is append-only, one row per credited submission. xp_totals holds per-character running sums
+# that are updated in the same transaction, so /xp and the leaderboard read one row each instead of
+# summing the ledger. The ledger itself is only scanned for time-bounded questions such as "this week".
+
+import sqlite3
+import time
+
+from database import transaction
+
+WEEK = 7 * 86400
+MAX_AMOUNT = 2**63 - 1   # SQLite INTEGER is a signed 64-bit value; binding anything larger raises
+# 1970-01-01 was a Thursday; shifting by 3 days makes weeks start on Monday 00:00 UTC
+_WEEK_OFFSET = 3 * 86400
+
+def week_start(ts: float = None) -> int:
+    ts = int(time.time() if ts is None else ts)
+    return ts - (ts + _WEEK_OFFSET) % WEEK
+
+def clean_character(name: str) -> str:
+    return " ".join(name.split())
+
+def character_key(name: str) -> str:
+    return clean_character(name).casefold()
+
+def clamp_amount(n: int) -> int:
+    return max(0, min(n, MAX_AMOUNT))
+
+# =====================================================
+# DB HELPERS
+# =====================================================
+def _record_gain(conn: sqlite3.Connection, guild_id: int, author_id: int, character: str, level: int,
+                 activity: str, xp: int, crowns: int, rift_tokens: int, reviewer_id: int, message_id: int,
+                 created_at: int = None) -> bool:
+    """
+    Append one ledger row and bump the character's totals. False (nothing written) if message_id is already credited.
+    Amounts (and the level) are clamped to 0..MAX_AMOUNT, and totals stop at MAX_AMOUNT instead of overflowing.
+    """
+    created_at = int(time.time()) if created_at is None else created_at
+    character = clean_character(character)
+    key = character_key(character)
+    level, xp, crowns, rift_tokens = map(clamp_amount, (level, xp, crowns, rift_tokens))
+    with transaction(conn):
+        cur = conn.execute("""
+            INSERT OR IGNORE INTO xp_ledger (guild_id, author_id, character, character_key, level, activity, xp, crowns,
+                                             rift_tokens, reviewer_id, message_id, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (guild_id, author_id, character, key, level, activity, xp, crowns, rift_tokens, reviewer_id,
+              message_id, created_at))
+        if cur.rowcount == 0:
+            return False
+        # a + MIN(b, MAX - a) never leaves the 64-bit range, where a plain a + b would raise "integer overflow"
+        conn.execute(f"""
+            INSERT INTO xp_totals (guild_id, author_id, character_key, character, level, xp, crowns, rift_tokens,
+                                   submissions, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, ?)
+            ON CONFLICT (guild_id, author_id, character_key) DO UPDATE SET
+                character = excluded.character,
+                level = MAX(level, excluded.level),
+                xp = xp + MIN(excluded.xp, {MAX_AMOUNT} - xp),
+                crowns = crowns + MIN(excluded.crowns, {MAX_AMOUNT} - crowns),
+                rift_tokens = rift_tokens + MIN(excluded.rift_tokens, {MAX_AMOUNT} - rift_tokens),
+                submissions = submissions + 1,
+                updated_at = excluded.updated_at
+        """, (guild_id, author_id, key, character, level, xp, crowns, rift_tokens, created_at))
+    return True
+
+def _get_character_totals(conn: sqlite3.Connection, guild_id: int, author_id: int) -> list:
+    """[(character, level, xp, crowns, rift_tokens, submissions)] for one author, most XP first."""
+    return conn.execute("""
+        SELECT character, level, xp, crowns, rift_tokens, submissions
+        FROM xp_totals WHERE guild_id = ? AND author_id = ?
+        ORDER BY xp DESC
+    """, (guild_id, author_id)).fetchall()
+
+def _get_top_characters(conn: sqlite3.Connection, guild_id: int, limit: int = 10) -> list:
+    """[(author_id, character, xp)] — reads the top of idx_xp_totals_top, no sorting."""
+    return conn.execute("""
+        SELECT author_id, character, xp FROM xp_totals
+        WHERE guild_id = ? ORDER BY xp DESC LIMIT ?
+    """, (guild_id, limit)).fetchall()
+
+def _get_top_characters_since(conn: sqlite3.Connection, guild_id: int, since_ts: int, limit: int = 10) -> list:
+    """
+    [(author_id, character, xp)] summed over ledger rows at or after since_ts (a range scan on idx_xp_ledger_guild_ts),
+    per character_key like xp_totals. TOTAL() is a float and can't overflow; the sum is clamped back to an int.
+    """
+    return conn.execute(f"""
+        SELECT author_id, MAX(character), CAST(MIN(TOTAL(xp), {MAX_AMOUNT}) AS INTEGER) AS gained FROM xp_ledger
+        WHERE guild_id = ? AND created_at >= ?
+        GROUP BY author_id, character_key
+        ORDER BY gained DESC LIMIT ?
+    """, (guild_id, since_ts, limit)).fetchall()
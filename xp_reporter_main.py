@@ -1,69 +1,173 @@
 # xp_reporter_main.py
 # FINAL – Manual Review System (AUTO + MANUAL FIXED)
-# Modified to restrict AFK Farm to role 1362546920890827053
+# AFK Farm is restricted to each guild's afk_role_id (guilds.json)
 
+import asyncio
 import discord
+import logging
+import os
 import re
 import math
-from discord.ext import commands
-from bot_config import (
-    INPUT_CHANNEL_IDS,
-    OUTPUT_CHANNEL_IDS,
-    SUBMISSION_APPROVER_ROLE_IDS,
+import time
+import traceback
+import typing
+from discord import app_commands
+from discord.ext import commands, tasks
+from bot_config import REVIEW_EXPIRY_INTERVAL, XP_RULES_FILE
+from database import database
+from guild_config import guilds, member_roles, is_guild_moderator
+from metrics import metrics
+from outbound import OutboundQueue
+from review_queue import ReviewQueue, ReviewView, Review, PENDING, APPROVED, DENIED
+from xp_ledger import (
+    _record_gain, _get_character_totals, _get_top_characters, _get_top_characters_since, clamp_amount, week_start
 )
+from xp_rules import ActivityRule, RewardRules, XPRulesError, load_rules
 
-EMOJI_STR1 = "⭐"
-BASE_CROWNS = 500
+logger = logging.getLogger("xp_reporter")
 
-# Role allowed to perform AFK Farm
-AFK_ALLOWED_ROLE_ID = 1362546920890827053
+EMOJI_STR1 = "⭐"
 
 # ────────────────────────
-# Training Tiers
+# Reward Rules
 # ────────────────────────
-TRAINING_TIERS = [
-    (1, 10, 100, 1),
-    (11, 20, 150, 2),
-    (21, 30, 200, 3),
-]
-
-def get_training_tier_data(level: int) -> dict:
-    for min_lvl, max_lvl, xp, tier in TRAINING_TIERS:
-        if min_lvl <= level <= max_lvl:
-            return {"base_xp": xp, "tier": tier}
-    return {"base_xp": 100, "tier": 1}
+# Training tiers and activities come from XP_RULES_FILE (see xp_rules.py) and can be swapped at
+# runtime with /reloadxp. Handlers read `_rules` once per submission and keep that snapshot.
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), XP_RULES_FILE)
 
-# ────────────────────────
-# Multipliers
-# ────────────────────────
-ACTIVITY_MULTIPLIERS = {
-    "solo training": 1.0,
-    "troll mission": 1.0,
-    "afk training i": 1.0,
-    "afk training ii": 1.0,
-    "afk training iii": 1.15,
-}
+def build_rules(path: str = RULES_PATH) -> RewardRules:
+    """Load, validate and compile `path`; raises XPRulesError on a bad file."""
+    rules = load_rules(path)
+    logger.info("Loaded XP rules (%s): %d activities, tiers up to level %d",
+                rules.digest, len(rules.activities), rules.max_level)
+    return rules
 
-REVIEW_MULTIPLIERS = {
-    "battle": 4.0,
-    "wholesome": 2.5,
-    "dungeon": 2.0,
-}
+_rules = build_rules()
 
-ACTIVITY_ALIASES = {
-    "afk farm i": "afk training i",
-    "afk farm ii": "afk training ii",
-    "afk farm iii": "afk training iii",
-    "afk i": "afk training i",
-    "afk ii": "afk training ii",
-    "afk iii": "afk training iii",
-    "afk 1": "afk training i",
-    "afk 2": "afk training ii",
-    "afk 3": "afk training iii",
-    "solo train": "solo training",
-}
+def active_rules() -> RewardRules:
+    return _rules
 
-REVIEW_KEYWORDS = {"battle", "wholesome", "dungeon"}
+async def reload_rules(path: str = RULES_PATH) -> tuple:
+    """Compile the file off the event loop, then swap it in. On XPRulesError the old rules stay. Returns (old, new)."""
+    global _rules
+    new = await asyncio.to_thread(build_rules, path)
+    old, _rules = _rules, new
+    return old, new
+
+def normalize_activity(progression: str) -> str:
+    return _rules.normalize(progression)
+
+# ────────────────────────
+# Submission Parser
+# ────────────────────────
+# Template label (lowercased, between ** and :**) -> Submission attribute
+SUBMISSION_FIELDS = {
+    "character name(s)": "name",
+    "character level": "level",
+    "type of progression": "progression",
+    "boost(s) for xp": "xp_boost",
+    "boost(s) for crowns": "crowns_boost",
+}
+# The template's own spelling, so the usual post skips the strip()/lower()
+SUBMISSION_FIELDS.update({
+    "Character Name(s)": "name",
+    "Character Level": "level",
+    "Type of Progression": "progression",
+    "Boost(s) for XP": "xp_boost",
+    "Boost(s) for Crowns": "crowns_boost",
+})
+
+SUBMISSION_PREFIX = "**character name(s):**"   # every submission starts with this line
+
+class Submission:
+    """One parsed progression post. Missing fields are None; boosts default to 0.0 (a fraction)."""
+
+    __slots__ = ("name", "level", "progression", "progression_key", "xp_boost", "crowns_boost", "author_id", "channel_id")
+
+    def __init__(self):
+        self.name = None
+        self.level = None
+        self.progression = None
+        self.progression_key = ""
+        self.xp_boost = 0.0
+        self.crowns_boost = 0.0
+        self.author_id = None
+        self.channel_id = None
+
+    def to_payload(self) -> dict:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "Submission":
+        sub = cls()
+        for k in cls.__slots__:
+            setattr(sub, k, payload.get(k, getattr(sub, k)))
+        return sub
+
+_INT = re.compile(r"\d+")
+_PERCENT = re.compile(r"(\d+)%")
+# The template filled in as pinned: labels as spelled there, one field per line, in order. Anchored
+# (fullmatch) and possessive (++, Python 3.11+), so a post that doesn't fit fails on its first
+# mismatch instead of backtracking through a long value.
+_TEMPLATE = re.compile(
+    r"\*\*Character Name\(s\):\*\*([^\n*]++)\n"
+    r"\*\*Character Level:\*\* ?(\d++)\n"
+    r"\*\*Type of Progression:\*\*([^\n*]++)"
+    r"(?:\n\*\*Boost\(s\) for XP:\*\* ?(\d++)%)?"
+    r"(?:\n\*\*Boost\(s\) for Crowns:\*\* ?(\d++)%)?"
+)
+_TEMPLATE_MAX_LEN = 512   # a filled-in template is ~150 characters; longer posts go straight to the split scan
+
+def parse_submission(content: str) -> Submission:
+    """
+    Short posts that follow the template exactly are read with one _TEMPLATE match. Anything else gets
+    one pass over the post, split where a line starts with `**`: each piece is `Label:** value...`.
+    Labels are looked up in SUBMISSION_FIELDS (the first copy of the template wins). A value is the
+    rest of its line, or the next non-blank line if that is empty; Type of Progression keeps
+    everything up to the next `**`, across lines.
+    """
+    sub = Submission()
+    if len(content) <= _TEMPLATE_MAX_LEN and (template := _TEMPLATE.fullmatch(content)):
+        name, level, text, xp_boost, crowns_boost = template.groups()
+        sub.name = name.strip() or None
+        sub.level = int(level)
+        sub.progression = text.strip() or None
+        sub.progression_key = normalize_activity(text)
+        if xp_boost is not None:
+            sub.xp_boost = int(xp_boost) / 100
+        if crowns_boost is not None:
+            sub.crowns_boost = int(crowns_boost) / 100
+        return sub
+    seen = set()
+    for piece in ("\n" + content).split("\n**")[1:]:
+        label, sep, rest = piece.partition(":**")
+        if not sep:
+            continue
+        field = SUBMISSION_FIELDS.get(label) or SUBMISSION_FIELDS.get(label.strip().lower())
+        if field is None:
+            continue
+        if field in seen:
+            break   # a second copy of the template
+        seen.add(field)
+        if field == "progression":
+            text = rest.partition("**")[0]
+            sub.progression = text.strip() or None
+            sub.progression_key = normalize_activity(text)
+            continue
+        value = rest.lstrip().partition("\n")[0].rstrip()
+        if field == "name":
+            sub.name = value or None
+        elif field == "level":
+            # isdecimal(), not isdigit(): "²" is a digit but int() rejects it (and \d doesn't match it)
+            if value.isdecimal():
+                sub.level = int(value)
+            elif digits := _INT.match(value):
+                sub.level = int(digits.group())
+        elif value[-1:] == "%" and value[:-1].isdecimal():
+            setattr(sub, field, int(value[:-1]) / 100)
+        elif percent := _PERCENT.match(value):
+            setattr(sub, field, int(percent.group(1)) / 100)
+    return sub
 
 # ────────────────────────
 # Cog
@@ -71,41 +175,28 @@ REVIEW_KEYWORDS = {"battle", "wholesome", "dungeon"}
 class XPReporterCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.pending_reviews = {}
-        self._cached_mod_ping = None
+        self.reviews = ReviewQueue()
+        self.outbound = OutboundQueue()   # logs and reactions, paced per channel
+        self.review_view = ReviewView()   # stateless; bot.py registers one at startup for old messages
+        self._cached_mod_ping = {}   # guild_id -> approver role mentions
+
+    async def cog_load(self):
+        self.review_expiry.start()
+        metrics.gauge("xp_reviews", "cached", lambda: len(self.reviews))
+        metrics.gauge("outbound", "queued", lambda: len(self.outbound))
+
+    async def cog_unload(self):
+        self.review_expiry.cancel()
+        await self.outbound.drain()
 
     # ────────────────────────
     # Parsing
     # ────────────────────────
-    def _parse(self, message):
-        content = message.content
-
-        name = re.search(r"\*\*Character Name\(s\):\*\*\s*(.+)", content, re.I)
-        level = re.search(r"\*\*Character Level:\*\*\s*(\d+)", content, re.I)
-        prog = re.search(
-            r"\*\*Type of Progression:\*\*(.*?)(?=\*\*|\Z)",
-            content,
-            re.I | re.S,
-        )
-        xp_boost = re.search(r"\*\*Boost\(s\) for XP:\*\*\s*(\d+)%", content, re.I)
-        crowns_boost = re.search(
-            r"\*\*Boost\(s\) for Crowns:\*\*\s*(\d+)%", content, re.I
-        )
-
-        progression = prog.group(1).strip() if prog else None
-        key = (progression or "").lower().replace("farm", "training").strip()
-        key = ACTIVITY_ALIASES.get(key, key)
-
-        return {
-            "name": name.group(1).strip() if name else None,
-            "level": int(level.group(1)) if level else None,
-            "progression": progression,
-            "progression_key": key,
-            "xp_boost": int(xp_boost.group(1)) / 100 if xp_boost else 0.0,
-            "crowns_boost": int(crowns_boost.group(1)) / 100 if crowns_boost else 0.0,
-            "author": message.author,
-            "channel": message.channel,
-        }
+    def _parse(self, message) -> Submission:
+        data = parse_submission(message.content)
+        data.author_id = message.author.id
+        data.channel_id = message.channel.id
+        return data
 
     # ────────────────────────
     # Message Listener
@@ -114,144 +205,234 @@ class XPReporterCog(commands.Cog):
     async def on_message(self, message):
         if message.author.bot:
             return
-        if message.channel.id not in INPUT_CHANNEL_IDS:
+        if guilds.xp_output(message.channel.id) is None:
             return
-        if not message.content.lower().startswith("**character name(s):**"):
+        if message.content[:len(SUBMISSION_PREFIX)].lower() != SUBMISSION_PREFIX:
             return
 
         data = self._parse(message)
+        cfg = guilds.for_channel(message.channel.id)
 
-        missing = [k for k in ("name", "level", "progression") if not data.get(k)]
+        missing = [k for k in ("name", "level", "progression") if not getattr(data, k)]
         if missing:
-            await message.add_reaction("❌")
+            await self.outbound.react(message, "❌")
             return
 
-        activity = data["progression_key"]
+        rules = _rules
+        rule = rules.match(data.progression_key)
+        if rule is None:
+            return
 
         # Restrict AFK farm to specific role
-        afk_keys = {"afk training i", "afk training ii", "afk training iii"}
-        if activity in afk_keys:
-            author_role_ids = {r.id for r in message.author.roles}
-            if AFK_ALLOWED_ROLE_ID not in author_role_ids:
+        if rule.required_role == "afk":
+            author_role_ids = await member_roles.role_ids(message.guild, message.author)
+            if cfg.afk_role_id not in author_role_ids:
                 # Not allowed to submit AFK farm/training
-                await message.add_reaction("❌")
+                await self.outbound.react(message, "❌")
                 return
 
+        # A level no tier covers is never credited automatically: a mod sees it flagged first
+        off_tiers = not rules.covers(data.level)
+        if off_tiers:
+            logger.warning("Level %d from %s (message %s) is outside the XP tiers (1-%d); sent to review",
+                           data.level, message.author.id, message.id, rules.max_level)
+            metrics.inc("xp", "level outside tiers")
+
         # AUTO PROCESS
-        if activity in ACTIVITY_MULTIPLIERS:
-            await self._process_submission(message, data)
+        if not rule.needs_review and not off_tiers:
+            with metrics.timer("xp", "auto process"):
+                await self._process_submission(message, data, rules=rules)
             return
 
         # MANUAL REVIEW
-        if any(k in activity for k in REVIEW_KEYWORDS):
-            await message.add_reaction("❓")
-
-            if self._cached_mod_ping is None:
-                self._cached_mod_ping = " ".join(
-                    role.mention
-                    for rid in SUBMISSION_APPROVER_ROLE_IDS
-                    if (role := message.guild.get_role(rid))
-                )
-
-            embed = discord.Embed(
-                title="⚠️ Manual Review Required",
-                description=f"{self._cached_mod_ping}\nSubmitted by {message.author.mention}",
-                color=discord.Color.orange(),
+        started = time.perf_counter()
+        await self.outbound.react(message, "❓")
+
+        mod_ping = self._cached_mod_ping.get(cfg.guild_id)
+        if mod_ping is None:
+            mod_ping = self._cached_mod_ping[cfg.guild_id] = " ".join(
+                role.mention
+                for rid in sorted(cfg.approver_role_ids)
+                if (role := message.guild.get_role(rid))
             )
-            embed.add_field(name="Character(s)", value=data["name"], inline=True)
-            embed.add_field(name="Level", value=data["level"], inline=True)
+
+        embed = discord.Embed(
+            title="⚠️ Manual Review Required",
+            description=f"{mod_ping}\nSubmitted by {message.author.mention}",
+            color=discord.Color.orange(),
+        )
+        embed.add_field(name="Character(s)", value=data.name, inline=True)
+        embed.add_field(name="Level", value=data.level, inline=True)
+        embed.add_field(
+            name="Progression", value=data.progression.title(), inline=False
+        )
+        if off_tiers:
             embed.add_field(
-                name="Progression", value=data["progression"].title(), inline=False
+                name="⚠️ Level outside the XP tiers",
+                value=f"Tiers cover levels 1-{rules.max_level}; approving pays TT{rules.tier(data.level)[1]} XP.",
+                inline=False,
             )
-            embed.set_footer(text="React with ✅ to approve or ❌ to deny")
+        embed.set_footer(text="Approve or deny with the buttons below")
 
-            review_msg = await message.channel.send(embed=embed)
-            await review_msg.add_reaction("✅")
-            await review_msg.add_reaction("❌")
+        # Sent directly: the review is keyed by this message's id
+        review_msg = await message.channel.send(embed=embed, view=self.review_view)
 
-            self.pending_reviews[review_msg.id] = {
-                "data": data,
-                "original_message": message,
-            }
+        await self.reviews.add(Review(
+            review_msg.id, cfg.guild_id, message.channel.id, message.id, message.author.id, data.to_payload()
+        ))
+        metrics.observe("xp", "manual review posted", time.perf_counter() - started)
+
+    # ────────────────────────
+    # Review Buttons
+    # ────────────────────────
+    async def review_button(self, interaction: discord.Interaction, status: str):
+        """Called by ReviewView for both buttons. Acknowledged first; the outcome then replaces the review message."""
+        # Ack before any I/O: the resolve, ledger write and queued sends can outlast Discord's 3s deadline
+        await interaction.response.defer()
+        user = interaction.user
+        cfg = guilds.for_channel(interaction.channel_id)
+        if cfg is None or not cfg.approver_role_ids & await member_roles.role_ids(interaction.guild, user):
+            return await interaction.followup.send(
+                "❌ You do not have permission to review submissions.", ephemeral=True)
+
+        review = await self.reviews.get(interaction.message.id)
+        if (review is None or review.status != PENDING
+                or not await self.reviews.resolve(review.review_message_id, status, user.id)):
+            # Someone else got there first, or the review expired
+            return await interaction.followup.send("⚠️ This review was already handled.", ephemeral=True)
+
+        embed = await self._apply_review(review, status, user)
+        msg = await interaction.edit_original_response(embed=embed, view=None)
+        await msg.delete(delay=8)
 
     # ────────────────────────
     # Reaction Listener
     # ────────────────────────
     @commands.Cog.listener()
-    async def on_reaction_add(self, reaction, user):
-        if user.bot:
+    async def on_raw_reaction_add(self, payload):
+        # Only reviews posted before the buttons existed still carry ✅/❌ reactions
+        emoji = str(payload.emoji)
+        if emoji not in ("✅", "❌"):
+            return
+        user = payload.member
+        if user is None or user.bot:
+            return
+        if guilds.xp_output(payload.channel_id) is None:
             return
 
-        msg = reaction.message
-        if msg.id not in self.pending_reviews:
+        review = await self.reviews.get(payload.message_id)
+        if review is None or review.status != PENDING:
             return
 
-        if not any(r.id in SUBMISSION_APPROVER_ROLE_IDS for r in user.roles):
+        cfg = guilds.for_channel(payload.channel_id)
+        guild = self.bot.get_guild(payload.guild_id)
+        if not cfg.approver_role_ids & await member_roles.role_ids(guild, user):
             return
 
-        entry = self.pending_reviews.pop(msg.id)
-        data = entry["data"]
-        original = entry["original_message"]
+        status = APPROVED if emoji == "✅" else DENIED
+        if not await self.reviews.resolve(review.review_message_id, status, user.id):
+            return   # another approver got there first
 
-        if str(reaction.emoji) == "✅":
-            await self._process_submission(original, data, reviewer=user)
-            await original.add_reaction("✅")
+        embed = await self._apply_review(review, status, user)
+        channel = self.bot.get_channel(payload.channel_id) or self.bot.get_partial_messageable(payload.channel_id)
+        msg = channel.get_partial_message(review.review_message_id)
+        await msg.edit(embed=embed)
+        await msg.delete(delay=8)
 
-            embed = discord.Embed(
+    async def _apply_review(self, review: Review, status: str, user) -> discord.Embed:
+        """Carry out a resolved review; returns the embed that replaces the review message."""
+        channel = self.bot.get_channel(review.channel_id) or self.bot.get_partial_messageable(review.channel_id)
+        original = channel.get_partial_message(review.original_message_id)
+
+        if status == APPROVED:
+            with metrics.timer("xp", "manual review approved"):
+                await self._process_submission(original, Submission.from_payload(review.payload), reviewer=user)
+            await self.outbound.react(original, "✅")
+
+            return discord.Embed(
                 title="✅ Approved",
                 description=f"Approved by {user.mention}",
                 color=discord.Color.green(),
             )
 
-        elif str(reaction.emoji) == "❌":
-            await original.add_reaction("❌")
+        await self.outbound.react(original, "❌")
 
-            embed = discord.Embed(
-                title="❌ Denied",
-                description=f"Denied by {user.mention}",
-                color=discord.Color.red(),
-            )
-        else:
-            return
+        return discord.Embed(
+            title="❌ Denied",
+            description=f"Denied by {user.mention}",
+            color=discord.Color.red(),
+        )
 
-        await msg.edit(embed=embed)
-        await msg.delete(delay=8)
+    # ────────────────────────
+    # Review Expiry
+    # ────────────────────────
+    @tasks.loop(seconds=REVIEW_EXPIRY_INTERVAL)
+    async def review_expiry(self):
+        try:
+            expired = await self.reviews.expire()
+        except Exception:
+            logger.error("Review expiry failed:\n%s", traceback.format_exc())
+            return
+        if expired:
+            logger.info("Expired %d open review(s)", len(expired))
+        embed = discord.Embed(
+            title="⌛ Review Expired",
+            description="Nobody reviewed this in time. Please resubmit.",
+            color=discord.Color.dark_grey(),
+        )
+        for review_id, channel_id in expired:
+            channel = self.bot.get_channel(channel_id) or self.bot.get_partial_messageable(channel_id)
+            try:
+                await channel.get_partial_message(review_id).edit(embed=embed, view=None)
+            except discord.HTTPException:
+                pass   # already deleted by hand
 
     # ────────────────────────
     # Processing
     # ────────────────────────
-    async def _process_submission(self, message, data, reviewer=None):
-        tier = get_training_tier_data(data["level"])
-
-        multiplier = (
-            REVIEW_MULTIPLIERS.get(data["progression_key"])
-            or ACTIVITY_MULTIPLIERS.get(data["progression_key"], 1.0)
-        )
+    async def _process_submission(self, message, data, reviewer=None, rules=None):
+        rules = rules or _rules
+        # An approved review whose activity was since removed from the rules still gets base XP
+        rule = rules.match(data.progression_key) or ActivityRule(data.progression_key, 1.0)
+        base_xp, tier = rules.tier(data.level)
 
-        final_xp = math.floor(
-            tier["base_xp"] * multiplier * (1 + data["xp_boost"])
-        )
+        # Boosts are unbounded in the template; clamp here so the log shows what the ledger records
+        final_xp = clamp_amount(math.floor(
+            base_xp * rule.multiplier * (1 + data.xp_boost)
+        ))
 
         gains = [f"{final_xp} XP"]
+        final_crowns = clamp_amount(math.floor(rule.crowns * (1 + data.crowns_boost)))
+        rift_tokens = rule.rift_tokens_per_tier * tier
 
-        if data["progression_key"] == "troll mission":
-            final_crowns = math.floor(
-                BASE_CROWNS * (1 + data["crowns_boost"])
-            )
+        if final_crowns:
             gains.append(f"{final_crowns} Crowns")
-            gains.append(f"{tier['tier']} Rift Token(s)")
+        if rift_tokens:
+            gains.append(f"{rift_tokens} Rift Token(s)")
+
+        # Ledger first: a message that was already credited is not posted twice
+        cfg = guilds.for_channel(data.channel_id)
+        credited = await database.write(
+            _record_gain, cfg.guild_id, data.author_id, data.name, data.level, data.progression_key,
+            final_xp, final_crowns, rift_tokens, reviewer.id if reviewer else None, message.id,
+        )
+        if not credited:
+            return
 
-        idx = INPUT_CHANNEL_IDS.index(data["channel"].id)
-        output = self.bot.get_channel(OUTPUT_CHANNEL_IDS[idx])
+        output = self.bot.get_channel(guilds.xp_output(data.channel_id))
 
         embed = discord.Embed(
             title="✅ Progression Logged",
-            description=f"Submitted by {data['author'].mention}",
+            description=f"Submitted by <@{data.author_id}>",
             color=discord.Color.green(),
         )
-        embed.add_field(name="Character(s)", value=data["name"], inline=True)
-        embed.add_field(name="Level", value=data["level"], inline=True)
-        embed.add_field(name="Training Tier", value=f"TT{tier['tier']}", inline=True)
+        embed.add_field(name="Character(s)", value=data.name, inline=True)
+        embed.add_field(name="Level", value=data.level, inline=True)
+        embed.add_field(
+            name="Training Tier",
+            value=f"TT{tier}" if rules.covers(data.level) else f"TT{tier} ⚠️ level outside tiers 1-{rules.max_level}",
+            inline=True,
+        )
         embed.add_field(
             name=f"{EMOJI_STR1} Total Gains",
             value=f"**{', '.join(gains)}**",
@@ -261,11 +442,84 @@ class XPReporterCog(commands.Cog):
         if reviewer:
             embed.set_footer(text=f"Approved by {reviewer.display_name}")
 
-        await output.send(embed=embed)
+        await self.outbound.send_embed(output, embed)
 
         # ✅ AUTO-APPROVAL REACTION (FIX)
         if reviewer is None:
-            await message.add_reaction("✅")
+            await self.outbound.react(message, "✅")
+
+    # ────────────────────────
+    # Totals
+    # ────────────────────────
+    @app_commands.command(name="xp", description="Logged XP, Crowns and Rift Tokens per character")
+    @app_commands.guild_only()
+    async def slash_xp(self, interaction: discord.Interaction, member: typing.Optional[discord.Member] = None):
+        target = member or interaction.user
+        rows = await database.read(_get_character_totals, interaction.guild_id, target.id)
+        if not rows:
+            return await interaction.response.send_message(
+                f"📭 {target.display_name} has no logged progression yet.", ephemeral=True)
+
+        embed = discord.Embed(title=f"{EMOJI_STR1} {target.display_name}'s Progression", color=discord.Color.green())
+        for character, level, xp, crowns, rift_tokens, submissions in rows[:25]:
+            embed.add_field(
+                name=f"{character} (Lv {level})",
+                value=f"**{xp:,} XP**, {crowns:,} Crowns, {rift_tokens} Rift Token(s)\n{submissions} submission(s)",
+                inline=False,
+            )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="xptop", description="Characters with the most logged XP")
+    @app_commands.guild_only()
+    @app_commands.describe(period="All-time totals or XP gained since Monday (UTC)")
+    @app_commands.choices(period=[
+        app_commands.Choice(name="All time", value="all"),
+        app_commands.Choice(name="This week", value="week"),
+    ])
+    async def slash_xptop(self, interaction: discord.Interaction, period: str = "all"):
+        if period == "week":
+            rows = await database.read(_get_top_characters_since, interaction.guild_id, week_start())
+            title = "🏆 Top Characters This Week"
+        else:
+            rows = await database.read(_get_top_characters, interaction.guild_id)
+            title = "🏆 Top Characters"
+
+        embed = discord.Embed(title=title, color=discord.Color.gold())
+        if not rows:
+            embed.description = "No data yet."
+        for idx, (author_id, character, xp) in enumerate(rows, 1):
+            embed.add_field(name=f"{idx}. {character}", value=f"{xp:,} XP — <@{author_id}>", inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    # ────────────────────────
+    # Rules Reload
+    # ────────────────────────
+    @app_commands.command(name="reloadxp", description="Reload XP tiers and activities from the rules file (Mods only)")
+    @is_guild_moderator()
+    async def slash_reloadxp(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        try:
+            old, new = await reload_rules()
+        except XPRulesError as e:
+            return await interaction.followup.send(
+                f"❌ XP rules rejected, still running `{_rules.digest}`:\n{e}", ephemeral=True)
+        except Exception:
+            logger.error("XP rules reload failed:\n%s", traceback.format_exc())
+            return await interaction.followup.send("❌ XP rules reload failed; the old rules are still active. Check the bot logs.", ephemeral=True)
+
+        review = len(new.review_rules)
+        logger.info("XP rules reloaded by %s: %s -> %s", interaction.user, old.digest, new.digest)
+        await interaction.followup.send(
+            f"✅ Loaded XP rules (`{old.digest}` → `{new.digest}`)\n"
+            f"Activities: {len(new.activities)} ({len(new.activities) - review} auto, {review} manual review) • "
+            f"tiers up to level {new.max_level}", ephemeral=True)
+
+    @slash_reloadxp.error
+    async def slash_reloadxp_error(self, interaction: discord.Interaction, error):
+        if isinstance(error, app_commands.errors.MissingAnyRole):
+            await interaction.response.send_message("❌ You do not have permission to use this command.", ephemeral=True)
+        else:
+            logger.error("Error handling /reloadxp: %s", error)
 
 # ────────────────────────
 # Setup
@@ -0,0 +1,176 @@
+# xp_rules.py — XP reward rules loaded from a data file (xp_rules.json)
+# Training tiers and every activity (multiplier, currencies, required role, manual review) live
+# outside the code so a balance change is a mod-only /reloadxp instead of a restart. load_rules()
+# validates the whole file and compiles it into lookup tables; a bad file raises XPRulesError and
+# the running rules stay as they were.
+
+import hashlib
+import json
+
+REQUIRED_ROLES = ("afk",)   # names a guilds.json role: "afk" -> the guild's afk_role_id
+
+class XPRulesError(ValueError):
+    """The rules file is missing, malformed, or describes tiers/activities that can't work."""
+
+class ActivityRule:
+    """
+    One canonical activity.
+    - multiplier: applied to the tier's base XP
+    - crowns: base Crowns (0 = none), scaled by the Crowns boost
+    - rift_tokens_per_tier: Rift Tokens granted per training tier (0 = none)
+    - required_role: None, or a REQUIRED_ROLES name the author must hold
+    - needs_review: posted for manual review; text naming it anywhere is reviewed too, at the base rate
+    """
+
+    __slots__ = ("key", "multiplier", "crowns", "rift_tokens_per_tier", "required_role", "needs_review")
+
+    def __init__(self, key: str, multiplier: float, crowns: int = 0, rift_tokens_per_tier: int = 0,
+                 required_role: str = None, needs_review: bool = False):
+        self.key = key
+        self.multiplier = multiplier
+        self.crowns = crowns
+        self.rift_tokens_per_tier = rift_tokens_per_tier
+        self.required_role = required_role
+        self.needs_review = needs_review
+
+class RewardRules:
+    """
+    Compiled rules. Treat as immutable: a reload builds a new one and swaps it in whole.
+    - covers(level): whether some tier lists the level; the cog sends levels it doesn't cover to review
+    - tier(level): (base_xp, tier) from a list indexed by level; levels outside every tier get the
+      file's default_tier (kept in the otherwise unused slot 0), paid only once a mod approves
+    - normalize(progression): canonical activity key for any accepted spelling, else the cleaned text
+    - match(key): the ActivityRule for a key; text that only contains a review activity's name
+      gets a base-rate (1.0, no currencies) review rule under its own key
+    """
+
+    __slots__ = ("by_level", "activities", "spellings", "review_rules", "digest")
+
+    def __init__(self, by_level: list, activities: dict, spellings: dict, digest: str = ""):
+        self.by_level = by_level
+        self.activities = activities
+        self.spellings = spellings
+        self.review_rules = tuple(rule for rule in activities.values() if rule.needs_review)
+        self.digest = digest
+
+    @property
+    def max_level(self) -> int:
+        return len(self.by_level) - 1
+
+    def covers(self, level: int) -> bool:
+        return 0 < level < len(self.by_level)
+
+    def tier(self, level: int) -> tuple:
+        return self.by_level[level] if 0 < level < len(self.by_level) else self.by_level[0]
+
+    def normalize(self, progression: str) -> str:
+        text = " ".join(progression.lower().split())
+        # Unknown text keeps its normalized form: review activities are matched inside it
+        return self.spellings.get(text) or text.replace("farm", "training")
+
+    def match(self, key: str):
+        rule = self.activities.get(key)
+        if rule is not None:
+            return rule
+        for rule in self.review_rules:
+            if rule.key in key:
+                # "battle vs ogre" goes to review like "battle", but the multiplier only pays the exact activity
+                return ActivityRule(key, 1.0, needs_review=True)
+        return None
+
+def _number(section: dict, key: str, where: str, lo: float, hi: float, default=None) -> float:
+    value = section.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not lo <= value <= hi:
+        raise XPRulesError(f"{where}.{key} must be a number between {lo} and {hi} (got {value!r})")
+    return float(value)
+
+def _integer(section: dict, key: str, where: str, lo: int, hi: int, default=None) -> int:
+    value = section.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, int) or not lo <= value <= hi:
+        raise XPRulesError(f"{where}.{key} must be a whole number between {lo} and {hi} (got {value!r})")
+    return value
+
+def _tier_entry(entry: dict, where: str) -> tuple:
+    return _integer(entry, "base_xp", where, 0, 1_000_000), _integer(entry, "tier", where, 1, 1000)
+
+def _compile_tiers(raw, default) -> list:
+    if not isinstance(raw, list) or not raw:
+        raise XPRulesError("'tiers' must be a non-empty list")
+    by_level = [None]   # index 0: levels start at 1, so it holds default_tier (filled in below)
+    for n, entry in enumerate(raw):
+        where = f"tiers[{n}]"
+        if not isinstance(entry, dict):
+            raise XPRulesError(f"{where} must be an object")
+        lo = _integer(entry, "min_level", where, 1, 10_000)
+        hi = _integer(entry, "max_level", where, lo, 10_000)
+        if lo != len(by_level):
+            # Contiguous from level 1, so every level up to the top has exactly one tier
+            raise XPRulesError(f"{where}.min_level must be {len(by_level)} (tiers must start at 1 with no gaps or overlaps)")
+        by_level.extend([_tier_entry(entry, where)] * (hi - lo + 1))
+    if not isinstance(default, dict):
+        raise XPRulesError("'default_tier' must be an object with base_xp and tier")
+    by_level[0] = _tier_entry(default, "default_tier")
+    return by_level
+
+def _compile_activities(raw) -> tuple:
+    if not isinstance(raw, dict) or not raw:
+        raise XPRulesError("'activities' must be a non-empty object")
+    activities, spellings = {}, {}
+
+    def spell(text: str, key: str, where: str):
+        # "farm" and "training" are interchangeable, so each spelling is accepted both ways
+        for variant in {text, text.replace("training", "farm"), text.replace("farm", "training")}:
+            owner = spellings.setdefault(variant, key)
+            if owner != key:
+                raise XPRulesError(f"{where}: '{variant}' already means '{owner}'")
+
+    for name, entry in raw.items():
+        key = " ".join(name.lower().split())
+        where = f"activities.{name}"
+        if not key or not isinstance(entry, dict):
+            raise XPRulesError(f"{where} must be a non-empty name with an object of settings")
+        if key in activities:
+            raise XPRulesError(f"{where} is listed twice")
+        role = entry.get("required_role")
+        if role is not None and role not in REQUIRED_ROLES:
+            raise XPRulesError(f"{where}.required_role must be one of {', '.join(REQUIRED_ROLES)} (got {role!r})")
+        review = entry.get("review", False)
+        if not isinstance(review, bool):
+            raise XPRulesError(f"{where}.review must be true or false")
+        activities[key] = ActivityRule(
+            key,
+            _number(entry, "multiplier", where, 0.0, 100.0),
+            _integer(entry, "crowns", where, 0, 10_000_000, default=0),
+            _integer(entry, "rift_tokens_per_tier", where, 0, 1000, default=0),
+            role,
+            review,
+        )
+        spell(key, key, where)
+        aliases = entry.get("aliases", [])
+        if not isinstance(aliases, list):
+            raise XPRulesError(f"{where}.aliases must be a list of strings")
+        for alias in aliases:
+            if not isinstance(alias, str) or not alias.strip():
+                raise XPRulesError(f"{where}.aliases contains an empty or non-string alias: {alias!r}")
+            spell(" ".join(alias.lower().split()), key, where)
+    return activities, spellings
+
+def parse_rules(raw, digest: str = "") -> RewardRules:
+    """Validate and compile an already-decoded rules document."""
+    if not isinstance(raw, dict):
+        raise XPRulesError("the rules file must contain a JSON object")
+    by_level = _compile_tiers(raw.get("tiers"), raw.get("default_tier"))
+    activities, spellings = _compile_activities(raw.get("activities"))
+    return RewardRules(by_level, activities, spellings, digest)
+
+def load_rules(path: str) -> RewardRules:
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        raise XPRulesError(f"can't read {path}: {e.strerror}") from None
+    try:
+        raw = json.loads(data.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise XPRulesError(f"{path} is not valid JSON: {e}") from None
+    return parse_rules(raw, hashlib.sha1(data).hexdigest()[:8])